@@ -1,18 +1,20 @@
 from decimal import Decimal
 from savoia.config.decimal_config import DECIMAL_PLACES
 
+import io
 import os
 import re
-# import numpy as np
+import numpy as np
 import pandas as pd
 
 from savoia.event.event import Event, TickEvent
-from savoia.types.types import Pair
+from savoia.types.types import Pair, TickColumns
 
 from logging import getLogger, Logger
-from typing import List, Iterator, Tuple
+from typing import Dict, List, Iterator, Optional, Tuple
 from queue import Queue
 from abc import ABCMeta, abstractmethod
+from datetime import datetime
 import time
 
 
@@ -45,13 +47,34 @@ class DataFeeder(metaclass=ABCMeta):
     def run(self) -> None:
         pass
 
+    def load_columns(self, start: Optional[pd.Timestamp] = None,
+            end: Optional[pd.Timestamp] = None) -> Dict[Pair, TickColumns]:
+        '''Returns the ticks to be fed as NumPy columns by pair, in the
+        order they are fed. Ticks out of start to end (exclusive) may be
+        left out. Only historic data feeders support it.'''
+        raise Exception(
+            f"{self.__class__.__name__} does not support loading columns.")
+
+    def iter_columns(self, start: Optional[pd.Timestamp] = None) \
+            -> Iterator[Dict[Pair, TickColumns]]:
+        '''Yields the ticks to be fed from start on as load_columns()
+        returns them, a chunk at a time, so that they are never held in
+        memory all at once.'''
+        raise Exception(
+            f"{self.__class__.__name__} does not support loading columns.")
+
 
 class HistoricCSVDataFeeder(DataFeeder):
     """
     HistoricCSVDataFeeder is designed to read CSV files of
     tick data for each requested currency pair and stream those
     to the provided events queue.
+
+    Times of the ticks are day-first, e.g. '13.01.2014 00:02:24.967', and
+    parsed with TIME_FORMAT both when streamed and when loaded as columns.
     """
+    TIME_FORMAT = '%d.%m.%Y %H:%M:%S.%f'
+
     logger: Logger
     pairs: List[Pair]
     feed_q: 'Queue[Event]'
@@ -61,9 +84,10 @@ class HistoricCSVDataFeeder(DataFeeder):
     cur_date_idx: int
     cur_date_pairs: pd.DataFrame
     count: int
+    start: Optional[pd.Timestamp]
 
     def __init__(self, pairs: List[Pair], feed_q: 'Queue[Event]',
-            csv_dir: str):
+            csv_dir: str, start: Optional[pd.Timestamp] = None):
         """
         Initialises the HistoricCSVDataFeeder by requesting
         the location of the CSV files and a list of symbols.
@@ -76,14 +100,17 @@ class HistoricCSVDataFeeder(DataFeeder):
         pairs - The list of currency pairs to obtain.
         feed_q - The events queue to send the ticks to.
         csv_dir - Absolute directory path to the CSV files.
+        start - Ticks before the time are not fed, having been given to
+            the strategies by warm-up.
         """
         self.logger = getLogger(__name__)
         self.pairs = pairs
         self.feed_q = feed_q
         self.csv_dir = csv_dir
+        self.start = None if start is None else pd.Timestamp(start)
         self.file_dates = self._list_all_file_dates()
         self.continue_backtest = True
-        self.cur_date_idx = 0
+        self.cur_date_idx = self._first_date_idx()
         self.cur_date_pairs = self._open_convert_csv_files_for_day(
             self.file_dates[self.cur_date_idx]
         )
@@ -107,6 +134,27 @@ class HistoricCSVDataFeeder(DataFeeder):
         de_dup_csv.sort()
         return de_dup_csv
 
+    def _day_of(self, date_str: str) -> pd.Timestamp:
+        '''Returns the day of the ticks in the files of the date.'''
+        return pd.Timestamp(date_str)
+
+    def _dates_within(self, start: Optional[pd.Timestamp],
+            end: Optional[pd.Timestamp]) -> List[str]:
+        '''Returns the dates of the files with ticks from start to end
+        (exclusive).'''
+        _day = pd.Timedelta(days=1)
+        return [d for d in self.file_dates
+            if (start is None or self._day_of(d) + _day > start)
+            and (end is None or self._day_of(d) < end)]
+
+    def _first_date_idx(self) -> int:
+        '''Returns the index of the first date with ticks from the start,
+        so that files of the days before are not read.'''
+        _dates = self._dates_within(self.start, None)
+        if not _dates:
+            return len(self.file_dates) - 1
+        return self.file_dates.index(_dates[0])
+
     def _open_convert_csv_files_for_day(self, date_str: str) \
             -> Iterator[Tuple[str, str, str, str]]:
         """
@@ -136,6 +184,54 @@ class HistoricCSVDataFeeder(DataFeeder):
 
         return _gen()
 
+    def load_columns(self, start: Optional[pd.Timestamp] = None,
+            end: Optional[pd.Timestamp] = None) -> Dict[Pair, TickColumns]:
+        """
+        Reads the CSV files of the dates with ticks from start to end
+        (exclusive) into NumPy columns by pair. Ticks of those days out of
+        start to end are not dropped.
+        """
+        return self._read_columns(self._dates_within(start, end))
+
+    def iter_columns(self, start: Optional[pd.Timestamp] = None) \
+            -> Iterator[Dict[Pair, TickColumns]]:
+        '''Yields the columns of a day at a time from the day of start.'''
+        for date_str in self._dates_within(start, None):
+            yield self._read_columns([date_str])
+
+    def _read_columns(self, dates: List[str]) -> Dict[Pair, TickColumns]:
+        '''Reads the CSV files of the dates into NumPy columns by pair.
+        Lines are sorted within each file as _open_convert_csv_files_for_day
+        does, so that the n-th row of a pair is its n-th tick streamed.'''
+        _columns: Dict[Pair, TickColumns] = {}
+        _lines: List[str]
+        _frame: pd.DataFrame
+
+        for p in self.pairs:
+            _lines = []
+            for date_str in dates:
+                pair_path = os.path.join(self.csv_dir,
+                    '%s_%s.csv' % (p, date_str))
+                with open(pair_path, 'r') as f:
+                    f.__next__()
+                    _lines.extend(sorted(
+                        line if line.endswith('\n') else line + '\n'
+                        for line in f))
+            if not _lines:
+                _columns[p] = {'time': np.empty(0, dtype=np.int64),
+                    'bid': np.empty(0), 'ask': np.empty(0)}
+                continue
+            _frame = pd.read_csv(io.StringIO(''.join(_lines)), header=None,
+                usecols=[0, 1, 2], names=['time', 'ask', 'bid'])
+            _columns[p] = {
+                'time': pd.to_datetime(_frame['time'],
+                    format=self.TIME_FORMAT).values
+                .astype('datetime64[ns]').astype(np.int64),
+                'bid': _frame['bid'].values.astype(np.float64),
+                'ask': _frame['ask'].values.astype(np.float64),
+            }
+        return _columns
+
     def _update_csv_for_day(self) -> bool:
         try:
             dt = self.file_dates[self.cur_date_idx + 1]
@@ -156,7 +252,9 @@ class HistoricCSVDataFeeder(DataFeeder):
             else:  # End of the data
                 self.continue_backtest = False
                 return
-        date = pd.Timestamp(date)
+        date = pd.Timestamp(datetime.strptime(date, self.TIME_FORMAT))
+        if self.start is not None and date < self.start:
+            return
         bid = Decimal(bid).quantize(DECIMAL_PLACES)
         ask = Decimal(ask).quantize(DECIMAL_PLACES)
 
@@ -1,47 +1,97 @@
-from savoia.types.types import Pair
-from savoia.event.event import Event
+from savoia.types.types import Pair, TickColumns
+from savoia.event.event import Event, TickEvent, OrderEvent, \
+    OrderBatchEvent, FillEvent, SignalEvent
 from savoia.datafeed.datafeed import DataFeeder
 from savoia.ticker.ticker import Ticker
-from savoia.strategy.strategy import Strategy
+from savoia.strategy.strategy import Strategy, VectorizedStrategy
+from savoia.indicator.registry import IndicatorRegistry
 from savoia.portfolio.portfolio import Portfolio
+from savoia.portfolio.vectorized import VectorizedPortfolio
+from savoia.portfolio.risk import RiskManager
 from savoia.execution.execution import ExecutionHandler
+from savoia.execution.order_registry import OrderRegistry
+from savoia.execution.coalescer import OrderCoalescer
 from savoia.result.result import Result, ResultHandler
-from savoia.config.decimal_config import initializeDecimalContext
+from savoia.result.sampling import EquitySampler
+from savoia.config.decimal_config import initializeDecimalContext, \
+    DECIMAL_PLACES
 
 from logging import getLogger, Logger
-from typing import List, Dict, Union
+from typing import Any, List, Dict, Union, Optional, cast, TYPE_CHECKING
 from typing_extensions import TypedDict
 from decimal import Decimal
 from importlib import import_module
+from inspect import signature
 from queue import Queue, Empty
 import time
 import threading
 
+import numpy as np
+import pandas as pd
+
 
 class datafeed_params(TypedDict):
     module_name: str
     params: Dict[str, Union[str, Decimal, int, float, List[Pair],
-        'Queue[Event]']]
+        'Queue[Event]', pd.Timestamp]]
 
 
 class execution_params(TypedDict):
     module_name: str
-    params: Dict[str, Union[str, Decimal, int, float, 'Queue[Event]']]
+    params: Dict[str, Union[str, Decimal, int, float, 'Queue[Event]',
+        Ticker]]
+
 
+class strategy_optional_params(TypedDict, total=False):
+    name: str
 
-class strategy_params(TypedDict):
+
+class strategy_params(strategy_optional_params):
     module_name: str
     params: Dict[str, Union[str, Decimal, int, float, List[Pair],
-        'Queue[Event]']]
+        'Queue[Event]', Ticker, IndicatorRegistry]]
 
 
 class result_params(TypedDict):
     module_name: str
     params: Dict[str, Union[str, Decimal, int, float, List[Pair],
-        'Queue[Result]']]
+        'Queue[Result]', Dict[str, object]]]
+
+
+class sampling_params(TypedDict):
+    module_name: str
+    params: Dict[str, Union[str, Decimal, int, float]]
+
+
+class risk_params(TypedDict, total=False):
+    max_pair_exposure: Decimal
+    max_currency_exposure: Dict[str, Decimal]
+    max_leverage: Decimal
+
+
+class warm_up_params(TypedDict, total=False):
+    start: str
+    lookback: str
+
+
+class coalescing_params(TypedDict, total=False):
+    window: float
+    ticks: int
+    cross: bool  # Backtests only by default
+
+
+class engine_optional_params(TypedDict, total=False):
+    tick_history: Dict[Pair, int]
+    equity_sampling: sampling_params
+    vectorized_portfolio: bool
+    accounting: str
+    risk: risk_params
+    warm_up: warm_up_params
+    order_timeout: float
+    coalescing: coalescing_params
 
 
-class engine_params(TypedDict):
+class engine_params(engine_optional_params):
     pairs: List[Pair]
     home_currency: str
     equity: Decimal
@@ -50,6 +100,36 @@ class engine_params(TypedDict):
     heart_beat: float
 
 
+if TYPE_CHECKING:
+    _EventQueue = Queue[Event]
+else:  # Queue is not subscriptable at runtime before Python 3.9
+    _EventQueue = Queue
+
+
+class StrategyQueue(_EventQueue):
+    '''
+    StrategyQueue is handed to a strategy in place of the event queue when
+    multiple strategies run in one engine. It forwards the events put by the
+    strategy to the event queue, tagged with the name of the strategy so
+    that they reach the portfolio of the strategy. Refs of signals are
+    prefixed with the name, as those of strategies may coincide.
+    '''
+    event_q: 'Queue[Event]'
+    strategy: str
+
+    def __init__(self, event_q: 'Queue[Event]', strategy: str) -> None:
+        super().__init__()
+        self.event_q = event_q
+        self.strategy = strategy
+
+    def put(self, item: Event, block: bool = True,
+            timeout: Optional[float] = None) -> None:
+        setattr(item, 'strategy', self.strategy)
+        if isinstance(item, SignalEvent):
+            item.ref = f'{self.strategy}:{item.ref}'
+        self.event_q.put(item, block, timeout)
+
+
 class Engine(object):
     """
     Enscapsulates the settings and components for carrying out
@@ -59,10 +139,16 @@ class Engine(object):
     pairs: List[Pair]
     datafeed: DataFeeder
     execution: ExecutionHandler
-    strategy: Strategy
+    strategies: List[Strategy]
+    dispatch: Dict[Pair, List[Strategy]]
     result: ResultHandler
-    portfolio: Portfolio
+    portfolios: Dict[str, Portfolio]
     ticker: Ticker
+    indicators: IndicatorRegistry
+    warm_up: Optional[warm_up_params]
+    orders: OrderRegistry
+    coalescer: Optional[OrderCoalescer]
+    batch: List[OrderEvent]
     equity: Decimal
     home_currency: str
     heartbeat: float
@@ -75,12 +161,26 @@ class Engine(object):
 
     def __init__(
         self, engine: engine_params, datafeed: datafeed_params,
-        execution: execution_params, strategy: strategy_params,
+        execution: execution_params,
+        strategy: Union[strategy_params, List[strategy_params]],
         result: result_params
     ):
         """
-        Initializes the backtest.
+        Initializes the backtest. strategy may be a list to run multiple
+        strategies on the same ticks, each with a portfolio of its own
+        starting with the whole equity.
         """
+        _strategies: List[strategy_params]
+        _names: List[str]
+        # Parameters as given, before the components are injected.
+        _parameters: Dict[str, object] = {
+            'engine': dict(engine),
+            'datafeed': self._copy_params(datafeed),
+            'execution': self._copy_params(execution),
+            'strategy': [self._copy_params(_s) for _s in strategy]
+                if isinstance(strategy, list) else self._copy_params(strategy),
+        }
+
         self.logger = getLogger(__name__)
         self.pairs = engine['pairs']
         self.home_currency = engine['home_currency']
@@ -93,19 +193,41 @@ class Engine(object):
         self.exec_q = Queue()
         self.result_q = Queue()
         self.iters = 0
+        self.ticker = Ticker(self.pairs, engine.get('tick_history'))
+        self.indicators = IndicatorRegistry()
+        self.warm_up = engine.get('warm_up')
+        self.orders = OrderRegistry(engine.get('order_timeout'))
+        self.coalescer = None if 'coalescing' not in engine else \
+            OrderCoalescer(self.ticker, engine['coalescing'].get('window', 0),
+                engine['coalescing'].get('ticks', 0),
+                engine['coalescing'].get('cross', self.isBacktest))
+        self.batch = []
         self.datafeed = self._setup_datafeed(datafeed)
         self.execution = self._setup_execution(execution)
-        self.strategy = self._setup_strategy(strategy)
-        self.result = self._setup_result(result)
-        self.ticker = Ticker(self.pairs)
-        self.portfolio = Portfolio(
-            ticker=self.ticker,
-            event_q=self.event_q,
-            result_q=self.result_q,
-            home_currency=self.home_currency,
-            pairs=self.pairs,
-            equity=self.equity
-        )
+        _strategies = strategy if isinstance(strategy, list) else [strategy]
+        _names = self._name_strategies(_strategies)
+        self.strategies = [self._setup_strategy(_s, _name)
+            for _s, _name in zip(_strategies, _names)]
+        self.dispatch = self._setup_dispatch()
+        self.result = self._setup_result(result, _parameters)
+        # Result handlers may replace the queue, e.g. with shared memory.
+        self.result_q = self.result.result_q
+        _portfolio = VectorizedPortfolio \
+            if engine.get('vectorized_portfolio', False) else Portfolio
+        self.portfolios = {}
+        for _name in _names:
+            self.portfolios[_name] = _portfolio(
+                ticker=self.ticker,
+                event_q=self.event_q,
+                result_q=self.result_q,
+                home_currency=self.home_currency,
+                pairs=self.pairs,
+                equity=self.equity,
+                sampler=self._setup_sampler(engine.get('equity_sampling')),
+                accounting=engine.get('accounting', 'average'),
+                risk=self._setup_risk(engine),
+                strategy=_name
+            )
         self.toContinue = True
         initializeDecimalContext()
 
@@ -115,6 +237,8 @@ class Engine(object):
         _params = datafeed['params']
         _params['pairs'] = self.pairs
         _params['feed_q'] = self.feed_q
+        if self.warm_up is not None:
+            _params['start'] = pd.Timestamp(self.warm_up['start'])
 
         df = getattr(_module, datafeed['module_name'])
         return df(**_params)
@@ -128,20 +252,63 @@ class Engine(object):
         _params['exec_q'] = self.exec_q
 
         exe = getattr(_module, execution['module_name'])
+        # Simulators filling against the market get access to the ticker.
+        if 'ticker' in signature(exe).parameters:
+            _params['ticker'] = self.ticker
         return exe(**_params)
 
-    def _setup_strategy(self, strategy: strategy_params) \
-            -> ExecutionHandler:
+    @classmethod
+    def _name_strategies(cls, strategies: List[strategy_params]) -> List[str]:
+        '''Names the strategies after either their 'name' or module_name,
+        suffixed with the index if not unique. A single strategy is left
+        unnamed so that its results are output as before.'''
+        _names: List[str]
+        if len(strategies) == 1:
+            return ['']
+        _names = [_s.get('name', _s['module_name']) for _s in strategies]
+        return [_name if _names.count(_name) == 1 else f'{_name}_{_i}'
+            for _i, _name in enumerate(_names)]
+
+    def _setup_strategy(self, strategy: strategy_params, name: str = '') \
+            -> Strategy:
         _module = import_module('savoia.strategy.strategy')
         
         _params = strategy['params']
-        _params['pairs'] = self.pairs
-        _params['event_q'] = self.event_q
+        # Strategies may be given a subset of the pairs.
+        _pairs = cast(List[Pair], _params.setdefault('pairs', self.pairs))
+        for _pair in _pairs:
+            if _pair not in self.pairs:
+                raise Exception(f"Unexpected pair for strategy: {_pair}, " +
+                    f"expected one of {self.pairs}.")
+        _params['event_q'] = StrategyQueue(self.event_q, name) if name \
+            else self.event_q
 
         exe = getattr(_module, strategy['module_name'])
+        # Strategies asking for the ticker get access to its tick history.
+        if 'ticker' in signature(exe).parameters:
+            _params['ticker'] = self.ticker
+        # Likewise for the indicators shared among strategies.
+        if 'indicators' in signature(exe).parameters:
+            _params['indicators'] = self.indicators
         return exe(**_params)
 
-    def _setup_result(self, result: result_params) -> ResultHandler:
+    def _setup_dispatch(self) -> Dict[Pair, List[Strategy]]:
+        '''Indexes the strategies by the pairs they subscribe to.'''
+        _dispatch: Dict[Pair, List[Strategy]] = \
+            dict((_pair, []) for _pair in self.pairs)
+        for _strategy in self.strategies:
+            for _pair in _strategy.subscriptions():
+                _dispatch[_pair].append(_strategy)
+        return _dispatch
+
+    @classmethod
+    def _copy_params(cls, config: Any) -> Dict[str, object]:
+        _copy = dict(config)
+        _copy['params'] = dict(config['params'])
+        return _copy
+
+    def _setup_result(self, result: result_params,
+            parameters: Dict[str, object]) -> ResultHandler:
         _module = import_module('savoia.result.result')
         
         _params = result['params']
@@ -149,8 +316,25 @@ class Engine(object):
         _params['result_q'] = self.result_q
 
         exe = getattr(_module, result['module_name'])
+        # Handlers recording runs get the parameters of the run.
+        if 'parameters' in signature(exe).parameters:
+            _params.setdefault('parameters', parameters)
         return exe(**_params)
 
+    def _setup_sampler(self, sampling: Optional[sampling_params]) \
+            -> Optional[EquitySampler]:
+        if sampling is None:
+            return None
+        _module = import_module('savoia.result.sampling')
+
+        smp = getattr(_module, sampling['module_name'])
+        return smp(**sampling['params'])
+
+    def _setup_risk(self, engine: engine_params) -> Optional[RiskManager]:
+        if 'risk' not in engine:
+            return None
+        return RiskManager(**engine['risk'])
+
     def _run_engine(self) -> None:
         """
         Carries out an infinite while loop that polls the
@@ -159,13 +343,31 @@ class Engine(object):
         loop will then pause for "heartbeat" seconds and
         continue until the maximum number of iterations is
         exceeded.
+
+        Orders are tracked in flight by the order registry, so that any
+        number of them are sent to the execution handler without waiting
+        for each fill. The orders issued upon a tick are sent in a batch
+        once the events of the tick have been processed. In backtest, the
+        next tick is processed only after the orders in flight have been
+        filled or expired.
         """
-        _wait: bool = False
+        _wait: bool
+        _timeout: Optional[float]
         self.logger.info("Running engine...")
         while self.iters < self.max_iters and self.toContinue:
+            _wait = self.isBacktest and not self.execution.inline and \
+                len(self.orders) > 0
+            _timeout = self.orders.next_expiry(time.monotonic()) \
+                if _wait else None
             try:
-                event = self.event_q.get(_wait)
+                event = self.event_q.get(_wait, _timeout)
             except Empty:
+                self._expire_orders()
+                if _wait and len(self.orders) > 0:
+                    # Timed out, but still waiting for the other orders.
+                    continue
+                if self._release_orders():
+                    continue
                 try:
                     tick_event = self.feed_q.get(False)
                 except Empty:
@@ -177,57 +379,242 @@ class Engine(object):
                     elif tick_event.type != 'TICK':
                         raise Exception
                     else:
-                        self.logger.debug('Process TICK -%s' % tick_event)
-                        self.ticker.update_ticker(tick_event)
-                        self.portfolio.update_portfolio(tick_event)
-                        self.strategy.calculate_signals(tick_event)
+                        _tick = cast(TickEvent, tick_event)
+                        self.logger.debug('Process TICK -%s' % _tick)
+                        self.ticker.update_ticker(_tick)
+                        if self.coalescer is not None:
+                            self.coalescer.on_tick(_tick)
+                        if self.execution.inline:
+                            self.execution.on_tick(_tick)
+                        for _portfolio in self.portfolios.values():
+                            _portfolio.update_portfolio(_tick)
+                        self.indicators.update(_tick)
+                        for _strategy in self.dispatch[_tick.pair]:
+                            _strategy.calculate_signals(_tick)
             else:
-                _wait = False
                 if event is not None:
-                    if event.type == 'SIGNAL':
-                        self.logger.debug("Process SIGNAL -%s" % event)
-                        self.portfolio.execute_signal(event)
-                    elif event.type == 'ORDER':
-                        self.logger.debug("Process ORDER -%s" % event)
-                        self.exec_q.put(event)
-                        _wait = self.isBacktest
-                    elif event.type == 'FILL':
-                        self.logger.debug("Process FILL -%s" % event)
-                        self.portfolio.execute_fill(event)
-                    else:
-                        raise Exception
+                    self._process_event(event)
             time.sleep(self.heartbeat)
             self.iters += 1
+        if not self.toContinue:
+            self._drain_orders()
+        for _strategy in self.strategies:
+            _strategy.stop()
+        for _name, _portfolio in self.portfolios.items():
+            _portfolio.flush_results()
+            if _portfolio.risk is not None:
+                self.logger.info(f'Risk check results {_name}: ' +
+                    f'{_portfolio.risk.report()}')
+        if self.coalescer is not None and self.coalescer.held:
+            # Left held if stopped by max_iters before the end of the feed.
+            self.logger.warning('Orders held unsubmitted at the end: ' +
+                f'{self.coalescer.held}')
+        self.logger.info(f'Orders: {self.orders.report()}')
         self.exec_q.put(None)
         return
 
+    def _process_event(self, event: Event) -> None:
+        '''Handles an event of the strategies, portfolios or execution.'''
+        _signal: SignalEvent
+        _order: OrderEvent
+
+        if event.type == 'SIGNAL':
+            self.logger.debug("Process SIGNAL -%s" % event)
+            _signal = cast(SignalEvent, event)
+            self.portfolios[_signal.strategy].execute_signal(_signal)
+        elif event.type == 'ORDER':
+            self.logger.debug("Process ORDER -%s" % event)
+            _order = cast(OrderEvent, event)
+            if self.coalescer is None or not self.coalescer.add(_order):
+                self.batch.append(_order)
+        elif event.type == 'FILL':
+            self.logger.debug("Process FILL -%s" % event)
+            self._process_fill(cast(FillEvent, event))
+        else:
+            raise Exception
+
+    def _drain_orders(self) -> None:
+        '''Submits the orders still held by the coalescer or batched at the
+        end of the feed, and processes the events until the orders in
+        flight have been filled or expired.'''
+        _orders: List[OrderEvent]
+        _fills: List[FillEvent]
+        _timeout: Optional[float]
+
+        if self.coalescer is not None and self.coalescer.held:
+            _orders, _fills = self.coalescer.due(flush=True)
+            for _fill in _fills:
+                self._execute_fill(_fill)
+            self.batch += _orders
+        while True:
+            self._release_orders()
+            if len(self.orders) == 0 and self.event_q.empty():
+                return
+            _timeout = self.orders.next_expiry(time.monotonic())
+            try:
+                self._process_event(self.event_q.get(True, _timeout))
+            except Empty:
+                self._expire_orders()
+
+    def _submit_orders(self, events: List[OrderEvent]) -> None:
+        _now = time.monotonic()
+        for _event in events:
+            self.orders.submit(_event, _now)
+        if self.execution.inline:
+            for _fill in self.execution.execute_orders(events):
+                self._process_fill(_fill)
+        else:
+            self.exec_q.put(OrderBatchEvent(events))
+
+    def _process_fill(self, event: FillEvent) -> None:
+        self.orders.fill(event)
+        self._allocate_fill(event)
+
+    def _allocate_fill(self, event: FillEvent) -> None:
+        '''Executes the fill, or those of the orders netted into the order
+        filled.'''
+        if self.coalescer is None:
+            self._execute_fill(event)
+        else:
+            for _fill in self.coalescer.allocate(event):
+                self._execute_fill(_fill)
+
+    def _execute_fill(self, event: FillEvent) -> None:
+        # Orders rejected, cancelled or expired have nothing filled.
+        if event.status in ('filled', 'partial'):
+            self.portfolios[event.strategy].execute_fill(event)
+        else:
+            self.portfolios[event.strategy].release_order(event.ref)
+
+    def _release_orders(self) -> bool:
+        '''Submits the batch of orders, together with those held by the
+        coalescer which are due, and returns whether any order has been
+        released.'''
+        _orders: List[OrderEvent] = []
+        _fills: List[FillEvent] = []
+        if self.coalescer is not None and self.coalescer.held:
+            _orders, _fills = self.coalescer.due()
+            for _fill in _fills:
+                self._execute_fill(_fill)
+        _orders = self.batch + _orders
+        self.batch = []
+        if _orders:
+            self._submit_orders(_orders)
+        return len(_orders) + len(_fills) > 0
+
+    def _expire_orders(self) -> None:
+        _order: OrderEvent
+        for _expired in self.orders.expire(time.monotonic()):
+            self.logger.error(f'Order expired in flight: {_expired}')
+            _order = _expired.order
+            self._allocate_fill(FillEvent(ref=_order.ref, pair=_order.pair,
+                time=_order.time, units=Decimal('0'), price=_order.price,
+                status='expired', strategy=_order.strategy))
+
     def _output_performance(self) -> None:
         """
         Outputs the strategy performance from the backtest.
         """
         self.logger.info("Calculating Performance Metrics...")
-        self.portfolio.output_results()
+        for _portfolio in self.portfolios.values():
+            _portfolio.output_results()
+
+    @classmethod
+    def _slice_columns(cls, columns: Dict[Pair, TickColumns],
+            start: Optional[int], end: Optional[int]) \
+            -> Dict[Pair, TickColumns]:
+        '''Returns views of the ticks from start (inclusive) to end
+        (exclusive), both in nanoseconds since the epoch.'''
+        _sliced: Dict[Pair, TickColumns] = {}
+        for _pair, _columns in columns.items():
+            _from = 0 if start is None else \
+                int(np.searchsorted(_columns['time'], start))
+            _to = len(_columns['time']) if end is None else \
+                int(np.searchsorted(_columns['time'], end))
+            _sliced[_pair] = {
+                'time': _columns['time'][_from:_to],
+                'bid': _columns['bid'][_from:_to],
+                'ask': _columns['ask'][_from:_to],
+            }
+        return _sliced
+
+    def _prime_ticker(self, columns: Dict[Pair, TickColumns]) -> None:
+        '''Updates the ticker with the last tick of each pair.'''
+        _last = sorted((int(_c['time'][-1]), _pair, _c['bid'][-1],
+            _c['ask'][-1]) for _pair, _c in columns.items() if len(_c['time']))
+        for _time, _pair, _bid, _ask in _last:
+            self.ticker.update_ticker(TickEvent(_pair, pd.Timestamp(_time),
+                Decimal(str(float(_bid))).quantize(DECIMAL_PLACES),
+                Decimal(str(float(_ask))).quantize(DECIMAL_PLACES)))
+
+    def _prepare(self) -> None:
+        '''
+        Loads the ticks as columns if needed before the event loop.
+        With warm-up, the ticks within lookback before the start prime the
+        ticker, and warm up the indicators and strategies in bulk, so that
+        the event loop starts processing at the start with their state
+        ready. Vectorized strategies generate their signals over the ticks
+        from the beginning of the lookback.
+        '''
+        _vectorized = [_s for _s in self.strategies
+            if isinstance(_s, VectorizedStrategy)]
+        _columns: Dict[Pair, TickColumns]
+        _warm: Dict[Pair, TickColumns]
+        _start: pd.Timestamp
+        _from: Optional[pd.Timestamp] = None
+        _lookback: Optional[str]
+
+        if self.warm_up is None and not _vectorized:
+            return
+        if self.warm_up is not None:
+            _start = pd.Timestamp(self.warm_up['start'])
+            _lookback = self.warm_up.get('lookback')
+            if _lookback is not None:
+                _from = _start - pd.Timedelta(_lookback)
+            _warm = self._slice_columns(
+                self.datafeed.load_columns(_from, _start),
+                None if _from is None else _from.value, _start.value)
+            self.logger.info('Warming up with ticks: ' +
+                f'{dict((_p, len(_c["time"])) for _p, _c in _warm.items())}')
+            self._prime_ticker(_warm)
+            self.indicators.warm_up(_warm)
+            for _strategy in self.strategies:
+                _strategy.warm_up(dict((_pair, _warm[_pair])
+                    for _pair in _strategy.subscriptions()))
+        if _vectorized:
+            self.logger.info('Generating signals in bulk...')
+            # A day at a time, not to hold the ticks of the whole run.
+            for _columns in self.datafeed.iter_columns(_from):
+                if _from is not None:
+                    _columns = self._slice_columns(_columns, _from.value,
+                        None)
+                for _strategy in _vectorized:
+                    _strategy.prepare(_columns)
 
     def _run(self) -> None:
+        self._prepare()
         _result = threading.Thread(target=self.result.run)
         _datafeed = threading.Thread(target=self.datafeed.run)
         _execution = threading.Thread(target=self.execution.run)
         _engine = threading.Thread(target=self._run_engine)
 
         _result.start()
-        _execution.start()
+        if not self.execution.inline:
+            _execution.start()
         _engine.start()
         _datafeed.start()
 
         _datafeed.join()
         _engine.join()
-        _execution.join()
+        if not self.execution.inline:
+            _execution.join()
         self.result_q.put(None)
         _result.join()
 
-    def run(self) -> None:
+    def run(self) -> ResultHandler:
         """
-        Runs the engine.
+        Runs the engine, and returns the result handler, from which the
+        results are read when kept in memory.
         """
         if self.isBacktest:
             _start = time.time()
@@ -240,3 +627,4 @@ class Engine(object):
             self.logger.info('Start Live trading.')
             self._run()
             self.logger.info("Trading complete.")
+        return self.result
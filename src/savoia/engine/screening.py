@@ -0,0 +1,241 @@
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+from savoia.config.decimal_config import DECIMAL_PLACES
+from savoia.strategy.strategy import Signals
+from savoia.ticker.currency_graph import CurrencyGraph
+from savoia.types.types import Pair, TickColumns
+
+from logging import getLogger, Logger
+from typing import Any, Callable, Dict, List, Tuple
+
+
+# Average prices are rounded as Position quantizes them.
+PLACES: int = -int(DECIMAL_PLACES.as_tuple().exponent)
+
+
+class VectorizedBacktest(object):
+    """
+    VectorizedBacktest screens strategies over tick arrays in bulk, without
+    the event loop, for a first pass over many parameter combinations.
+
+    The ticks of all the pairs are merged into a single timeline ordered as
+    HistoricCSVDataFeeder streams them. Signals are filled at the ask (buy)
+    or bid (sell) of the tick issuing them, and a signal is dropped until
+    the prices needed to value the position have been ticked, as Portfolio
+    does. Positions follow the conventions of Position with 'average'
+    accounting: balance takes the PnL of the units closed against the
+    average price, and upl is the position valued at bid (long) or ask
+    (short) against the average price, converted into home currency with
+    the bid of the quote/home pair. Where the quote/home pair is not given,
+    its bid is derived through the chain of pairs CurrencyGraph finds, as
+    the ticker derives the cross.
+
+    The equity curve holds one row per tick, taken after the tick and
+    before the fills it triggers, like the EquityResults of Portfolio with
+    EveryTickSampler, and a final row after the fills of the last tick if
+    any. Everything is float64, so that results agree with
+    the event-driven engine within rounding error only.
+    """
+    logger: Logger
+    columns: Dict[Pair, TickColumns]
+    pairs: List[Pair]
+    home_currency: str
+    equity: float
+    time: np.ndarray
+    graph: CurrencyGraph
+    _steps: Dict[Pair, np.ndarray]
+    _last: Dict[Pair, np.ndarray]
+    _qh: Dict[Pair, np.ndarray]
+
+    def __init__(self, columns: Dict[Pair, TickColumns], home_currency: str,
+            equity: Decimal) -> None:
+        '''
+        Parameters:
+        columns - Ticks by pair, e.g. from HistoricCSVDataFeeder.load_columns.
+        home_currency - The currency the results are quoted in.
+        equity - The initial equity.
+        '''
+        self.logger = getLogger(__name__)
+        self.columns = columns
+        self.pairs = list(columns.keys())
+        self.home_currency = home_currency
+        self.equity = float(equity)
+        self.graph = CurrencyGraph(self.pairs, {})
+        self._set_up_timeline()
+        self._qh = dict((_pair, self._qh_factors(_pair))
+            for _pair in self.pairs)
+
+    def _set_up_timeline(self) -> None:
+        '''Merges the ticks of the pairs, and indexes for each pair the step
+        of each of its ticks and its latest tick as of each step.'''
+        _times = [self.columns[_p]['time'] for _p in self.pairs]
+        _order = np.argsort(np.concatenate(_times), kind='stable')
+        _steps = np.empty(len(_order), dtype=np.int64)
+        _steps[_order] = np.arange(len(_order))
+        _start: int = 0
+        _last: np.ndarray
+
+        self.time = np.concatenate(_times)[_order]
+        self._steps = {}
+        self._last = {}
+        for _pair, _t in zip(self.pairs, _times):
+            self._steps[_pair] = _steps[_start:_start + len(_t)]
+            _start += len(_t)
+            _last = np.full(len(_order), -1, dtype=np.int64)
+            _last[self._steps[_pair]] = np.arange(len(_t))
+            self._last[_pair] = np.maximum.accumulate(_last)
+
+    def _prices(self, pair: Pair, side: str) -> np.ndarray:
+        '''Returns the latest price of the pair as of each step, or NaN until
+        the pair has been ticked.'''
+        _last = self._last[pair]
+        _prices = self.columns[pair]['bid'] if side == 'bid' else \
+            self.columns[pair]['ask']
+        return np.where(_last >= 0, _prices[np.maximum(_last, 0)], np.nan)
+
+    def _qh_factors(self, pair: Pair) -> np.ndarray:
+        '''Returns the factor converting prices of the pair into home currency
+        as of each step, as Position._get_qh_factor does. It is the bid of
+        the quote/home pair, that of an inverted leg being 1 / its ask.'''
+        _quote = pair[3:]
+        _factors = np.ones(len(self.time))
+        if _quote == self.home_currency:
+            return _factors
+        for _leg in self.graph.find_path(Pair(_quote + self.home_currency)):
+            if _leg in self.columns:
+                _factors = _factors * self._prices(_leg, 'bid')
+            else:
+                _factors = _factors / self._prices(
+                    self.graph.invert_pair(_leg), 'ask')
+        return _factors
+
+    def _fill(self, pair: Pair, ticks: np.ndarray, units: np.ndarray) \
+            -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray,
+                np.ndarray, np.ndarray]:
+        '''Reflects the fills of the pair in order, and returns the steps,
+        units, prices and balance impacts of the fills executed along with
+        units held and average prices after each of them.'''
+        _steps = self._steps[pair][ticks]
+        _units = units.astype(np.float64)
+        _prices = np.where(_units > 0, self.columns[pair]['ask'][ticks],
+            self.columns[pair]['bid'][ticks])
+        _qh = self._qh[pair][_steps]
+        # Portfolio refuses orders until the conversion has been priced.
+        _ok = ~np.isnan(_qh)
+        _steps, _units, _prices, _qh = \
+            _steps[_ok], _units[_ok], _prices[_ok], _qh[_ok]
+        _n = len(_steps)
+        _realized = np.zeros(_n)
+        _held = np.zeros(_n)
+        _avgs = np.zeros(_n)
+        _u: float = 0.0
+        _avg: float = 0.0
+
+        for _i in range(_n):
+            _fill, _price = _units[_i], _prices[_i]
+            if _fill * _u >= 0:
+                if _fill != 0:
+                    _avg = round((_avg * _u + _price * _fill) / (_u + _fill),
+                        PLACES)
+            elif abs(_fill) <= abs(_u):
+                _realized[_i] = -(_price - _avg) * _fill
+            else:
+                _realized[_i] = (_price - _avg) * _u
+                _avg = _price
+            _u += _fill
+            if _u == 0:
+                _avg = 0.0
+            _held[_i], _avgs[_i] = _u, _avg
+        return _steps, _units, _prices, _realized * _qh, _held, _avgs
+
+    def run(self, signals: Signals) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        '''Backtests the signals, given as (tick indices, units) arrays by
+        pair like VectorizedStrategy.generate_signals() returns, and returns
+        the equity curve and the executions. Columns are named as in the
+        files of FileResultHandler.'''
+        _n = len(self.time)
+        _fills: Dict[Pair, Tuple[np.ndarray, ...]] = {}
+        _upls: Dict[str, np.ndarray] = {}
+        _fill_steps: List[np.ndarray] = []
+        _fill_balance: List[np.ndarray] = []
+        _executions: List[pd.DataFrame] = []
+        _empty = np.array([], dtype=np.int64)
+        _rows: int
+        _at: np.ndarray
+        _upl: np.ndarray
+
+        for _pair in self.pairs:
+            _ticks, _units = signals.get(_pair, (_empty, _empty))
+            _order = np.argsort(_ticks, kind='stable')
+            _ticks = np.asarray(_ticks, dtype=np.int64)[_order]
+            _units = np.asarray(_units)[_order].astype(np.float64)
+            _fills[_pair] = self._fill(_pair, _ticks, _units)
+            _steps, _units, _prices, _balance = _fills[_pair][:4]
+            _fill_steps.append(_steps)
+            _fill_balance.append(_balance)
+            _executions.append(pd.DataFrame({
+                'Timestamp': pd.to_datetime(self.time[_steps]),
+                'Pair': _pair,
+                'Units': _units,
+                'Price': _prices,
+            }))
+
+        _steps = np.concatenate(_fill_steps)
+        # A final row after the fills of the last tick, as Portfolio keeps.
+        _rows = _n + 1 if _n > 0 and (_steps == _n - 1).any() else _n
+        _at = np.minimum(np.arange(_rows), _n - 1)
+        _upl = np.zeros(_rows)
+        for _pair in self.pairs:
+            _pair_steps, _held, _avgs = \
+                _fills[_pair][0], _fills[_pair][4], _fills[_pair][5]
+            # State as of each step reflects the fills of earlier steps.
+            _count = np.searchsorted(_pair_steps, np.arange(_rows),
+                side='left')
+            _u = np.concatenate([[0.0], _held])[_count]
+            _avg = np.concatenate([[0.0], _avgs])[_count]
+            _price = np.where(_u >= 0, self._prices(_pair, 'bid')[_at],
+                self._prices(_pair, 'ask')[_at])
+            _upls[f'UPL[{_pair}]'] = np.where(_u != 0,
+                (_price - _avg) * _u * self._qh[_pair][_at], 0.0)
+            _upl += _upls[f'UPL[{_pair}]']
+
+        _order = np.argsort(_steps, kind='stable')
+        _realized = np.concatenate([[0.0],
+            np.cumsum(np.concatenate(_fill_balance)[_order])])
+        _balance = self.equity + _realized[
+            np.searchsorted(_steps[_order], np.arange(_rows), side='left')]
+
+        _equity = pd.DataFrame(dict(
+            [('Equity', _balance + _upl), ('Balance', _balance),
+                ('UPL[Total]', _upl)] + list(_upls.items())),
+            index=pd.Index(pd.to_datetime(self.time[_at]), name='Timestamp'))
+        _execution = pd.concat(_executions, ignore_index=True) \
+            .sort_values('Timestamp', kind='stable').reset_index(drop=True)
+        return _equity, _execution
+
+    def screen(self, signal_func: Callable[..., Signals],
+            grid: List[Dict[str, Any]]) -> pd.DataFrame:
+        '''Runs signal_func(columns, **params) for each parameter set in the
+        grid, and returns the final equity, the maximum drawdown and the
+        number of executions by parameter set.'''
+        _rows: List[Dict[str, Any]] = []
+        _equity: pd.DataFrame
+        _execution: pd.DataFrame
+        _curve: np.ndarray
+
+        for _params in grid:
+            _equity, _execution = self.run(
+                signal_func(self.columns, **_params))
+            _curve = _equity['Equity'].values
+            _row = dict(_params)
+            _row['equity'] = _curve[-1] if len(_curve) else self.equity
+            _row['max_drawdown'] = float(
+                (np.maximum.accumulate(_curve) - _curve).max()) \
+                if len(_curve) else 0.0
+            _row['executions'] = len(_execution)
+            _rows.append(_row)
+            self.logger.debug(f'Screened: {_row}')
+        return pd.DataFrame(_rows)
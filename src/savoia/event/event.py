@@ -1,5 +1,6 @@
 import pandas as pd
 from decimal import Decimal
+from typing import List
 
 from savoia.types.types import EventType, Pair
 
@@ -29,7 +30,8 @@ class TickEvent(Event):
 
 class SignalEvent(Event):
     def __init__(self, ref: str, pair: Pair, time: pd.Timestamp,
-            order_type: str, units: Decimal, price: Decimal):
+            order_type: str, units: Decimal, price: Decimal,
+            strategy: str = ''):
         self.type = EventType('SIGNAL')
         self.ref = ref
         self.pair: Pair = pair
@@ -37,6 +39,7 @@ class SignalEvent(Event):
         self.units = units
         self.time = time  # Time of the last tick that generated the signal
         self.price = price
+        self.strategy = strategy  # Name of the strategy issuing the signal
 
     def __str__(self) -> str:
         _form = "Type: %s, Ref: %s, Pair: %s, Time: %s, OrderType: %s, " + \
@@ -53,7 +56,8 @@ class SignalEvent(Event):
 
 class OrderEvent(Event):
     def __init__(self, ref: str, pair: Pair, time: pd.Timestamp,
-            order_type: str, units: Decimal, price: Decimal):
+            order_type: str, units: Decimal, price: Decimal,
+            strategy: str = ''):
         self.type = EventType('ORDER')
         self.ref: str = ref
         self.order_type = order_type
@@ -61,6 +65,7 @@ class OrderEvent(Event):
         self.units = units
         self.time = time
         self.price = price
+        self.strategy = strategy
 
     def __str__(self) -> str:
         _form = "Type: %s, Ref: %s, Pair: %s, Time: %s, OrderType: %s, " + \
@@ -75,9 +80,24 @@ class OrderEvent(Event):
         return str(self)
 
 
+class OrderBatchEvent(Event):
+    '''OrderBatchEvent carries the orders issued upon one tick, to be
+    executed at once.'''
+    def __init__(self, orders: List[OrderEvent]):
+        self.type = EventType('ORDERS')
+        self.orders = orders
+
+    def __str__(self) -> str:
+        return "Type: %s, Orders: %s" % (self.type, self.orders)
+
+    def __repr__(self) -> str:
+        return str(self)
+
+
 class FillEvent(Event):
     def __init__(self, ref: str, pair: Pair, time: pd.Timestamp,
-            units: int, price: Decimal, status: str):
+            units: Decimal, price: Decimal, status: str,
+            strategy: str = ''):
         self.type = EventType('FILL')
         self.ref = ref
         self.pair: Pair = pair
@@ -85,6 +105,7 @@ class FillEvent(Event):
         self.price = price
         self.status = status
         self.time = time
+        self.strategy = strategy
 
     def __str__(self) -> str:
         _form = "Type: %s, Ref: %s, Pair: %s, Time: %s, " + \
@@ -0,0 +1,197 @@
+from decimal import Decimal
+from logging import getLogger, Logger
+
+import pandas as pd
+
+from savoia.config.decimal_config import DECIMAL_PLACES
+from savoia.event.event import OrderEvent, FillEvent, TickEvent
+from savoia.ticker.ticker import Ticker
+from savoia.types.types import Pair
+
+from typing import Dict, List, Tuple
+
+
+class NettedOrder(object):
+    '''NettedOrder is the order submitted in place of the orders netted,
+    with the units of each order left to be filled by the fills of it.'''
+    order: OrderEvent
+    orders: List[OrderEvent]
+    shares: List[Decimal]  # Units of each order to be filled externally
+    filled: Decimal
+
+    def __init__(self, order: OrderEvent, orders: List[OrderEvent],
+            shares: List[Decimal]) -> None:
+        self.order = order
+        self.orders = orders
+        self.shares = shares
+        self.filled = Decimal('0')
+
+
+class OrderCoalescer(object):
+    """
+    OrderCoalescer nets the market orders of each pair within a window
+    before they are submitted, so that opposing orders, e.g. of multiple
+    strategies, do not each pay the spread and a round trip to the broker.
+
+    Orders of a pair are held until either window seconds or ticks ticks of
+    the pair have passed since the first of them, and then released by
+    due(). If cross, the units the orders cross among themselves are filled
+    at once at the mid price, and the rest is submitted as a single order.
+    The mid is not a price the broker fills at, so cross is meant for
+    backtests. Otherwise the orders of each side are submitted as a single
+    order, without netting the sides. Fills of the orders submitted are
+    allocated back to the orders pro rata by allocate(). A pair with a
+    single order held submits the order as it is.
+    """
+    logger: Logger
+    ticker: Ticker
+    window: pd.Timedelta
+    ticks: int
+    cross: bool
+    held: Dict[Pair, List[OrderEvent]]
+    nets: Dict[str, NettedOrder]
+    _ticks: Dict[Pair, int]
+    _seq: int
+
+    def __init__(self, ticker: Ticker, window: float = 0,
+            ticks: int = 0, cross: bool = True) -> None:
+        '''
+        Parameters:
+        window - Seconds to hold the orders of a pair for at most, or 0 for
+            no limit of time.
+        ticks - Number of ticks of the pair to hold the orders of it for at
+            most, or 0 for no limit of ticks. Orders are released at once
+            without either limit.
+        cross - Whether to fill the units crossed at the mid price.
+        '''
+        self.logger = getLogger(__name__)
+        self.ticker = ticker
+        self.window = pd.Timedelta(seconds=window)
+        self.ticks = ticks
+        self.cross = cross
+        self.held = {}
+        self.nets = {}
+        self._ticks = {}
+        self._seq = 0
+
+    def add(self, order: OrderEvent) -> bool:
+        '''Holds the order, and returns whether held. Only market orders
+        are held.'''
+        if order.order_type != 'market':
+            return False
+        if order.pair not in self.held:
+            self.held[order.pair] = []
+            self._ticks[order.pair] = 0
+        self.held[order.pair].append(order)
+        return True
+
+    def on_tick(self, event: TickEvent) -> None:
+        if event.pair in self._ticks:
+            self._ticks[event.pair] += 1
+
+    def _due(self, pair: Pair) -> bool:
+        if self.ticks == 0 and self.window == pd.Timedelta(0):
+            return True
+        return (self.ticks > 0 and self._ticks[pair] >= self.ticks) or \
+            (self.window > pd.Timedelta(0) and
+                self.ticker.prices[pair]['time'] - self.held[pair][0].time
+                >= self.window)
+
+    def due(self, flush: bool = False) \
+            -> Tuple[List[OrderEvent], List[FillEvent]]:
+        '''Releases the orders of the pairs due, or all if flush. Returns
+        the orders to submit, and the fills of the units crossed.'''
+        _orders: List[OrderEvent] = []
+        _fills: List[FillEvent] = []
+
+        for _pair in [_p for _p in self.held if flush or self._due(_p)]:
+            _orders += self._net(self.held.pop(_pair), _fills)
+            del self._ticks[_pair]
+        return _orders, _fills
+
+    def _net(self, orders: List[OrderEvent], fills: List[FillEvent]) \
+            -> List[OrderEvent]:
+        '''Nets the orders of a pair, putting the fills of the units crossed
+        onto fills, and returns the orders to submit.'''
+        _net = sum((_o.units for _o in orders), Decimal('0'))
+        _side = [_o for _o in orders if _o.units * _net > 0]
+        _total = sum((_o.units for _o in _side), Decimal('0'))
+        _price = self.ticker.prices[orders[0].pair]
+        _mid: Decimal
+        _shares: List[Decimal] = []
+        _crossed: Decimal
+        _orders: List[OrderEvent] = []
+
+        if len(orders) == 1:
+            return orders
+        if not self.cross:
+            for _s in ([_o for _o in orders if _o.units > 0],
+                    [_o for _o in orders if _o.units < 0]):
+                if len(_s) > 1:
+                    _orders.append(self._merge(_s, [_o.units for _o in _s],
+                        sum((_o.units for _o in _s), Decimal('0'))))
+                elif _s:
+                    _orders.append(_s[0])
+            return _orders
+        _mid = ((_price['bid'] + _price['ask']) / 2).quantize(DECIMAL_PLACES)
+        for _o in orders:
+            # Orders opposing the net are crossed entirely, and those on
+            # the side of it in proportion to the units.
+            _crossed = (_o.units - _o.units * _net / _total).quantize(
+                DECIMAL_PLACES) if _o.units * _net > 0 else _o.units
+            if _crossed != 0:
+                fills.append(FillEvent(ref=_o.ref, pair=_o.pair,
+                    time=_price['time'], units=_crossed, price=_mid,
+                    status='partial' if _crossed != _o.units else 'filled',
+                    strategy=_o.strategy))
+            if _o.units * _net > 0:
+                _shares.append(_o.units - _crossed)
+        self.logger.debug(f'Netted {len(orders)} orders into {_net}')
+        if _net == 0:
+            return []
+        return [self._merge(_side, _shares, _net)]
+
+    def _merge(self, orders: List[OrderEvent], shares: List[Decimal],
+            units: Decimal) -> OrderEvent:
+        '''Returns the order of units submitted in place of the orders of
+        one side, to fill shares units of each of them.'''
+        _order: OrderEvent
+
+        self._seq += 1
+        _order = OrderEvent(ref=f'net-{self._seq}', pair=orders[0].pair,
+            time=orders[-1].time, order_type='market',
+            units=units, price=orders[-1].price)
+        self.nets[_order.ref] = NettedOrder(_order, orders, shares)
+        return _order
+
+    def allocate(self, event: FillEvent) -> List[FillEvent]:
+        '''Allocates the fill of a netted order back to the orders netted in
+        proportion to the units left of each, the last taking the rounding.
+        Fills of other orders are returned as they are.'''
+        _netted = self.nets.get(event.ref)
+        _fills: List[FillEvent] = []
+        _left: Decimal
+        _units: Decimal
+        _done: bool
+        _status: str
+
+        if _netted is None:
+            return [event]
+        _done = event.status != 'partial' or \
+            abs(_netted.filled + event.units) >= abs(_netted.order.units)
+        if _done:
+            del self.nets[event.ref]
+        _status = 'filled' if _done and event.status == 'partial' \
+            else event.status
+        _left = event.units
+        for _i, (_o, _share) in enumerate(zip(_netted.orders,
+                _netted.shares)):
+            _units = _left if _i == len(_netted.orders) - 1 else \
+                (event.units * _share / _netted.order.units).quantize(
+                    DECIMAL_PLACES)
+            _left -= _units
+            _fills.append(FillEvent(ref=_o.ref, pair=_o.pair,
+                time=event.time, units=_units, price=event.price,
+                status=_status, strategy=_o.strategy))
+        _netted.filled += event.units
+        return _fills
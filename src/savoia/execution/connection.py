@@ -0,0 +1,137 @@
+from http.client import HTTPConnection, HTTPSConnection, HTTPResponse
+from logging import getLogger, Logger
+from queue import LifoQueue, Empty
+import threading
+import time
+
+from typing import Dict, Optional, Tuple
+
+
+class ConnectError(OSError):
+    '''ConnectError is raised when connecting to the host fails, i.e. before
+    any request is sent, so that the request is safe to send again.'''
+    pass
+
+
+class RateLimiter(object):
+    """
+    RateLimiter is a token bucket shared among threads, allowing rate
+    requests per second on average with bursts of up to burst requests.
+    """
+    rate: float
+    burst: float
+    _tokens: float
+    _last: float
+    _lock: threading.Lock
+
+    def __init__(self, rate: float, burst: Optional[float] = None) -> None:
+        self.rate = rate
+        self.burst = rate if burst is None else burst
+        self._tokens = self.burst
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        '''Takes a token, sleeping until one is available, and returns the
+        seconds slept.'''
+        _now: float
+        _wait: float
+
+        with self._lock:
+            _now = time.monotonic()
+            self._tokens = min(self.burst,
+                self._tokens + (_now - self._last) * self.rate)
+            self._last = _now
+            # Tokens may go negative, reserving the tokens yet to come in
+            # the order of the callers.
+            self._tokens -= 1
+            _wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        if _wait > 0:
+            time.sleep(_wait)
+        return _wait
+
+
+class ConnectionPool(object):
+    """
+    ConnectionPool keeps up to size persistent connections to the host, so
+    that requests from multiple threads reuse the keep-alive connections
+    rather than connecting each time.
+    """
+    logger: Logger
+    host: str
+    port: Optional[int]
+    ssl: bool
+    timeout: float
+    size: int
+    _idle: 'LifoQueue[HTTPConnection]'
+    _created: int
+    _lock: threading.Lock
+
+    def __init__(self, host: str, port: Optional[int] = None,
+            ssl: bool = True, size: int = 4, timeout: float = 10) -> None:
+        self.logger = getLogger(__name__)
+        self.host = host
+        self.port = port
+        self.ssl = ssl
+        self.size = size
+        self.timeout = timeout
+        self._idle = LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _connect(self) -> HTTPConnection:
+        if self.ssl:
+            return HTTPSConnection(self.host, self.port, timeout=self.timeout)
+        return HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def acquire(self) -> HTTPConnection:
+        '''Returns an idle connection, or a new one unless size connections
+        are in use, in which case waits for one to be released.'''
+        try:
+            return self._idle.get(False)
+        except Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                return self._connect()
+        return self._idle.get()
+
+    def release(self, conn: HTTPConnection, reuse: bool = True) -> None:
+        '''Returns the connection to the pool. Connections not to be reused,
+        e.g. after an error, are closed and replaced.'''
+        if not reuse:
+            conn.close()
+            conn = self._connect()
+        self._idle.put(conn)
+
+    def request(self, method: str, url: str, body: Optional[bytes] = None,
+            headers: Optional[Dict[str, str]] = None) -> Tuple[int, bytes]:
+        '''Sends the request over a pooled connection, and returns the
+        status and body of the response. Raises ConnectError if unable to
+        connect.'''
+        _conn = self.acquire()
+        _response: HTTPResponse
+        _body: bytes
+        if _conn.sock is None:
+            try:
+                _conn.connect()
+            except OSError as e:
+                self.release(_conn, reuse=False)
+                raise ConnectError(f'Unable to connect to {self.host}') from e
+        try:
+            _conn.request(method, url, body, headers or {})
+            _response = _conn.getresponse()
+            _body = _response.read()
+        except Exception:
+            self.release(_conn, reuse=False)
+            raise
+        self.release(_conn, reuse=not _response.will_close)
+        return _response.status, _body
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get(False).close()
+            except Empty:
+                break
@@ -1,11 +1,24 @@
 from abc import ABCMeta, abstractmethod
-from savoia.event.event import OrderEvent, FillEvent, Event
+from savoia.event.event import OrderEvent, OrderBatchEvent, FillEvent, \
+    Event, TickEvent
 from savoia.config.decimal_config import DECIMAL_PLACES
+from savoia.execution.connection import ConnectError, ConnectionPool, \
+    RateLimiter
+from savoia.execution.order_book import OrderBook
+from savoia.ticker.ticker import Ticker
+from savoia.types.types import Pair, Price
 
 import pandas as pd
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
+from http.client import HTTPException
 from queue import Queue, Empty
 from decimal import Decimal
 from logging import getLogger, Logger
+from typing import Any, Deque, Dict, List, Optional, Tuple, Union, cast
+import json
+import random
+import threading
 import time
 
 
@@ -13,7 +26,16 @@ class ExecutionHandler(metaclass=ABCMeta):
     """
     Provides an abstract base class to handle all execution in the
     backtesting and live trading system.
+
+    Handlers are run on a thread of their own polling exec_q, unless inline
+    is set, in which case the engine calls execute_orders() and on_tick()
+    directly from its event loop. The orders issued upon one tick come in a
+    batch, either as an OrderBatchEvent on exec_q or a call of
+    execute_orders(), so that they are dispatched at once.
     """
+    inline: bool = False
+    event_q: 'Queue[Event]'
+
     @abstractmethod
     def __init__(self, event_q: 'Queue[Event]', exec_q: 'Queue[Event]',
             heartbeat: float = 3):
@@ -23,32 +45,58 @@ class ExecutionHandler(metaclass=ABCMeta):
     def run(self) -> None:
         pass
 
+    def execute_order(self, event: OrderEvent) -> None:
+        '''Executes the order, putting its fill onto event_q.'''
+        for _fill in self.execute_orders([event]):
+            self.event_q.put(_fill)
+
+    def execute_orders(self, events: List[OrderEvent]) -> List[FillEvent]:
+        '''Executes the orders at once, and returns the fills available
+        right away. Fills coming later are put onto event_q.'''
+        raise Exception(f"{self.__class__.__name__} does not execute orders " +
+            "in batch.")
+
+    def on_tick(self, event: TickEvent) -> None:
+        '''Called by the engine upon each tick for inline handlers.'''
+        pass
+
 
 class SimulatedExecution(ExecutionHandler):
     logger: Logger
     event_q: 'Queue[Event]'
     exec_q: 'Queue[Event]'
+    random: random.Random
 
     def __init__(self, event_q: 'Queue[Event]', exec_q: 'Queue[Event]',
-            heartbeat: float = 0) -> None:
+            heartbeat: float = 0, seed: Optional[int] = None) -> None:
+        '''
+        Parameters:
+        seed - Seed of the random slippage and delay of fills.
+        '''
         self.logger = getLogger(__name__)
         self.exec_q = exec_q
         self.event_q = event_q
         self.heartbeat = heartbeat
+        self.random = random.Random(seed)
 
-    def _execute_order(self, event: OrderEvent) -> None:
-        import random
-        _price = event.price * Decimal(str(random.uniform(0.99, 1.01)))
-        _time = event.time + pd.offsets.Second(random.randint(3, 10))
-        fillevent = FillEvent(
+    def _fill_order(self, event: OrderEvent) -> FillEvent:
+        _price = event.price * Decimal(str(self.random.uniform(0.99, 1.01)))
+        _time = event.time + pd.offsets.Second(self.random.randint(3, 10))
+        return FillEvent(
             ref=event.ref,
             pair=event.pair,
             time=_time,
             units=event.units,
             price=_price.quantize(DECIMAL_PLACES),
-            status='filled'
+            status='filled',
+            strategy=event.strategy
         )
-        self._return_fill_event(fillevent)
+
+    def _execute_order(self, event: OrderEvent) -> None:
+        self._return_fill_event(self._fill_order(event))
+
+    def execute_orders(self, events: List[OrderEvent]) -> List[FillEvent]:
+        return [self._fill_order(_event) for _event in events]
 
     def _return_fill_event(self, event: FillEvent) -> None:
         self.event_q.put(event)
@@ -62,40 +110,521 @@ class SimulatedExecution(ExecutionHandler):
             else:
                 if _event is None:
                     break
+                elif _event.type == 'ORDERS':
+                    for _fill in self.execute_orders(
+                            cast(OrderBatchEvent, _event).orders):
+                        self._return_fill_event(_fill)
                 else:
-                    self._execute_order(_event)
+                    self._execute_order(cast(OrderEvent, _event))
             time.sleep(self.heartbeat)
 
 
-# class OANDAExecutionHandler(ExecutionHandler):
-#     def __init__(self, domain, access_token, account_id):
-#         self.domain = domain
-#         self.access_token = access_token
-#         self.account_id = account_id
-#         self.conn = self.obtain_connection()
-#         self.logger = logging.getLogger(__name__)
-
-#     def obtain_connection(self):
-#         return httplib.HTTPSConnection(self.domain)
-
-#     def execute_order(self, event):
-#         pair = "%s_%s" % (event.pair[:3], event.pair[3:])
-#         headers = {
-#             "Content-Type": "application/x-www-form-urlencoded",
-#             "Authorization": "Bearer " + self.access_token
-#         }
-#         params = urlencode({
-#             "pair": pair,
-#             "units": event.units,
-#             "type": event.order_type,
-#             "side": event.side
-#         })
-#         self.conn.request(
-#             "POST",
-#             "/v1/accounts/%s/orders" % str(self.account_id),
-#             params, headers
-#         )
-#         response = self.conn.getresponse().read()\
-#             .decode("utf-8").replace("\n", "").replace("\t", "")
-
-#         self.logger.debug(response)
+class TickDrivenExecution(ExecutionHandler):
+    """
+    TickDrivenExecution simulates fills of orders against the market with a
+    deterministic latency, inline with the engine's tick stream.
+
+    An order reaches the market by the first tick of its pair at or after
+    order.time + latency. With zero latency, that is the tick which
+    triggered the order, so that it reaches the market at the latest prices
+    of the ticker right away. A market order is then filled at the ask
+    (buy) or bid (sell). Limit and stop orders, priced at order.price, rest
+    in the OrderBook of the pair until a tick triggers them, and are filled
+    at the ask or bid of that tick, in the order they were received.
+    Order types 'cancel' and 'replace' cancel the resting order of the same
+    ref, or replace its price and units.
+    """
+    inline = True
+    logger: Logger
+    event_q: 'Queue[Event]'
+    exec_q: 'Queue[Event]'
+    ticker: Ticker
+    latency: pd.Timedelta
+    pending: Dict[Pair, Deque[Tuple[pd.Timestamp, OrderEvent]]]
+    books: Dict[Pair, OrderBook]
+    _seq: int
+
+    def __init__(self, event_q: 'Queue[Event]', exec_q: 'Queue[Event]',
+            ticker: Ticker, latency: Union[float, Decimal] = 0) -> None:
+        '''
+        Parameters:
+        ticker - The ticker of the engine.
+        latency - Seconds from an order to the market it is filled against.
+        '''
+        self.logger = getLogger(__name__)
+        self.event_q = event_q
+        self.exec_q = exec_q
+        self.ticker = ticker
+        self.latency = pd.Timedelta(seconds=float(latency))
+        self.pending = {}
+        self.books = {}
+        self._seq = 0
+
+    def execute_orders(self, events: List[OrderEvent]) -> List[FillEvent]:
+        '''Without latency, submits the orders at the latest prices and then
+        fills the resting orders triggered, returning the fills. Otherwise
+        the orders are pending until due.'''
+        _fills: List[FillEvent] = []
+        _pairs: Dict[Pair, Price] = {}
+        _fill: Optional[FillEvent]
+
+        if self.latency != pd.Timedelta(0):
+            for _event in events:
+                self.pending.setdefault(_event.pair, deque()).append(
+                    (_event.time + self.latency, _event))
+            return _fills
+        for _event in events:
+            _price = _pairs.setdefault(_event.pair,
+                self.ticker.prices[_event.pair])
+            _fill = self._submit(_event, _price['time'], _price['bid'],
+                _price['ask'])
+            if _fill is not None:
+                _fills.append(_fill)
+        for _pair, _price in _pairs.items():
+            _fills.extend(self._match(_pair, _price['time'], _price['bid'],
+                _price['ask']))
+        return _fills
+
+    def on_tick(self, event: TickEvent) -> None:
+        '''Submits the pending orders of the pair due by the tick, then fills
+        the resting orders triggered. Orders are due in the order they are
+        received, as the latency is constant.'''
+        _pending = self.pending.get(event.pair)
+        _fill: Optional[FillEvent]
+        while _pending and _pending[0][0] <= event.time:
+            _fill = self._submit(_pending.popleft()[1], event.time, event.bid,
+                event.ask)
+            if _fill is not None:
+                self.event_q.put(_fill)
+        for _fill in self._match(event.pair, event.time, event.bid,
+                event.ask):
+            self.event_q.put(_fill)
+
+    def _submit(self, order: OrderEvent, time: pd.Timestamp, bid: Decimal,
+            ask: Decimal) -> Optional[FillEvent]:
+        '''Puts the order onto the market at the prices, and returns its
+        fill if filled at once.'''
+        _book = self.books.get(order.pair)
+        if order.order_type == 'market':
+            return self._fill(order, time, bid, ask)
+        if _book is None:
+            _book = self.books[order.pair] = OrderBook(order.pair)
+        self._seq += 1
+        if order.order_type == 'cancel':
+            if _book.cancel(order.ref) is None:
+                self.logger.warning(f"No resting order to cancel: {order.ref}")
+        elif order.order_type == 'replace':
+            if _book.replace(order, self._seq) is None:
+                self.logger.warning(
+                    f"No resting order to replace: {order.ref}")
+        elif order.order_type in ('limit', 'stop'):
+            _book.add(order, self._seq)
+        else:
+            self.logger.error(f"Unsupported order type: {order.order_type}")
+        return None
+
+    def _match(self, pair: Pair, time: pd.Timestamp, bid: Decimal,
+            ask: Decimal) -> List[FillEvent]:
+        '''Returns the fills of the resting orders of the pair triggered by
+        the prices.'''
+        _book = self.books.get(pair)
+        if _book is None or len(_book) == 0:
+            return []
+        return [self._fill(_order, time, bid, ask)
+            for _order in _book.match(bid, ask)]
+
+    def _fill(self, order: OrderEvent, time: pd.Timestamp, bid: Decimal,
+            ask: Decimal) -> FillEvent:
+        return FillEvent(
+            ref=order.ref,
+            pair=order.pair,
+            time=time,
+            units=order.units,
+            price=ask if order.units > 0 else bid,
+            status='filled',
+            strategy=order.strategy
+        )
+
+    def run(self) -> None:
+        '''Nothing to poll, as orders are handled inline.'''
+        pass
+
+
+class WorkingOrder(object):
+    '''WorkingOrder is an order at the broker not completely filled yet,
+    with the units filled so far and the ID of the last transaction of it
+    seen.'''
+    order: OrderEvent
+    filled: Decimal
+    transaction: int
+
+    def __init__(self, order: OrderEvent) -> None:
+        self.order = order
+        self.filled = Decimal('0')
+        self.transaction = 0
+
+
+class OANDAExecution(ExecutionHandler):
+    """
+    OANDAExecution executes orders via the OANDA v20 REST API.
+
+    Orders taken from exec_q are handed to a pool of worker threads, so that
+    neither the handler nor the engine waits for the broker while orders
+    are in flight. The workers share persistent connections and a rate
+    limit, backing off exponentially between retries. Requests are retried
+    upon a failure to connect or a status in RETRY, as the broker has not
+    taken them then, and also upon other failures if idempotent, i.e. not
+    POST. An order whose POST fails otherwise is looked up by ref instead
+    of being sent again, as the broker may have taken it.
+
+    Fills are put onto event_q as the responses arrive, which may differ
+    from the order sent. Orders not completely filled by then are working
+    at the broker, and their fills and cancellations are polled from the
+    transactions of the account every poll seconds by run(). The broker
+    cancels the units of a market order not filled at once. An order
+    cancelled by the broker, or which fails, is put as a fill of no units
+    with status 'cancelled' or 'rejected', so that it is no longer in
+    flight. The types of the limit and stop orders sent are kept by ref,
+    for the orders of type 'replace' to keep them.
+
+    The v20 API has no endpoint taking multiple orders, so the orders of a
+    batch are sent concurrently over the pool instead.
+    """
+    RETRY = (429, 503)  # Statuses of requests the broker has not taken
+    RETRY_IDEMPOTENT = (500, 502, 504)
+    ORDER_TYPES: Dict[str, str] = {
+        'market': 'MARKET',
+        'limit': 'LIMIT',
+        'stop': 'STOP',
+    }
+
+    logger: Logger
+    event_q: 'Queue[Event]'
+    exec_q: 'Queue[Event]'
+    access_token: str
+    account_id: str
+    pool: ConnectionPool
+    executor: ThreadPoolExecutor
+    limiter: RateLimiter
+    max_retries: int
+    backoff: float
+    poll: float
+    resting: Dict[str, str]
+    working: Dict[str, WorkingOrder]
+    _lock: threading.Lock  # Of working, shared by workers and run()
+
+    def __init__(self, event_q: 'Queue[Event]', exec_q: 'Queue[Event]',
+            host: str, access_token: str, account_id: str,
+            port: Optional[int] = None, ssl: bool = True, pool_size: int = 4,
+            rate_limit: float = 100, max_retries: int = 3,
+            backoff: float = 0.1, timeout: float = 10,
+            poll: float = 1) -> None:
+        '''
+        Parameters:
+        host - e.g. 'api-fxtrade.oanda.com', or localhost for MockBroker.
+        pool_size - Number of connections and worker threads.
+        rate_limit - Requests per second at most.
+        max_retries - Times to retry a request before giving up.
+        backoff - Seconds before the first retry, doubled every retry.
+        timeout - Seconds to wait for a response.
+        poll - Seconds between polls of the transactions of working orders.
+        '''
+        self.logger = getLogger(__name__)
+        self.event_q = event_q
+        self.exec_q = exec_q
+        self.access_token = access_token
+        self.account_id = account_id
+        self.pool = ConnectionPool(host, port, ssl, pool_size, timeout)
+        self.executor = ThreadPoolExecutor(max_workers=pool_size)
+        self.limiter = RateLimiter(rate_limit)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.poll = poll
+        self.resting = {}
+        self.working = {}
+        self._lock = threading.Lock()
+
+    def _request(self, method: str, path: str,
+            body: Optional[Dict[str, object]] = None) \
+            -> Tuple[int, Dict[str, Any]]:
+        '''Sends the request, retrying upon failure if safe, and returns the
+        status and body of the last response.'''
+        _headers = {
+            'Content-Type': 'application/json',
+            'Authorization': f'Bearer {self.access_token}',
+        }
+        _data = None if body is None else json.dumps(body).encode('utf-8')
+        _status: int
+        _response: bytes
+
+        for _retry in range(self.max_retries + 1):
+            if _retry > 0:
+                time.sleep(self.backoff * 2 ** (_retry - 1))
+            self.limiter.acquire()
+            try:
+                _status, _response = self.pool.request(method, path, _data,
+                    _headers)
+            except ConnectError as e:
+                self.logger.warning(f'{e} - Failed to request {path}')
+                if _retry == self.max_retries:
+                    raise
+                continue
+            except (OSError, HTTPException) as e:
+                self.logger.warning(f'{e} - Failed to request {path}')
+                # The broker may have taken the request, e.g. upon timeout.
+                if method == 'POST' or _retry == self.max_retries:
+                    raise
+                continue
+            if _status not in self.RETRY and (method == 'POST' or
+                    _status not in self.RETRY_IDEMPOTENT):
+                break
+            self.logger.warning(f'Status {_status} - Failed to request {path}')
+        return _status, json.loads(_response or b'{}')
+
+    def _order_request(self, event: OrderEvent) \
+            -> Tuple[str, str, Dict[str, object]]:
+        '''Returns the method, path and body of the request of the order.'''
+        _path = f'/v3/accounts/{self.account_id}/orders'
+        _order: Dict[str, object]
+
+        if event.order_type == 'cancel':
+            self.resting.pop(event.ref, None)
+            with self._lock:
+                self.working.pop(event.ref, None)
+            return 'PUT', f'{_path}/@{event.ref}/cancel', {}
+        _order = {
+            'type': self.ORDER_TYPES.get(event.order_type, 'MARKET'),
+            'instrument': f'{event.pair[:3]}_{event.pair[3:]}',
+            'units': str(event.units),
+            'clientExtensions': {'id': event.ref},
+        }
+        if event.order_type == 'replace':
+            if event.ref not in self.resting:
+                raise Exception(f"No resting order to replace: {event.ref}")
+            _order['type'] = self.resting[event.ref]
+            _order['price'] = str(event.price)
+            return 'PUT', f'{_path}/@{event.ref}', {'order': _order}
+        if event.order_type not in self.ORDER_TYPES:
+            raise Exception(f"Unsupported order type: {event.order_type}")
+        if event.order_type != 'market':
+            _order['price'] = str(event.price)
+            self.resting[event.ref] = str(_order['type'])
+        return 'POST', _path, {'order': _order}
+
+    def _lookup(self, event: OrderEvent) -> Tuple[int, Dict[str, Any]]:
+        '''Looks up the order by its ref, when unknown whether the broker
+        has taken it. Returns the status, and the transactions of the order
+        in place of the response to it. Fills not found are polled.'''
+        _path = f'/v3/accounts/{self.account_id}'
+        _status: int
+        _response: Dict[str, Any]
+        _since: Dict[str, Any]
+        _id: str
+
+        try:
+            _status, _response = self._request('GET',
+                f'{_path}/orders/@{event.ref}')
+        except Exception as e:
+            self.logger.error(f'{e} - Unable to look up order: {event}')
+            return 0, {}
+        if _status // 100 != 2:
+            return _status, _response
+        self.logger.warning(f'Order taken despite failure: {event}')
+        _id = _response['order']['id']
+        _response = {'transactions': [{'id': _id, 'type': 'ORDER_CREATE'}]}
+        try:
+            _status, _since = self._request('GET',
+                f'{_path}/transactions/sinceid?id={int(_id) - 1}')
+        except Exception as e:
+            self.logger.warning(f'{e} - Unable to look up fills: {event}')
+            return _status, _response
+        if _status // 100 == 2:
+            _response['transactions'] += [_t for _t in
+                _since.get('transactions', [])
+                if _t.get('clientOrderID') == event.ref]
+        return 200, _response
+
+    @classmethod
+    def _no_fill(cls, event: OrderEvent, at: pd.Timestamp,
+            status: str) -> FillEvent:
+        '''Returns the fill of no units at the time, ending the order with
+        the status.'''
+        return FillEvent(ref=event.ref, pair=event.pair, time=at,
+            units=Decimal('0'), price=Decimal('0'), status=status,
+            strategy=event.strategy)
+
+    def _reflect(self, working: WorkingOrder,
+            transaction: Dict[str, Any]) -> Optional[FillEvent]:
+        '''Reflects the transaction of the order onto it, and returns the
+        fill if the transaction fills or cancels it.'''
+        _order = working.order
+        _time: pd.Timestamp
+        _units: Decimal
+
+        working.transaction = max(working.transaction, int(transaction['id']))
+        if transaction['type'] not in ('ORDER_FILL', 'ORDER_CANCEL') or \
+                transaction.get('reason') == 'CLIENT_REQUEST_REPLACED':
+            return None
+        _time = pd.Timestamp(transaction['time'])
+        if _time.tzinfo is not None:
+            _time = _time.tz_convert(None)
+        if transaction['type'] == 'ORDER_CANCEL':
+            return self._no_fill(_order, _time, 'cancelled')
+        _units = Decimal(transaction['units'])
+        working.filled += _units
+        return FillEvent(
+            ref=_order.ref,
+            pair=_order.pair,
+            time=_time,
+            units=_units,
+            price=Decimal(transaction['price']),
+            status='filled' if abs(working.filled) >= abs(_order.units)
+                else 'partial',
+            strategy=_order.strategy
+        )
+
+    def _reflect_response(self, event: OrderEvent,
+            response: Dict[str, Any]) -> List[FillEvent]:
+        '''Returns the fills of the order in the response to it, keeping
+        the order working unless completely filled or cancelled.'''
+        _transactions = sorted([_t for _key, _t in response.items()
+            if _key.endswith('Transaction')] +
+            response.get('transactions', []), key=lambda _t: int(_t['id']))
+        _fills: List[FillEvent] = []
+        _working: Optional[WorkingOrder]
+        _fill: Optional[FillEvent]
+
+        with self._lock:
+            _working = self.working.get(event.ref) \
+                if event.order_type == 'replace' else None
+            if _working is None:
+                _working = WorkingOrder(event)
+            _working.order = event
+            for _transaction in _transactions:
+                _fill = self._reflect(_working, _transaction)
+                if _fill is not None:
+                    _fills.append(_fill)
+            if _fills and _fills[-1].status != 'partial':
+                self.working.pop(event.ref, None)
+                self.resting.pop(event.ref, None)
+            else:
+                self.working[event.ref] = _working
+        return _fills
+
+    def _send_order(self, event: OrderEvent) -> List[FillEvent]:
+        '''Sends the order, and returns its fills if filled at once.'''
+        _method = ''
+        _unknown = False
+        _status: int
+        _response: Dict[str, Any]
+        _fills: List[FillEvent]
+
+        try:
+            _method, _path, _body = self._order_request(event)
+            _status, _response = self._request(_method, _path, _body)
+        except Exception as e:
+            self.logger.error(f'{e} - Unable to execute order: {event}')
+            _status, _response = 0, {}
+            _unknown = not isinstance(e, ConnectError)
+        if _method == 'POST' and \
+                (_unknown or _status in self.RETRY_IDEMPOTENT):
+            _status, _response = self._lookup(event)
+        if _status // 100 != 2:
+            self.logger.error(f'Order failed with status {_status}: ' +
+                f'{_response.get("errorMessage")} - {event}')
+            if event.order_type in ('cancel', 'replace'):
+                return []
+            self.resting.pop(event.ref, None)
+            return [self._no_fill(event, event.time, 'rejected')]
+        if event.order_type == 'cancel':
+            return []
+        _fills = self._reflect_response(event, _response)
+        if not _fills:
+            self.logger.info(f'Order accepted: {event}')
+        return _fills
+
+    def _poll(self) -> None:
+        '''Puts the fills and cancellations of the working orders since the
+        last transaction of them seen onto event_q.'''
+        _since: int
+        _status: int
+        _response: Dict[str, Any]
+        _last: int
+        _working: Optional[WorkingOrder]
+        _fill: Optional[FillEvent]
+        _fills: List[FillEvent] = []
+
+        with self._lock:
+            if not self.working:
+                return
+            _since = min(_w.transaction for _w in self.working.values())
+        try:
+            _status, _response = self._request('GET',
+                f'/v3/accounts/{self.account_id}/transactions/sinceid' +
+                f'?id={_since}')
+        except Exception as e:
+            self.logger.warning(f'{e} - Unable to poll transactions')
+            return
+        if _status // 100 != 2:
+            self.logger.warning(f'Polling transactions failed with status ' +
+                f'{_status}: {_response.get("errorMessage")}')
+            return
+        _last = int(_response.get('lastTransactionID', _since))
+        with self._lock:
+            for _transaction in _response.get('transactions', []):
+                _working = self.working.get(
+                    _transaction.get('clientOrderID', ''))
+                if _working is None or \
+                        int(_transaction['id']) <= _working.transaction:
+                    continue
+                _fill = self._reflect(_working, _transaction)
+                if _fill is None:
+                    continue
+                _fills.append(_fill)
+                if _fill.status != 'partial':
+                    del self.working[_fill.ref]
+                    self.resting.pop(_fill.ref, None)
+            # Orders seen up to since have been seen up to the last now.
+            for _w in self.working.values():
+                if _w.transaction >= _since:
+                    _w.transaction = max(_w.transaction, _last)
+        for _fill in _fills:
+            self._return_fill_event(_fill)
+
+    def _execute_order(self, event: OrderEvent) -> None:
+        for _fill in self._send_order(event):
+            self._return_fill_event(_fill)
+
+    def _return_fill_event(self, event: FillEvent) -> None:
+        self.event_q.put(event)
+
+    def execute_orders(self, events: List[OrderEvent]) -> List[FillEvent]:
+        '''Sends the orders concurrently, and returns the fills once all the
+        orders have been responded.'''
+        _futures: List['Future[List[FillEvent]]'] = [
+            self.executor.submit(self._send_order, _event)
+            for _event in events]
+        return [_fill for _future in _futures for _fill in _future.result()]
+
+    def run(self) -> None:
+        '''Hands the orders to the workers, which put the fills onto event_q
+        each as it arrives, and polls the fills of the working orders.'''
+        _orders: List[OrderEvent]
+        _polled = time.monotonic()
+
+        while True:
+            if self.working and time.monotonic() - _polled >= self.poll:
+                self._poll()
+                _polled = time.monotonic()
+            try:
+                _event = self.exec_q.get(timeout=self.poll)
+            except Empty:
+                continue
+            if _event is None:
+                break
+            _orders = cast(OrderBatchEvent, _event).orders \
+                if _event.type == 'ORDERS' else [cast(OrderEvent, _event)]
+            for _order in _orders:
+                self.executor.submit(self._execute_order, _order)
+        self.executor.shutdown(wait=True)
+        self.pool.close()
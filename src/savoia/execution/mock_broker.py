@@ -0,0 +1,286 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from decimal import Decimal
+import json
+import re
+import threading
+import time
+
+import pandas as pd
+
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class _MockBrokerHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keeps the connections alive
+    server: '_MockBrokerServer'
+
+    def setup(self) -> None:
+        super().setup()
+        with self.server.broker.lock:
+            self.server.broker.connections += 1
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _respond(self, status: int, body: Dict[str, Any]) -> None:
+        _body = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(_body)))
+        self.end_headers()
+        self.wfile.write(_body)
+
+    def _handle(self) -> None:
+        _length = int(self.headers.get('Content-Length', 0))
+        _body = json.loads(self.rfile.read(_length) or b'{}')
+        _status, _response = self.server.broker.handle(self.command,
+            self.path, self.headers.get('Authorization', ''), _body)
+        self._respond(_status, _response)
+
+    def do_POST(self) -> None:
+        self._handle()
+
+    def do_PUT(self) -> None:
+        self._handle()
+
+    def do_GET(self) -> None:
+        self._handle()
+
+
+class _MockBrokerServer(ThreadingHTTPServer):
+    daemon_threads = True
+    broker: 'MockBroker'
+
+
+class MockBroker(object):
+    """
+    MockBroker serves the order endpoints of the OANDA v20 REST API on
+    localhost, for testing execution handlers without the broker.
+
+    Market orders are filled at once at the ask (buy) or bid (sell) of the
+    instrument in prices, up to liquidity units if set, and the rest is
+    cancelled. Other orders are only accepted, and filled by fill(). The
+    orders and transactions can be looked up as on the broker. The first
+    failures requests are answered with failure_status, the next lost
+    requests are taken but answered with 502, and each request is answered
+    after latency seconds.
+    """
+    ORDERS = re.compile(r'^/v3/accounts/([^/]+)/orders$')
+    CANCEL = re.compile(r'^/v3/accounts/([^/]+)/orders/@([^/]+)/cancel$')
+    REPLACE = re.compile(r'^/v3/accounts/([^/]+)/orders/@([^/]+)$')
+    SINCE = re.compile(
+        r'^/v3/accounts/([^/]+)/transactions/sinceid\?id=(\d+)$')
+
+    account_id: str
+    access_token: str
+    prices: Dict[str, Tuple[Decimal, Decimal]]
+    latency: float
+    failures: int
+    failure_status: int
+    lost: int
+    liquidity: Optional[Decimal]
+    orders: Dict[str, Dict[str, Any]]  # By ref
+    transactions: List[Dict[str, Any]]
+    requests: List[Tuple[str, str, Dict[str, Any]]]
+    connections: int
+    lock: threading.Lock
+    server: Optional[_MockBrokerServer]
+    _thread: Optional[threading.Thread]
+    _id: int
+
+    def __init__(self, prices: Dict[str, Tuple[Decimal, Decimal]],
+            account_id: str = '001', access_token: str = 'token',
+            latency: float = 0, failures: int = 0,
+            failure_status: int = 503, lost: int = 0,
+            liquidity: Optional[Decimal] = None) -> None:
+        '''
+        Parameters:
+        prices - (bid, ask) by instrument, e.g. 'USD_JPY'.
+        '''
+        self.account_id = account_id
+        self.access_token = access_token
+        self.prices = prices
+        self.latency = latency
+        self.failures = failures
+        self.failure_status = failure_status
+        self.lost = lost
+        self.liquidity = liquidity
+        self.orders = {}
+        self.transactions = []
+        self.requests = []
+        self.connections = 0
+        self.lock = threading.Lock()
+        self.server = None
+        self._thread = None
+        self._id = 0
+
+    def start(self) -> int:
+        '''Starts serving on a free port, and returns the port.'''
+        self.server = _MockBrokerServer(('127.0.0.1', 0), _MockBrokerHandler)
+        self.server.broker = self
+        self._thread = threading.Thread(target=self.server.serve_forever,
+            daemon=True)
+        self._thread.start()
+        return self.server.server_address[1]
+
+    def stop(self) -> None:
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _next_id(self) -> str:
+        self._id += 1
+        return str(self._id)
+
+    def _transact(self, transaction: Dict[str, Any]) -> Dict[str, Any]:
+        '''Records the transaction with the next ID, and returns it.'''
+        _transaction = dict(transaction, id=self._next_id(),
+            time=pd.Timestamp.now('UTC').isoformat())
+        self.transactions.append(_transaction)
+        return _transaction
+
+    def handle(self, method: str, path: str, authorization: str,
+            body: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        '''Returns the status and body of the response to the request.'''
+        _match: Optional['re.Match[str]']
+
+        if self.latency > 0:
+            time.sleep(self.latency)
+        with self.lock:
+            self.requests.append((method, path, body))
+            if self.failures > 0:
+                self.failures -= 1
+                return self.failure_status, {'errorMessage': 'Unavailable'}
+            if authorization != f'Bearer {self.access_token}':
+                return 401, {'errorMessage': 'Insufficient authorization'}
+            _status, _response = self._route(method, path, body)
+            _response['lastTransactionID'] = str(self._id)
+            if self.lost > 0:
+                self.lost -= 1
+                return 502, {'errorMessage': 'Bad gateway'}
+        return _status, _response
+
+    def _route(self, method: str, path: str, body: Dict[str, Any]) \
+            -> Tuple[int, Dict[str, Any]]:
+        _match: Optional['re.Match[str]']
+
+        _match = self.ORDERS.match(path)
+        if method == 'POST' and _match:
+            return self._create(_match.group(1), body['order'])
+        _match = self.CANCEL.match(path)
+        if method == 'PUT' and _match:
+            return self._cancel(_match.group(1), _match.group(2))
+        _match = self.REPLACE.match(path)
+        if method == 'PUT' and _match:
+            return self._replace(_match.group(1), _match.group(2),
+                body['order'])
+        if method == 'GET' and _match:
+            return self._get(_match.group(1), _match.group(2))
+        _match = self.SINCE.match(path)
+        if method == 'GET' and _match:
+            return self._since(_match.group(1), int(_match.group(2)))
+        return 404, {'errorMessage': f'No endpoint: {method} {path}'}
+
+    def fill(self, ref: str, units: Decimal) -> None:
+        '''Fills units of the resting order at its price.'''
+        with self.lock:
+            _order = self.orders[ref]
+            _order['filled'] += units
+            self._transact({'type': 'ORDER_FILL', 'orderID': _order['id'],
+                'clientOrderID': ref, 'instrument': _order['instrument'],
+                'units': str(units), 'price': _order['price']})
+            if abs(_order['filled']) >= abs(Decimal(_order['units'])):
+                _order['state'] = 'FILLED'
+
+    def _create(self, account_id: str, order: Dict[str, Any]) \
+            -> Tuple[int, Dict[str, Any]]:
+        _ref = order.get('clientExtensions', {}).get('id', '')
+        _units = Decimal(order['units'])
+        _response: Dict[str, Any]
+        _filled: Decimal
+
+        if account_id != self.account_id or \
+                order['instrument'] not in self.prices:
+            return 400, {'orderRejectTransaction': self._transact({
+                'type': f'{order["type"]}_ORDER_REJECT',
+                'instrument': order['instrument'], 'units': order['units'],
+                'clientExtensions': {'id': _ref}}),
+                'errorMessage': 'Invalid order'}
+        _response = {'orderCreateTransaction': self._transact({
+            'type': f'{order["type"]}_ORDER',
+            'instrument': order['instrument'], 'units': order['units'],
+            'clientExtensions': {'id': _ref}})}
+        self.orders[_ref] = {'id': _response['orderCreateTransaction']['id'],
+            'type': order['type'], 'instrument': order['instrument'],
+            'units': order['units'], 'price': order.get('price'),
+            'state': 'PENDING', 'filled': Decimal('0')}
+        if order['type'] != 'MARKET':
+            return 201, _response
+        _bid, _ask = self.prices[order['instrument']]
+        _filled = _units if self.liquidity is None else \
+            min(abs(_units), self.liquidity) * (1 if _units > 0 else -1)
+        _response['orderFillTransaction'] = self._transact({
+            'type': 'ORDER_FILL',
+            'orderID': self.orders[_ref]['id'],
+            'clientOrderID': _ref,
+            'instrument': order['instrument'],
+            'units': str(_filled),
+            'price': str(_ask if _units > 0 else _bid),
+        })
+        self.orders[_ref]['filled'] = _filled
+        self.orders[_ref]['state'] = 'FILLED'
+        if _filled != _units:
+            _response['orderCancelTransaction'] = self._transact({
+                'type': 'ORDER_CANCEL', 'orderID': self.orders[_ref]['id'],
+                'clientOrderID': _ref, 'reason': 'MARKET_HALTED'})
+            self.orders[_ref]['state'] = 'CANCELLED'
+        return 201, _response
+
+    def _cancel(self, account_id: str, ref: str) \
+            -> Tuple[int, Dict[str, Any]]:
+        if account_id != self.account_id:
+            return 404, {'errorMessage': 'No account'}
+        if ref in self.orders:
+            self.orders[ref]['state'] = 'CANCELLED'
+        return 200, {'orderCancelTransaction': self._transact({
+            'type': 'ORDER_CANCEL', 'clientOrderID': ref,
+            'reason': 'CLIENT_REQUEST'})}
+
+    def _replace(self, account_id: str, ref: str, order: Dict[str, Any]) \
+            -> Tuple[int, Dict[str, Any]]:
+        _response: Dict[str, Any]
+
+        if account_id != self.account_id:
+            return 404, {'errorMessage': 'No account'}
+        _response = {
+            'orderCancelTransaction': self._transact({
+                'type': 'ORDER_CANCEL', 'clientOrderID': ref,
+                'reason': 'CLIENT_REQUEST_REPLACED'}),
+            'orderCreateTransaction': self._transact({
+                'type': f'{order["type"]}_ORDER',
+                'instrument': order['instrument'], 'units': order['units'],
+                'clientExtensions': {'id': ref}}),
+        }
+        self.orders[ref] = dict(self.orders.get(ref, {'filled': Decimal('0')}),
+            id=_response['orderCreateTransaction']['id'], type=order['type'],
+            instrument=order['instrument'], units=order['units'],
+            price=order.get('price'), state='PENDING')
+        return 201, _response
+
+    def _get(self, account_id: str, ref: str) -> Tuple[int, Dict[str, Any]]:
+        if account_id != self.account_id or ref not in self.orders:
+            return 404, {'errorCode': 'ORDER_DOESNT_EXIST',
+                'errorMessage': 'The order specified does not exist'}
+        _order = self.orders[ref]
+        return 200, {'order': {'id': _order['id'], 'type': _order['type'],
+            'instrument': _order['instrument'], 'units': _order['units'],
+            'state': _order['state'], 'clientExtensions': {'id': ref}}}
+
+    def _since(self, account_id: str, since: int) \
+            -> Tuple[int, Dict[str, Any]]:
+        if account_id != self.account_id:
+            return 404, {'errorMessage': 'No account'}
+        return 200, {'transactions': [_t for _t in self.transactions
+            if int(_t['id']) > since]}
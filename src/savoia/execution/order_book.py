@@ -0,0 +1,121 @@
+from decimal import Decimal
+import heapq
+
+from savoia.event.event import OrderEvent
+from savoia.types.types import Pair
+
+from typing import Dict, List, Optional, Tuple
+
+
+Entry = Tuple[Decimal, int, str]
+
+
+class OrderBook(object):
+    """
+    OrderBook holds the resting limit and stop orders of a pair.
+
+    Orders are kept in four heaps, buy/sell limits and buy/sell stops,
+    keyed by sign * price so that the top of each heap is the first order
+    to trigger, and an order triggers when its key <= sign * the market
+    price on its side:
+
+    buy limit   - ask <= price, sign -1
+    sell limit  - bid >= price, sign +1
+    buy stop    - ask >= price, sign +1
+    sell stop   - bid <= price, sign -1
+
+    match() therefore only pops the orders whose trigger price has been
+    crossed. Cancelled or replaced orders are left in the heaps and skipped
+    when they reach the top, and the heaps are rebuilt once such dead
+    entries outnumber the live orders.
+    """
+    SIGNS: Dict[Tuple[str, bool], int] = {
+        ('limit', True): -1,
+        ('limit', False): 1,
+        ('stop', True): 1,
+        ('stop', False): -1,
+    }
+
+    pair: Pair
+    orders: Dict[str, Tuple[int, OrderEvent]]
+    _heaps: Dict[Tuple[str, bool], List[Entry]]
+    _dead: int
+
+    def __init__(self, pair: Pair) -> None:
+        self.pair = pair
+        self.orders = {}
+        self._heaps = dict((_kind, []) for _kind in self.SIGNS)
+        self._dead = 0
+
+    def __len__(self) -> int:
+        return len(self.orders)
+
+    @classmethod
+    def _kind(cls, order: OrderEvent) -> Tuple[str, bool]:
+        _kind = (order.order_type, order.units > 0)
+        if _kind not in cls.SIGNS:
+            raise Exception(f"Unexpected order type: {order.order_type}")
+        return _kind
+
+    def add(self, order: OrderEvent, seq: int) -> None:
+        '''Adds the order, seq giving its priority among the orders at the
+        same price and the order of fills within a tick.'''
+        _kind = self._kind(order)
+        if order.ref in self.orders:
+            self.cancel(order.ref)
+        self.orders[order.ref] = (seq, order)
+        heapq.heappush(self._heaps[_kind],
+            (self.SIGNS[_kind] * order.price, seq, order.ref))
+
+    def cancel(self, ref: str) -> Optional[OrderEvent]:
+        '''Cancels the order, and returns it or None if not resting.'''
+        _entry = self.orders.pop(ref, None)
+        if _entry is None:
+            return None
+        self._dead += 1
+        if self._dead > max(len(self.orders), 64):
+            self._compact()
+        return _entry[1]
+
+    def replace(self, order: OrderEvent, seq: int) -> Optional[OrderEvent]:
+        '''Replaces the resting order of the same ref with the new price and
+        units, which loses its time priority. Returns the order replaced, or
+        None in which case nothing is added.'''
+        _old = self.cancel(order.ref)
+        if _old is not None:
+            self.add(OrderEvent(ref=order.ref, pair=order.pair,
+                time=order.time, order_type=_old.order_type,
+                units=order.units, price=order.price,
+                strategy=order.strategy), seq)
+        return _old
+
+    def _compact(self) -> None:
+        '''Rebuilds the heaps without the dead entries.'''
+        for _kind, _heap in self._heaps.items():
+            _heap[:] = [_e for _e in _heap if self._alive(_e)]
+            heapq.heapify(_heap)
+        self._dead = 0
+
+    def _alive(self, entry: Entry) -> bool:
+        _order = self.orders.get(entry[2])
+        return _order is not None and _order[0] == entry[1]
+
+    def match(self, bid: Decimal, ask: Decimal) -> List[OrderEvent]:
+        '''Removes the orders triggered by the prices, and returns them in
+        order of seq.'''
+        _triggered: List[Tuple[int, OrderEvent]] = []
+        _heap: List[Entry]
+        _price: Decimal
+        _entry: Entry
+
+        for _kind, _sign in self.SIGNS.items():
+            _heap = self._heaps[_kind]
+            _price = _sign * (ask if _kind[1] else bid)
+            while _heap and _heap[0][0] <= _price:
+                _entry = heapq.heappop(_heap)
+                if not self._alive(_entry):
+                    self._dead -= 1
+                    continue
+                _triggered.append(self.orders.pop(_entry[2]))
+        _triggered.sort(key=lambda _t: _t[0])
+        return [_order for _, _order in _triggered]
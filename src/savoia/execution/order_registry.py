@@ -0,0 +1,160 @@
+from decimal import Decimal
+from logging import getLogger, Logger
+import heapq
+
+from savoia.config.decimal_config import DECIMAL_PLACES
+from savoia.event.event import OrderEvent, FillEvent
+
+from typing import Dict, List, Optional, Tuple
+
+
+class InFlightOrder(object):
+    '''InFlightOrder is an order sent to the execution handler, together
+    with the fills received so far.'''
+    order: OrderEvent
+    seq: int
+    status: str
+    units: Decimal  # Units filled so far
+    price: Decimal  # Average price of the units filled
+    expiry: Optional[float]
+
+    def __init__(self, order: OrderEvent, seq: int,
+            expiry: Optional[float]) -> None:
+        self.order = order
+        self.seq = seq
+        self.status = 'submitted'
+        self.units = Decimal('0')
+        self.price = Decimal('0')
+        self.expiry = expiry
+
+    def __repr__(self) -> str:
+        return f'InFlightOrder(ref={self.order.ref}, ' + \
+            f'status={self.status}, ' + \
+            f'units={self.units}/{self.order.units}, price={self.price})'
+
+
+class OrderRegistry(object):
+    """
+    OrderRegistry tracks the orders in flight, i.e. sent to the execution
+    handler and not yet completely filled, by their ref.
+
+    Fills are accumulated onto the order of the same ref, which completes
+    once a fill of any status but 'partial' arrives, or the units ordered
+    have been filled. Orders not completed within timeout seconds expire;
+    their expiries are kept in a heap so that expire() only looks at the
+    orders due. The number of orders per status is kept for reporting.
+    """
+    logger: Logger
+    timeout: Optional[float]
+    orders: Dict[str, InFlightOrder]
+    counts: Dict[str, int]
+    _timers: List[Tuple[float, int, str]]
+    _seq: int
+
+    def __init__(self, timeout: Optional[float] = None) -> None:
+        '''
+        Parameters:
+        timeout - Seconds until an order in flight expires. No expiry if None.
+        '''
+        self.logger = getLogger(__name__)
+        self.timeout = timeout
+        self.orders = {}
+        self.counts = {}
+        self._timers = []
+        self._seq = 0
+
+    def __len__(self) -> int:
+        return len(self.orders)
+
+    def __contains__(self, ref: str) -> bool:
+        return ref in self.orders
+
+    def get(self, ref: str) -> Optional[InFlightOrder]:
+        return self.orders.get(ref)
+
+    def _count(self, status: str) -> None:
+        self.counts[status] = self.counts.get(status, 0) + 1
+
+    def _complete(self, ref: str, status: str) -> InFlightOrder:
+        _in_flight = self.orders.pop(ref)
+        _in_flight.status = status
+        self._count(status)
+        return _in_flight
+
+    def submit(self, order: OrderEvent, now: float) -> None:
+        '''Registers the order sent at now. Orders of type 'cancel' and
+        'replace' act on the order in flight of the same ref instead.'''
+        _in_flight = self.orders.get(order.ref)
+        _expiry: Optional[float]
+
+        if order.order_type == 'cancel':
+            if _in_flight is not None:
+                self._complete(order.ref, 'cancelled')
+            return
+        if order.order_type == 'replace':
+            if _in_flight is not None:
+                _in_flight.order = OrderEvent(ref=order.ref, pair=order.pair,
+                    time=order.time, order_type=_in_flight.order.order_type,
+                    units=order.units, price=order.price,
+                    strategy=order.strategy)
+            return
+        if _in_flight is not None:
+            self.logger.warning(f'Order resubmitted in flight: {order.ref}')
+            self._complete(order.ref, 'resubmitted')
+        self._seq += 1
+        _expiry = None if self.timeout is None else now + self.timeout
+        self.orders[order.ref] = InFlightOrder(order, self._seq, _expiry)
+        self._count('submitted')
+        if _expiry is not None:
+            heapq.heappush(self._timers, (_expiry, self._seq, order.ref))
+
+    def fill(self, event: FillEvent) -> Optional[InFlightOrder]:
+        '''Accumulates the fill onto its order, and returns the order or None
+        if not in flight, e.g. expired already.'''
+        _in_flight = self.orders.get(event.ref)
+        _units: Decimal
+
+        if _in_flight is None:
+            self.logger.warning(f'Fill of no order in flight: {event.ref}')
+            return None
+        _units = _in_flight.units + event.units
+        if _units != 0:
+            _in_flight.price = ((_in_flight.price * _in_flight.units +
+                event.price * event.units) / _units).quantize(DECIMAL_PLACES)
+        _in_flight.units = _units
+        if event.status != 'partial' or \
+                abs(_units) >= abs(_in_flight.order.units):
+            return self._complete(event.ref,
+                'filled' if event.status == 'partial' else event.status)
+        _in_flight.status = 'partial'
+        return _in_flight
+
+    def expire(self, now: float) -> List[InFlightOrder]:
+        '''Removes the orders due to expire by now, and returns them.'''
+        _expired: List[InFlightOrder] = []
+        _timer: Tuple[float, int, str]
+
+        while self._timers and self._timers[0][0] <= now:
+            _timer = heapq.heappop(self._timers)
+            if self._alive(_timer):
+                _expired.append(self._complete(_timer[2], 'expired'))
+        return _expired
+
+    def _alive(self, timer: Tuple[float, int, str]) -> bool:
+        _in_flight = self.orders.get(timer[2])
+        return _in_flight is not None and _in_flight.seq == timer[1]
+
+    def next_expiry(self, now: float) -> Optional[float]:
+        '''Returns seconds from now until the next order expires, or None if
+        no order is to expire.'''
+        while self._timers and not self._alive(self._timers[0]):
+            heapq.heappop(self._timers)
+        if not self._timers:
+            return None
+        return max(self._timers[0][0] - now, 0)
+
+    def report(self) -> Dict[str, int]:
+        '''Returns the number of orders per status, and those in flight.'''
+        _report = dict(self.counts)
+        _report['in_flight'] = len(self.orders)
+        return _report
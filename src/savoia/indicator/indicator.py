@@ -0,0 +1,422 @@
+from abc import ABCMeta, abstractmethod
+from collections import deque
+from decimal import Decimal
+import math
+
+import numpy as np
+
+from typing import Any, Callable, Deque, Generic, Optional, Tuple, \
+    TypeVar, Union, cast
+
+
+Num = Union[float, Decimal]
+# Numeric type of an indicator, either float or Decimal throughout.
+N = TypeVar('N', float, Decimal)
+
+
+class RingBuffer(Generic[N]):
+    """
+    RingBuffer holds the latest values of a fixed-size window, in a float64
+    array or, for Decimal values, in an object array.
+    """
+    capacity: int
+    count: int
+    _pos: int
+    _values: np.ndarray
+
+    def __init__(self, capacity: int, decimal: bool = False) -> None:
+        self.capacity = int(capacity)
+        if self.capacity <= 0:
+            raise Exception(f"Invalid capacity: {capacity}, " +
+                "expected a positive integer.")
+        self.count = 0
+        self._pos = 0
+        self._values = np.zeros(self.capacity,
+            dtype=object if decimal else np.float64)
+
+    @property
+    def full(self) -> bool:
+        return self.count == self.capacity
+
+    def push(self, value: N) -> Optional[N]:
+        '''Stores the value, and returns the one evicted if full.'''
+        _evicted: Optional[N] = self._values[self._pos] if self.full \
+            else None
+        self._values[self._pos] = value
+        self._pos = (self._pos + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+        return _evicted
+
+    def values(self) -> np.ndarray:
+        '''Returns a copy of the values held, oldest first.'''
+        if not self.full:
+            return self._values[:self.count].copy()
+        return np.concatenate(
+            [self._values[self._pos:], self._values[:self._pos]])
+
+
+class Indicator(Generic[N], metaclass=ABCMeta):
+    """
+    Indicator is an abstract base class providing an interface for all
+    the incremental indicators.
+
+    Each indicator is updated in O(1) per tick, either in float64 or, with
+    decimal=True, in Decimal. value is None until enough values have been
+    fed. warm_up() initialises the state in bulk from a NumPy array, as if
+    the values were fed one by one through update().
+    """
+    window: int
+    decimal: bool
+    count: int
+    value: Optional[N]
+    _type: Callable[[Any], N]
+
+    def __init__(self, window: int, decimal: bool = False) -> None:
+        self.window = int(window)
+        if self.window <= 0:
+            raise Exception(f"Invalid window: {window}, " +
+                "expected a positive integer.")
+        self.decimal = decimal
+        self.count = 0
+        self.value = None
+        # The flag decides the numeric type, which mypy cannot follow.
+        self._type = cast(Callable[[Any], N],
+            _to_decimal if decimal else float)
+
+    @property
+    def ready(self) -> bool:
+        return self.value is not None
+
+    def _num(self, value: Any) -> N:
+        '''Converts the value into the numeric type of the indicator.'''
+        return self._type(value)
+
+    def _sqrt(self, value: N) -> N:
+        if isinstance(value, Decimal):
+            return value.sqrt()
+        return math.sqrt(value)
+
+    @abstractmethod
+    def update(self, value: Num) -> Optional[N]:
+        '''Feeds a value, and returns the latest value of the indicator.'''
+        pass
+
+    def warm_up(self, values: np.ndarray) -> Optional[N]:
+        '''Feeds an array of values in bulk. Decimal indicators are fed one by
+        one to keep them exact.'''
+        return self._feed(values)
+
+    def _feed(self, values: np.ndarray) -> Optional[N]:
+        '''Feeds the values one by one through update().'''
+        for _v in values:
+            self.update(_v)
+        return self.value
+
+
+def _to_decimal(value: Any) -> Decimal:
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+def _smooth(seed: float, values: np.ndarray, alpha: float) -> float:
+    '''Returns the result of exponential smoothing of the values starting
+    from the seed, i.e. s = s * (1 - alpha) + v * alpha for each v.'''
+    _n = len(values)
+    if _n == 0:
+        return seed
+    _weights = np.power(1.0 - alpha, np.arange(_n - 1, -1, -1))
+    return float(seed * (1.0 - alpha) ** _n +
+        alpha * np.dot(_weights, values.astype(np.float64)))
+
+
+class SMA(Indicator[N]):
+    """Simple moving average over the window."""
+    _buffer: RingBuffer[N]
+    _sum: N
+
+    def __init__(self, window: int, decimal: bool = False) -> None:
+        super().__init__(window, decimal)
+        self._buffer = RingBuffer(self.window, decimal)
+        self._sum = self._num(0)
+
+    def update(self, value: Num) -> Optional[N]:
+        _value = self._num(value)
+        _evicted = self._buffer.push(_value)
+        self._sum += _value
+        if _evicted is not None:
+            self._sum -= _evicted
+        self.count += 1
+        if self._buffer.full:
+            self.value = self._sum / self.window
+        return self.value
+
+    def warm_up(self, values: np.ndarray) -> Optional[N]:
+        # Only the values in the last window remain in the buffer.
+        for _v in values[-self.window:]:
+            self._buffer.push(self._num(_v))
+        self._sum = self._num(sum(self._buffer.values(), self._num(0)))
+        self.count += len(values)
+        if self._buffer.full:
+            self.value = self._sum / self.window
+        return self.value
+
+
+class EMA(Indicator[N]):
+    """Exponential moving average with alpha = 2 / (window + 1), seeded with
+    the first value. It is ready once window values have been fed."""
+    alpha: N
+
+    def __init__(self, window: int, decimal: bool = False) -> None:
+        super().__init__(window, decimal)
+        self.alpha = self._num(2) / (self.window + 1)
+        self._ema: Optional[N] = None
+
+    def update(self, value: Num) -> Optional[N]:
+        _value = self._num(value)
+        if self._ema is None:
+            self._ema = _value
+        else:
+            self._ema += (_value - self._ema) * self.alpha
+        self.count += 1
+        if self.count >= self.window:
+            self.value = self._ema
+        return self.value
+
+    def warm_up(self, values: np.ndarray) -> Optional[N]:
+        _ema: N
+
+        if self.decimal or len(values) == 0:
+            return self._feed(values)
+        if self._ema is None:
+            _ema = self._num(values[0])
+            values = values[1:]
+            self.count += 1
+        else:
+            _ema = self._ema
+        self._ema = self._num(_smooth(float(_ema), values, float(self.alpha)))
+        self.count += len(values)
+        if self.count >= self.window:
+            self.value = self._ema
+        return self.value
+
+
+class RollingVariance(Indicator[N]):
+    """Variance over the window, updated with Welford's algorithm extended
+    to remove the value leaving the window."""
+    ddof: int
+    _buffer: RingBuffer[N]
+    _mean: N
+    _m2: N
+
+    def __init__(self, window: int, decimal: bool = False,
+            ddof: int = 1) -> None:
+        super().__init__(window, decimal)
+        self.ddof = ddof
+        if self.window <= self.ddof:
+            raise Exception(f"Invalid window: {window}, " +
+                f"expected larger than ddof {ddof}.")
+        self._buffer = RingBuffer(self.window, decimal)
+        self._mean = self._num(0)
+        self._m2 = self._num(0)
+
+    def update(self, value: Num) -> Optional[N]:
+        _value = self._num(value)
+        _evicted = self._buffer.push(_value)
+        _mean: N
+        if _evicted is None:
+            _delta = _value - self._mean
+            self._mean += _delta / self._buffer.count
+            self._m2 += _delta * (_value - self._mean)
+        else:
+            _mean = self._mean + (_value - _evicted) / self.window
+            self._m2 += (_value - _evicted) * \
+                (_value - _mean + _evicted - self._mean)
+            self._mean = _mean
+        self.count += 1
+        if self._buffer.full:
+            # Guard against tiny negatives left by float cancellation.
+            self.value = max(self._m2, self._num(0)) / \
+                (self.window - self.ddof)
+        return self.value
+
+    def warm_up(self, values: np.ndarray) -> Optional[N]:
+        if self.decimal:
+            return self._feed(values)
+        for _v in values[-self.window:]:
+            self._buffer.push(self._num(_v))
+        _values = self._buffer.values()
+        self._mean = self._num(_values.mean() if len(_values) else 0)
+        self._m2 = self._num(((_values - float(self._mean)) ** 2).sum())
+        self.count += len(values)
+        if self._buffer.full:
+            self.value = self._m2 / (self.window - self.ddof)
+        return self.value
+
+
+class RollingStd(RollingVariance[N]):
+    """Standard deviation over the window."""
+    def update(self, value: Num) -> Optional[N]:
+        _var = RollingVariance.update(self, value)
+        if _var is not None:
+            self.value = self._sqrt(_var)
+        return self.value
+
+    def warm_up(self, values: np.ndarray) -> Optional[N]:
+        _var = RollingVariance.warm_up(self, values)
+        if _var is not None and not self.decimal:
+            self.value = self._sqrt(_var)
+        return self.value
+
+
+class RollingMax(Indicator[N]):
+    """Maximum over the window, kept with a monotonic deque of
+    (index, value) so that each value is pushed and popped at most once."""
+    _deque: Deque[Tuple[int, N]]
+
+    def __init__(self, window: int, decimal: bool = False) -> None:
+        super().__init__(window, decimal)
+        self._deque = deque()
+
+    def _dominates(self, new: N, old: N) -> bool:
+        return new >= old
+
+    def update(self, value: Num) -> Optional[N]:
+        _value = self._num(value)
+        while self._deque and self._dominates(_value, self._deque[-1][1]):
+            self._deque.pop()
+        self._deque.append((self.count, _value))
+        if self._deque[0][0] <= self.count - self.window:
+            self._deque.popleft()
+        self.count += 1
+        if self.count >= self.window:
+            self.value = self._deque[0][1]
+        return self.value
+
+    def warm_up(self, values: np.ndarray) -> Optional[N]:
+        # Only the values in the last window can remain in the deque.
+        _skip = len(values) - self.window
+        if _skip >= 0:
+            self._deque.clear()
+            self.count += _skip
+            values = values[_skip:]
+        return self._feed(values)
+
+
+class RollingMin(RollingMax[N]):
+    """Minimum over the window."""
+    def _dominates(self, new: N, old: N) -> bool:
+        return new <= old
+
+
+class RSI(Indicator[N]):
+    """Relative strength index with Wilder's smoothing. Average gain and
+    loss are seeded with the simple averages of the first window changes."""
+    _prev: Optional[N]
+    _gain: N
+    _loss: N
+
+    def __init__(self, window: int = 14, decimal: bool = False) -> None:
+        super().__init__(window, decimal)
+        self._prev = None
+        self._gain = self._num(0)
+        self._loss = self._num(0)
+
+    def _calc(self) -> N:
+        if self._loss == 0:
+            return self._num(100)
+        return 100 - 100 / (1 + self._gain / self._loss)
+
+    def update(self, value: Num) -> Optional[N]:
+        _value = self._num(value)
+        if self._prev is not None:
+            _change = _value - self._prev
+            _gain = max(_change, self._num(0))
+            _loss = max(-_change, self._num(0))
+            if self.count <= self.window:
+                self._gain += _gain
+                self._loss += _loss
+                if self.count == self.window:
+                    self._gain /= self.window
+                    self._loss /= self.window
+            else:
+                self._gain = (self._gain * (self.window - 1) + _gain) / \
+                    self.window
+                self._loss = (self._loss * (self.window - 1) + _loss) / \
+                    self.window
+            if self.count >= self.window:
+                self.value = self._calc()
+        self._prev = _value
+        self.count += 1
+        return self.value
+
+    def warm_up(self, values: np.ndarray) -> Optional[N]:
+        if self.decimal or self.count != 0 or len(values) <= self.window:
+            return self._feed(values)
+        _values = values.astype(np.float64)
+        _changes = np.diff(_values)
+        _gains = np.maximum(_changes, 0.0)
+        _losses = np.maximum(-_changes, 0.0)
+        _alpha = 1.0 / self.window
+        self._gain = self._num(_smooth(float(_gains[:self.window].mean()),
+            _gains[self.window:], _alpha))
+        self._loss = self._num(_smooth(float(_losses[:self.window].mean()),
+            _losses[self.window:], _alpha))
+        self._prev = self._num(_values[-1])
+        self.count = len(values)
+        self.value = self._calc()
+        return self.value
+
+
+class ATR(Indicator[N]):
+    """Average true range with Wilder's smoothing, seeded with the simple
+    average of the first window true ranges. With ticks, low and close may
+    be omitted, in which case the price is used for all of them."""
+    _close: Optional[N]
+    _atr: N
+
+    def __init__(self, window: int = 14, decimal: bool = False) -> None:
+        super().__init__(window, decimal)
+        self._close = None
+        self._atr = self._num(0)
+
+    def update(self, value: Num, low: Optional[Num] = None,
+            close: Optional[Num] = None) -> Optional[N]:
+        _high = self._num(value)
+        _low = _high if low is None else self._num(low)
+        _close = _high if close is None else self._num(close)
+        _tr = _high - _low
+        if self._close is not None:
+            _tr = max(_tr, abs(_high - self._close), abs(_low - self._close))
+        self._close = _close
+        self.count += 1
+        if self.count <= self.window:
+            self._atr += _tr
+            if self.count == self.window:
+                self._atr /= self.window
+                self.value = self._atr
+        else:
+            self._atr = (self._atr * (self.window - 1) + _tr) / self.window
+            self.value = self._atr
+        return self.value
+
+    def warm_up(self, values: np.ndarray, lows: Optional[np.ndarray] = None,
+            closes: Optional[np.ndarray] = None) -> Optional[N]:
+        _highs = values
+        _lows = _highs if lows is None else lows
+        _closes = _highs if closes is None else closes
+        if self.decimal or self.count != 0 or len(values) < self.window:
+            for _h, _l, _c in zip(_highs, _lows, _closes):
+                self.update(_h, _l, _c)
+            return self.value
+        _h = _highs.astype(np.float64)
+        _l = _lows.astype(np.float64)
+        _c = _closes.astype(np.float64)
+        _trs = _h - _l
+        _trs[1:] = np.maximum.reduce([_trs[1:], np.abs(_h[1:] - _c[:-1]),
+            np.abs(_l[1:] - _c[:-1])])
+        self._atr = self._num(_smooth(float(_trs[:self.window].mean()),
+            _trs[self.window:], 1.0 / self.window))
+        self._close = self._num(_c[-1])
+        self.count = len(values)
+        self.value = self._atr
+        return self.value
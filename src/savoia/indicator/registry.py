@@ -0,0 +1,149 @@
+from decimal import Decimal
+
+from savoia.event.event import TickEvent
+from savoia.indicator.indicator import Indicator, Num, SMA, EMA, \
+    RollingVariance, RollingStd, RollingMax, RollingMin, RSI, ATR
+from savoia.types.types import Pair, TickColumns
+
+from logging import getLogger, Logger
+from typing import Any, Dict, Optional, Set, Tuple, Type
+
+
+Key = Tuple[Pair, str, str, Tuple[Tuple[str, Any], ...]]
+
+
+class IndicatorRegistry(object):
+    """
+    IndicatorRegistry shares indicators among strategies running in one
+    engine.
+
+    Indicators are keyed by (pair, indicator, price source, params). The
+    first subscription creates the indicator and later ones with the same
+    key share it, so that each indicator is updated exactly once per tick
+    however many strategies use it. An indicator is evicted as soon as its
+    last subscriber unsubscribes. A strategy stopping releases all of its
+    subscriptions at once.
+
+    Price source is either 'bid', 'ask' or 'mid'. ATR is fed with ask, bid
+    and mid as high, low and close respectively, regardless of the source.
+    """
+    INDICATORS: Dict[str, Type['Indicator[Any]']] = {
+        'SMA': SMA,
+        'EMA': EMA,
+        'RollingVariance': RollingVariance,
+        'RollingStd': RollingStd,
+        'RollingMax': RollingMax,
+        'RollingMin': RollingMin,
+        'RSI': RSI,
+        'ATR': ATR,
+    }
+    SOURCES = ('bid', 'ask', 'mid')
+
+    logger: Logger
+    indicators: Dict[Key, 'Indicator[Any]']
+    subscribers: Dict[Key, Set[int]]
+    _keys: Dict[int, Set[Key]]  # Keys subscribed by each subscriber
+    _by_pair: Dict[Pair, Dict[Key, 'Indicator[Any]']]
+
+    def __init__(self) -> None:
+        self.logger = getLogger(__name__)
+        self.indicators = {}
+        self.subscribers = {}
+        self._keys = {}
+        self._by_pair = {}
+
+    @classmethod
+    def make_key(cls, pair: Pair, name: str, source: str = 'bid',
+            **params: Any) -> Key:
+        return (pair, name, source, tuple(sorted(params.items())))
+
+    def subscribe(self, subscriber: object, pair: Pair, name: str,
+            source: str = 'bid', **params: Any) -> Key:
+        '''Subscribes to the indicator, creating it unless already shared by
+        another subscriber, and returns its key.
+
+        Parameters:
+        subscriber - The object using the indicator, e.g. a strategy.
+        pair - The currency pair to calculate the indicator on.
+        name - The name of the indicator class, e.g. 'SMA'.
+        source - The price fed to the indicator.
+        params - The parameters passed to the indicator class.
+        '''
+        if name not in self.INDICATORS:
+            raise Exception(f"Unexpected indicator: {name}")
+        if source not in self.SOURCES:
+            raise Exception(f"Unexpected price source: {source}")
+        _key = self.make_key(pair, name, source, **params)
+        if _key not in self.indicators:
+            _indicator = self.INDICATORS[name](**params)
+            self.indicators[_key] = _indicator
+            self.subscribers[_key] = set()
+            self._by_pair.setdefault(pair, {})[_key] = _indicator
+            self.logger.debug(f"Created indicator: {_key}")
+        self.subscribers[_key].add(id(subscriber))
+        self._keys.setdefault(id(subscriber), set()).add(_key)
+        return _key
+
+    def unsubscribe(self, subscriber: object, key: Key) -> None:
+        '''Unsubscribes from the indicator, evicting it if unused.'''
+        _subscribers = self.subscribers.get(key)
+        if _subscribers is None:
+            return
+        _subscribers.discard(id(subscriber))
+        _keys = self._keys.get(id(subscriber))
+        if _keys is not None:
+            _keys.discard(key)
+            if not _keys:
+                del self._keys[id(subscriber)]
+        if not _subscribers:
+            del self.subscribers[key]
+            del self.indicators[key]
+            del self._by_pair[key[0]][key]
+            if not self._by_pair[key[0]]:
+                del self._by_pair[key[0]]
+            self.logger.debug(f"Evicted indicator: {key}")
+
+    def release(self, subscriber: object) -> None:
+        '''Unsubscribes from all the indicators subscribed, e.g. as the
+        strategy stops.'''
+        for _key in list(self._keys.get(id(subscriber), ())):
+            self.unsubscribe(subscriber, _key)
+
+    def get(self, key: Key) -> 'Indicator[Any]':
+        return self.indicators[key]
+
+    def value(self, key: Key) -> Optional[Num]:
+        return self.indicators[key].value
+
+    def update(self, event: TickEvent) -> None:
+        '''Updates the indicators of the pair ticked. To be called once per
+        tick before strategies read the values.'''
+        _indicators = self._by_pair.get(event.pair)
+        if not _indicators:
+            return
+        _mid: Decimal = (event.bid + event.ask) / 2
+        for _key, _indicator in _indicators.items():
+            if isinstance(_indicator, ATR):
+                _indicator.update(event.ask, event.bid, _mid)
+            elif _key[2] == 'bid':
+                _indicator.update(event.bid)
+            elif _key[2] == 'ask':
+                _indicator.update(event.ask)
+            else:
+                _indicator.update(_mid)
+
+    def warm_up(self, columns: Dict[Pair, TickColumns]) -> None:
+        '''Feeds the indicators with the ticks before the start in bulk.'''
+        for _key, _indicator in self.indicators.items():
+            _columns = columns.get(_key[0])
+            if _columns is None:
+                continue
+            _mid = (_columns['bid'] + _columns['ask']) / 2
+            if isinstance(_indicator, ATR):
+                _indicator.warm_up(_columns['ask'], _columns['bid'], _mid)
+            elif _key[2] == 'mid':
+                _indicator.warm_up(_mid)
+            elif _key[2] == 'bid':
+                _indicator.warm_up(_columns['bid'])
+            else:
+                _indicator.warm_up(_columns['ask'])
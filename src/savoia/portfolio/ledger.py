@@ -0,0 +1,102 @@
+from decimal import Decimal
+from savoia.config.decimal_config import DECIMAL_PLACES
+from savoia.portfolio.trade import Trade
+
+from collections import deque
+from typing import Deque, Dict, List, Tuple, Union
+
+
+class LotLedger():
+    '''
+    LotLedger holds the open lots of a position as 'entry' Trades in a
+    deque, and matches opposite fills against them with either FIFO, LIFO
+    or average accounting.
+
+    Opening fills are appended on the right. FIFO closes from the left and
+    LIFO from the right, so that closing a lot (even partially) is
+    amortized O(1) regardless of the number of lots held. Average keeps a
+    single lot priced at the weighted average of the entries.
+    '''
+    METHODS = ('fifo', 'lifo', 'average')
+
+    method: str
+    lots: Deque[Trade]
+    units: Decimal
+    cost: Decimal
+    realized: Decimal
+    realized_by_lot: Dict[Union[int, str], Decimal]  # Of lots still open
+
+    def __init__(self, method: str = 'fifo') -> None:
+        if method not in self.METHODS:
+            raise Exception('Unexpected accounting method: %s' % method)
+        self.method = method
+        self.lots = deque()
+        self.units = Decimal('0')
+        self.cost = Decimal('0')
+        self.realized = Decimal('0')
+        self.realized_by_lot = {}
+
+    @property
+    def avg_price(self) -> Decimal:
+        '''Weighted average price of the open lots.'''
+        if self.units == 0:
+            return Decimal('0')
+        return (self.cost / self.units).quantize(DECIMAL_PLACES)
+
+    def fill(self, units: Decimal, exec_price: Decimal,
+            order_id: Union[int, str]) \
+            -> Tuple[Decimal, List[Tuple[Union[int, str], Decimal, Decimal]]]:
+        '''Reflects a fill, and returns the realized PnL quoted in quote
+        currency along with (order_id, units, realized PnL) of each lot
+        closed by the fill.
+        '''
+        _closed: List[Tuple[Union[int, str], Decimal, Decimal]] = []
+        _realized: Decimal = Decimal('0')
+        _lot: Trade
+        _units: Decimal
+        _pnl: Decimal
+
+        while units != 0 and units * self.units < 0:
+            _lot = self.lots[-1] if self.method == 'lifo' else self.lots[0]
+            if abs(units) >= abs(_lot.units):
+                _units = _lot.units
+            else:
+                _units = -units
+            _pnl = _lot.close_trade(exec_price, _units)
+            if _lot.units == 0:
+                if self.method == 'lifo':
+                    self.lots.pop()
+                else:
+                    self.lots.popleft()
+                # Lots closed are reported by the return value only.
+                self.realized_by_lot.pop(_lot.order_id, None)
+            else:
+                self.realized_by_lot[_lot.order_id] = \
+                    self.realized_by_lot.get(_lot.order_id, Decimal('0')) + \
+                    _pnl
+            units += _units
+            self.units -= _units
+            self.cost -= _lot.exp_price * _units
+            _realized += _pnl
+            _closed.append((_lot.order_id, _units, _pnl))
+
+        if units != 0:
+            self._open(units, exec_price, order_id)
+        self.realized += _realized
+        return _realized, _closed
+
+    def _open(self, units: Decimal, exec_price: Decimal,
+            order_id: Union[int, str]) -> None:
+        _lot: Trade
+
+        if self.method == 'average' and self.lots:
+            _lot = self.lots[0]
+            _lot.units += units
+            _lot.exp_price = ((self.cost + exec_price * units) /
+                _lot.units).quantize(DECIMAL_PLACES)
+            self.units = _lot.units
+            self.cost = _lot.exp_price * _lot.units
+        else:
+            self.lots.append(Trade(exec_price, units, 'entry', order_id))
+            self.units += units
+            self.cost += exec_price * units
@@ -5,11 +5,14 @@ from savoia.ticker.ticker import Ticker
 from savoia.event.event import OrderEvent, Event, TickEvent, \
     SignalEvent, FillEvent
 from savoia.portfolio.position import Position
+from savoia.portfolio.risk import RiskManager
 from savoia.types.types import Pair
 from savoia.result.result import Result, EquityResult, ExecutionResult
+from savoia.result.sampling import EquitySampler, EveryTickSampler
 
+import pandas as pd
 from logging import getLogger, Logger
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 
 class Portfolio(object):
@@ -23,12 +26,26 @@ class Portfolio(object):
     upl: Decimal
     pairs: List[Pair]
     positions: Dict[Pair, Position]
+    dependents: Dict[Pair, List[Position]]
+    ready_masks: Dict[Pair, int]
+    _upl: Dict[Pair, Decimal]
+    sampler: EquitySampler
+    _pending: Optional[pd.Timestamp]
+    _force: bool
+    _last: Optional[pd.Timestamp]  # Time of the last tick or fill
+    accounting: str
+    risk: Optional[RiskManager]
+    strategy: str
 
     def __init__(
         self, ticker: Ticker, event_q: 'Queue[Event]',
         result_q: 'Queue[Result]', home_currency: str, pairs: List[Pair],
-        equity: Decimal
+        equity: Decimal, sampler: Optional[EquitySampler] = None,
+        accounting: str = 'average', risk: Optional[RiskManager] = None,
+        strategy: str = ''
     ):
+        '''strategy is the name of the strategy whose signals the portfolio
+        handles when multiple strategies run in one engine.'''
         self.logger = getLogger(__name__)
         self.ticker = ticker
         self.event_q = event_q
@@ -38,50 +55,116 @@ class Portfolio(object):
         self.balance = self.equity
         self.upl = Decimal('0')
         self.pairs = pairs
+        self.accounting = accounting
         self.positions = self._initialize_positions()
+        self.dependents = self._set_up_dependents()
+        self.ready_masks = dict(
+            (_pair, self.ticker.ready_mask(
+                [_pair, _position.quote_home_currency_pair]))
+            for _pair, _position in self.positions.items()
+        )
+        self._upl = dict((_pair, Decimal('0')) for _pair in self.pairs)
+        self.sampler = EveryTickSampler() if sampler is None else sampler
+        self._pending = None
+        self._force = False
+        self._last = None
+        self.risk = risk
+        self.strategy = strategy
 
     def _initialize_positions(self) -> Dict[Pair, Position]:
         _pos = {}
         for _pair in self.pairs:
-            _pos[_pair] = Position(self.home_currency, _pair, self.ticker)
+            _pos[_pair] = Position(self.home_currency, _pair, self.ticker,
+                self.accounting)
         return _pos
 
+    def _set_up_dependents(self) -> Dict[Pair, List[Position]]:
+        '''Indexes positions by the traded pairs whose ticks move either the
+        price of the position or its conversion into home currency.
+        '''
+        _dependents: Dict[Pair, List[Position]] = {}
+        for _position in self.positions.values():
+            _sources = self.ticker.graph.sources(_position.pair) + \
+                self.ticker.graph.sources(_position.quote_home_currency_pair)
+            for _source in dict.fromkeys(_sources):
+                _dependents.setdefault(_source, []).append(_position)
+        return _dependents
+
     def update_portfolio(self, event: TickEvent) -> None:
         """
-        This updates all positions ensuring an up to date
-        unrealised profit and loss (upl).
+        This updates the positions affected by the tick ensuring an up to
+        date unrealised profit and loss (upl). The total upl is maintained
+        as a running sum of the deviations of those positions.
+        An EquityResult is emitted only if the sampler picks the tick, or
+        if it is the first tick after a fill.
         """
-        _upl: Dict[str, Decimal] = {}
+        _upl_qh: Decimal
+
+        for _position in self.dependents.get(event.pair, []):
+            _upl_qh = _position.update_position_price()
+            self._update_equity(
+                delta_upl=_upl_qh - self._upl[_position.pair])
+            self._upl[_position.pair] = _upl_qh
+            if self.risk is not None:
+                self.risk.update_position(_position)
+
+        self._last = event.time
+        if self._force or self.sampler.sample(event, self.equity):
+            self._emit_equity(event.time)
+        else:
+            self._pending = event.time
+
+    def _emit_equity(self, time: pd.Timestamp) -> None:
+        '''Emits a snapshot of the current equity as an EquityResult.'''
+        _upl: Dict[str, Decimal]
         _result: EquityResult
 
-        for _pair in self.pairs:
-            _upl[_pair] = self.positions[_pair].update_position_price()
-        self.upl = Decimal(str(sum(_upl.values())))
-        self._update_equity()
+        _upl = self._position_upls()
         _upl['total'] = self.upl
         _result = EquityResult(
-            time=event.time,
+            time=time,
             equity=self.equity,
             balance=self.balance,
-            upl=_upl
+            upl=_upl,
+            strategy=self.strategy
         )
         self.result_q.put(_result)
+        self.sampler.emitted(time, self.equity)
+        self._pending = None
+        self._force = False
+
+    def _position_upls(self) -> Dict[str, Decimal]:
+        '''Returns the latest upl of each position quoted in home currency.'''
+        return dict((str(_pair), _upl) for _pair, _upl in self._upl.items())
+
+    def flush_results(self) -> None:
+        '''Emits the snapshot of the last tick if it has been skipped by the
+        sampler, or the one after the last fill if no tick has followed it.
+        To be called at the end of the run so that the final snapshot is
+        always kept.'''
+        if self._pending is not None:
+            self._emit_equity(self._pending)
+        elif self._force and self._last is not None:
+            self._emit_equity(self._last)
 
     def execute_signal(self, event: SignalEvent) -> None:
         '''Handles SignalEvent'''
-        # Check that the prices ticker contains all necessary
-        # currency pairs prior to executing an order
-        _execute = True
-        for pair in self.ticker.prices:
-            if None in self.ticker.prices[pair].values():
-                _execute = False
+        # Check that the ticker has received prices of all the pairs
+        # which the order depends on prior to executing an order
+        _mask = self.ready_masks.get(event.pair)
+        _execute = _mask is not None and self.ticker.is_ready(_mask)
 
         # All necessary pricing data is available,
         # we can execute
         if _execute:
+            if self.risk is not None and not self.risk.validate(
+                    self.positions[event.pair], event.units, self.equity,
+                    event.ref):
+                return
             order = OrderEvent(
                 ref=event.ref, pair=event.pair, units=event.units,
-                price=event.price, order_type=event.order_type, time=event.time)
+                price=event.price, order_type=event.order_type, time=event.time,
+                strategy=self.strategy)
             self.event_q.put(order)
             self.logger.debug(f"OrderEvent Issued: {order}")
         else:
@@ -91,24 +174,44 @@ class Portfolio(object):
 
     def execute_fill(self, event: FillEvent) -> None:
         '''Handles FillEvent'''
-        _delta_balance: Decimal
-        _delta_upl: Decimal
-
-        _delta_balance, _delta_upl = \
-            self.positions[event.pair].reflect_filled_order(
-                event.units, event.price
-            )
-
-        self._update_equity(_delta_balance, _delta_upl)
+        # Keep the snapshots right before and after the fill.
+        if self._pending is not None:
+            self._emit_equity(self._pending)
+        self._force = True
+        self._last = event.time
+        self._reflect_fill(event)
+        if self.risk is not None:
+            self.risk.update_position(self.positions[event.pair])
+            self.risk.release(event.ref,
+                event.units if event.status == 'partial' else None)
 
         _result = ExecutionResult(
             time=event.time,
             pair=event.pair,
             units=event.units,
-            price=event.price
+            price=event.price,
+            strategy=self.strategy
         )
         self.result_q.put(_result)
 
+    def release_order(self, ref: str) -> None:
+        '''Handles an order over with nothing more to fill, as rejected,
+        cancelled or expired.'''
+        if self.risk is not None:
+            self.risk.release(ref)
+
+    def _reflect_fill(self, event: FillEvent) -> None:
+        '''Reflects the fill to its position, then to balance and upl.'''
+        _delta_balance: Decimal
+        _delta_upl: Decimal
+
+        _delta_balance, _delta_upl = \
+            self.positions[event.pair].reflect_filled_order(
+                event.units, event.price, event.ref
+            )
+        self._update_equity(_delta_balance, _delta_upl)
+        self._upl[event.pair] += _delta_upl
+
     def _update_equity(self, delta_balance: Decimal = Decimal('0'),
             delta_upl: Decimal = Decimal('0')) -> None:
         self.balance += delta_balance
@@ -2,9 +2,10 @@ from decimal import Decimal
 from savoia.config.decimal_config import DECIMAL_PLACES
 from savoia.ticker.ticker import Ticker
 from savoia.portfolio.trade import Trade
+from savoia.portfolio.ledger import LotLedger
 from savoia.types.types import Pair, Price
 
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
 
 class Position():
@@ -18,26 +19,37 @@ class Position():
     upl: Decimal
     trades: List[Trade]
     avg_price: Decimal
+    accounting: str
+    ledger: Optional[LotLedger]  # Lots held unless 'average' accounting
 
-    def __init__(self, home_currency: str, pair: Pair, ticker: Ticker) -> None:
+    def __init__(self, home_currency: str, pair: Pair, ticker: Ticker,
+            accounting: str = 'average') -> None:
         self.home_currency = home_currency
         self.pair = pair
         self.ticker = ticker
         self._set_up_currency_pairs()
         self.units = Decimal('0')
         self.upl = Decimal('0')
+        self.accounting = accounting
+        self.ledger = None if accounting == 'average' else \
+            LotLedger(accounting)
 
-    def reflect_filled_order(self, units: Decimal, exp_price: Decimal) \
-            -> Tuple[Decimal, Decimal]:
+    def reflect_filled_order(self, units: Decimal, exp_price: Decimal,
+            ref: str = '') -> Tuple[Decimal, Decimal]:
         '''Calculates impact on both balance and upl, then returns the values
         quoted with ome currency.
+        With 'fifo' or 'lifo' accounting, balance reflects the PnL realized
+        by the lots closed, see _reflect_lots().
         '''
-        _price_side: str
+        _price: Decimal
         _delta_balance: Decimal = Decimal('0')
         _delta_upl: Decimal = Decimal('0')
         _delta_balance_qh: Decimal
         _delta_upl_qh: Decimal
 
+        if self.ledger is not None:
+            return self._reflect_lots(self.ledger, units, exp_price, ref)
+
         if units * self.units >= 0:  # if same sign...
             _i, _j = self._entry_trade(exp_price, units)
             _delta_balance += _i
@@ -60,11 +72,33 @@ class Position():
         self.avg_price = Decimal('0') if self.units == 0 else \
             (self.price_cur[_price_side] - self.upl /
              self.units).quantize(DECIMAL_PLACES)
-        
+
         _delta_balance_qh = _delta_balance * self._get_qh_factor()
         _delta_upl_qh = _delta_upl * self._get_qh_factor()
         return _delta_balance_qh, _delta_upl_qh
 
+    def _reflect_lots(self, ledger: LotLedger, units: Decimal,
+            exp_price: Decimal, ref: str) -> Tuple[Decimal, Decimal]:
+        '''Reflects a fill to the lot ledger. balance takes the PnL realized
+        by the lots closed, and upl is revalued against the average price of
+        the lots remaining.
+        '''
+        _price: Decimal
+        _delta_balance: Decimal
+        _delta_upl: Decimal
+        _upl: Decimal
+
+        _delta_balance, _ = ledger.fill(units, exp_price, ref)
+        self.units = ledger.units
+        self.avg_price = ledger.avg_price
+        _price = self.price_cur['bid'] if self.units >= 0 else \
+            self.price_cur['ask']
+        _upl = (_price - self.avg_price) * self.units
+        _delta_upl = _upl - self.upl
+        self.upl = _upl
+        return (_delta_balance * self._get_qh_factor(),
+            _delta_upl * self._get_qh_factor())
+
     def _entry_trade(self, exp_price: Decimal, units: Decimal) \
             -> Tuple[Decimal, Decimal]:
         '''Calculates impacts on both balance and upl for 'entry' trade.'''
@@ -98,7 +132,8 @@ class Position():
 
     def _set_up_currency_pairs(self) -> None:
         '''set up quote_home_currency_pair and cursors for tickers of
-        quote_home_currency_pair and pair.
+        quote_home_currency_pair and pair. In case quote_home_currency_pair is
+        not traded, it is derived as a cross rate by the ticker.
         '''
         _quote_currency: str = self.pair[3:]
         if _quote_currency == self.home_currency:
@@ -106,6 +141,8 @@ class Position():
         else:
             self.quote_home_currency_pair = "%s%s" % \
                 (_quote_currency, self.home_currency)
+            if self.quote_home_currency_pair not in self.ticker.prices:
+                self.ticker.add_cross(self.quote_home_currency_pair)
         self.price_cur = self.ticker.prices[self.pair]
         self.price_cur_qh = self.ticker.prices[self.quote_home_currency_pair]
 
@@ -152,7 +189,7 @@ class Position():
     def update_position_price(self) -> Decimal:
         '''Updates position price with the latest ticker, and returns deviation
         of upl quoted in home currency'''
-        _price_side: str
+        _price: Decimal
         _upl: Decimal
         _upl_qh: Decimal
 
@@ -0,0 +1,200 @@
+from decimal import Decimal
+
+from savoia.portfolio.position import Position
+from savoia.types.types import Pair
+
+from logging import getLogger, Logger
+from typing import Dict, Optional, Tuple
+
+
+class RiskManager(object):
+    '''
+    RiskManager validates signals against exposure limits before Portfolio
+    turns them into orders.
+
+    Net exposure of each pair and each currency, and the gross exposure,
+    are held in home currency as running aggregates. They are updated
+    incrementally whenever a position changes upon a fill or is revalued
+    upon a tick, so that a signal is checked in constant time.
+    Trades reducing an exposure are never rejected.
+
+    Units of the orders accepted but not filled yet, as batched, held or in
+    flight, are kept pending by pair and count towards the exposures, so
+    that signals issued together cannot breach the limits in sum. They are
+    released as the orders are filled, rejected, cancelled or expired.
+    '''
+    logger: Logger
+    max_pair_exposure: Optional[Decimal]
+    max_currency_exposure: Dict[str, Decimal]
+    max_leverage: Optional[Decimal]
+    pair_exposure: Dict[Pair, Decimal]
+    currency_exposure: Dict[str, Decimal]
+    gross_exposure: Decimal
+    pending: Dict[str, Tuple[Pair, Decimal, Decimal]]  # Pair, units, value
+    pending_units: Dict[Pair, Decimal]
+    pending_exposure: Dict[Pair, Decimal]
+    accepted: int
+    rejections: Dict[str, int]
+
+    def __init__(self, max_pair_exposure: Optional[Decimal] = None,
+            max_currency_exposure: Optional[Dict[str, Decimal]] = None,
+            max_leverage: Optional[Decimal] = None) -> None:
+        '''
+        Parameters:
+        max_pair_exposure - Limit of absolute net exposure of each pair.
+        max_currency_exposure - Limits of absolute net exposure keyed by
+            currency. Currencies not included are not limited.
+        max_leverage - Limit of gross exposure divided by equity.
+        All the exposures are quoted in home currency.
+        '''
+        self.logger = getLogger(__name__)
+        self.max_pair_exposure = max_pair_exposure
+        self.max_currency_exposure = max_currency_exposure or {}
+        self.max_leverage = max_leverage
+        self.pair_exposure = {}
+        self.currency_exposure = {}
+        self.gross_exposure = Decimal('0')
+        self.pending = {}
+        self.pending_units = {}
+        self.pending_exposure = {}
+        self.accepted = 0
+        self.rejections = {'pair': 0, 'currency': 0, 'leverage': 0}
+
+    @classmethod
+    def _unit_value(cls, position: Position, units: Decimal) -> Decimal:
+        '''Returns value of one unit of the base currency in home currency.'''
+        _price = position.price_cur['bid'] if units >= 0 else \
+            position.price_cur['ask']
+        return _price * position._get_qh_factor()
+
+    def update_position(self, position: Position) -> None:
+        '''Reflects the current units and prices of the position.'''
+        _pair: Pair = position.pair
+        _exposure: Decimal
+        _old: Decimal
+        _delta: Decimal
+
+        _exposure = position.units * self._unit_value(position, position.units)
+        _old = self.pair_exposure.get(_pair, Decimal('0'))
+        _delta = _exposure - _old
+        if _delta == 0:
+            return
+        self.pair_exposure[_pair] = _exposure
+        self.gross_exposure += abs(_exposure) - abs(_old)
+        self.currency_exposure[_pair[:3]] = \
+            self.currency_exposure.get(_pair[:3], Decimal('0')) + _delta
+        self.currency_exposure[_pair[3:]] = \
+            self.currency_exposure.get(_pair[3:], Decimal('0')) - _delta
+
+    def check(self, position: Position, units: Decimal, equity: Decimal) \
+            -> Optional[str]:
+        '''Checks a trade of the units on the position against the limits,
+        and returns the name of the limit breached, or None if acceptable.
+        '''
+        _pair: Pair = position.pair
+        _units: Decimal = position.units + units + \
+            self.pending_units.get(_pair, Decimal('0'))
+        _old: Decimal = self.pair_exposure.get(_pair, Decimal('0')) + \
+            self.pending_exposure.get(_pair, Decimal('0'))
+        _new: Decimal = _units * self._unit_value(position, _units)
+        _delta: Decimal = _new - _old
+        _gross_old: Decimal
+        _gross: Decimal
+        _cur: Decimal
+        _limit: Optional[Decimal]
+
+        if self.max_pair_exposure is not None and \
+                abs(_new) > self.max_pair_exposure and abs(_new) > abs(_old):
+            return 'pair'
+        for _ccy, _sign in ((_pair[:3], 1), (_pair[3:], -1)):
+            _limit = self.max_currency_exposure.get(_ccy)
+            if _limit is None:
+                continue
+            _cur = self.currency_exposure.get(_ccy, Decimal('0')) + \
+                self._pending_currency(_ccy)
+            if abs(_cur + _sign * _delta) > _limit and \
+                    abs(_cur + _sign * _delta) > abs(_cur):
+                return 'currency'
+        _gross_old = self.gross_exposure + self._pending_gross()
+        _gross = _gross_old - abs(_old) + abs(_new)
+        if self.max_leverage is not None and \
+                _gross > self.max_leverage * equity and \
+                _gross > _gross_old:
+            return 'leverage'
+        return None
+
+    def _pending_currency(self, currency: str) -> Decimal:
+        '''Returns net exposure of the currency pending in orders.'''
+        _exposure = Decimal('0')
+        for _pair, _pending in self.pending_exposure.items():
+            if _pair[:3] == currency:
+                _exposure += _pending
+            elif _pair[3:] == currency:
+                _exposure -= _pending
+        return _exposure
+
+    def _pending_gross(self) -> Decimal:
+        '''Returns the gross exposure added by the orders pending.'''
+        _gross = Decimal('0')
+        _filled: Decimal
+        for _pair, _pending in self.pending_exposure.items():
+            _filled = self.pair_exposure.get(_pair, Decimal('0'))
+            _gross += abs(_filled + _pending) - abs(_filled)
+        return _gross
+
+    def validate(self, position: Position, units: Decimal, equity: Decimal,
+            ref: Optional[str] = None) -> bool:
+        '''Checks a trade, counting the result. The units of the trade
+        accepted are kept pending under the ref of its order, if given.'''
+        _reason = self.check(position, units, equity)
+        if _reason is None:
+            self.accepted += 1
+            if ref is not None:
+                self._hold(ref, position.pair,
+                    units, units * self._unit_value(position, units))
+            return True
+        self.rejections[_reason] += 1
+        self.logger.warning(f"Rejected {units} units of {position.pair} " +
+            f"breaching {_reason} limit.")
+        return False
+
+    def _hold(self, ref: str, pair: Pair, units: Decimal,
+            exposure: Decimal) -> None:
+        _held = self.pending.get(ref, (pair, Decimal('0'), Decimal('0')))
+        self.pending[ref] = (pair, _held[1] + units, _held[2] + exposure)
+        self.pending_units[pair] = \
+            self.pending_units.get(pair, Decimal('0')) + units
+        self.pending_exposure[pair] = \
+            self.pending_exposure.get(pair, Decimal('0')) + exposure
+
+    def release(self, ref: str, units: Optional[Decimal] = None) -> None:
+        '''Releases the units filled of the order pending under the ref, or
+        all of them if not given, as the order is over.'''
+        _held = self.pending.get(ref)
+        _pair: Pair
+        _units: Decimal
+        _exposure: Decimal
+        _released: Decimal
+
+        if _held is None:
+            return
+        _pair, _units, _exposure = _held
+        if units is None or abs(units) >= abs(_units):
+            units = _units
+        _released = _exposure * units / _units
+        if units == _units:
+            del self.pending[ref]
+        else:
+            self.pending[ref] = (_pair, _units - units, _exposure - _released)
+        self.pending_units[_pair] -= units
+        self.pending_exposure[_pair] -= _released
+        if self.pending_units[_pair] == 0:
+            del self.pending_units[_pair]
+            del self.pending_exposure[_pair]
+
+    def report(self) -> Dict[str, int]:
+        '''Returns the numbers of signals accepted and rejected by limit.'''
+        _report = dict(self.rejections)
+        _report['accepted'] = self.accepted
+        _report['rejected'] = sum(self.rejections.values())
+        return _report
@@ -1,17 +1,17 @@
 from decimal import Decimal
 from savoia.config.decimal_config import DECIMAL_PLACES
 
-from typing import Tuple
+from typing import Tuple, Union
 
 
 class Trade():
     exp_price: Decimal
     units: Decimal
     trade_type: str
-    order_id: int
+    order_id: Union[int, str]
 
     def __init__(self, exp_price: Decimal, units: Decimal, trade_type: str,
-            order_id: int) -> None:
+            order_id: Union[int, str]) -> None:
         self.exp_price = exp_price
         self.units = units
         self.trade_type = trade_type
@@ -35,6 +35,19 @@ class Trade():
         return (_delta_balance.quantize(DECIMAL_PLACES),
                 _delta_upl.quantize(DECIMAL_PLACES))
 
+    def close_trade(self, exec_price: Decimal, units: Decimal) -> Decimal:
+        '''Closes the units of an 'entry' trade held as a lot, and returns
+        the realized PnL quoted in quote currency of the pair.
+        units are to be of the same sign as self.units.
+        '''
+        if self.trade_type != 'entry':
+            raise Exception('Unexpected trade_type: %s' % self.trade_type)
+        if abs(units) > abs(self.units) or units * self.units < 0:
+            raise Exception('Unable to close %s units out of %s' %
+                (units, self.units))
+        self.units -= units
+        return (exec_price - self.exp_price) * units
+
     def cancel_trade(self) -> Tuple[Decimal, Decimal]:
         '''TODO'''
         pass
@@ -0,0 +1,132 @@
+from decimal import Decimal
+from queue import Queue
+
+import numpy as np
+
+from savoia.config.decimal_config import DECIMAL_PLACES
+from savoia.ticker.ticker import Ticker
+from savoia.event.event import Event, TickEvent, FillEvent
+from savoia.portfolio.portfolio import Portfolio
+from savoia.types.types import Pair
+from savoia.result.result import Result
+from savoia.result.sampling import EquitySampler
+from savoia.portfolio.risk import RiskManager
+
+from typing import Dict, List, Optional
+
+
+class VectorizedPortfolio(Portfolio):
+    """
+    VectorizedPortfolio keeps units, avg_price and upl of all the positions
+    in float64 arrays, and revalues the whole book with a single NumPy
+    operation per tick instead of per-Position Decimal arithmetic.
+
+    Fills are still reflected by the Decimal Position objects, so that the
+    balance is exact, and then copied into the arrays. The upl is therefore
+    approximated with float64 precision only, and copied back into the upl
+    of the positions revalued for the methods of Portfolio.
+    """
+    index: Dict[Pair, int]
+    units: np.ndarray
+    avg_price: np.ndarray
+    bids: np.ndarray
+    asks: np.ndarray
+    qh_factors: np.ndarray
+    upls: np.ndarray
+    upls_qh: np.ndarray
+
+    def __init__(
+        self, ticker: Ticker, event_q: 'Queue[Event]',
+        result_q: 'Queue[Result]', home_currency: str, pairs: List[Pair],
+        equity: Decimal, sampler: Optional[EquitySampler] = None,
+        accounting: str = 'average', risk: Optional[RiskManager] = None,
+        strategy: str = ''
+    ):
+        super().__init__(ticker, event_q, result_q, home_currency, pairs,
+            equity, sampler, accounting, risk, strategy)
+        _n = len(self.pairs)
+        self.index = dict((_pair, _i) for _i, _pair in enumerate(self.pairs))
+        self.units = np.zeros(_n, dtype=np.float64)
+        self.avg_price = np.zeros(_n, dtype=np.float64)
+        self.bids = np.zeros(_n, dtype=np.float64)
+        self.asks = np.zeros(_n, dtype=np.float64)
+        self.qh_factors = np.zeros(_n, dtype=np.float64)
+        self.upls = np.zeros(_n, dtype=np.float64)
+        self.upls_qh = np.zeros(_n, dtype=np.float64)
+        for _pair in self.pairs:
+            self._refresh_prices(_pair)
+
+    def _refresh_prices(self, pair: Pair) -> None:
+        '''Copies the latest prices of the position into the arrays.'''
+        _i = self.index[pair]
+        _position = self.positions[pair]
+        self.bids[_i] = float(_position.price_cur['bid'])
+        self.asks[_i] = float(_position.price_cur['ask'])
+        self.qh_factors[_i] = float(_position._get_qh_factor())
+
+    def revalue(self) -> None:
+        '''Revalues upl of all the positions with the prices in the arrays.'''
+        np.subtract(np.where(self.units >= 0, self.bids, self.asks),
+            self.avg_price, out=self.upls)
+        np.multiply(self.upls, self.units, out=self.upls)
+        np.multiply(self.upls, self.qh_factors, out=self.upls_qh)
+
+    def revalue_batch(self, bids: np.ndarray, asks: np.ndarray,
+            qh_factors: np.ndarray) -> np.ndarray:
+        '''Revalues the current book against a batch of prices at once, and
+        returns the upl of each position quoted in home currency.
+
+        Parameters:
+        bids, asks, qh_factors - Arrays of shape (ticks, pairs), columns
+            ordered as self.pairs.
+        '''
+        return (np.where(self.units >= 0, bids, asks) - self.avg_price) * \
+            self.units * qh_factors
+
+    def update_portfolio(self, event: TickEvent) -> None:
+        """
+        This copies the prices of the positions affected by the tick into
+        the arrays, then revalues the whole book in one operation.
+        """
+        _dependents = self.dependents.get(event.pair, [])
+
+        for _position in _dependents:
+            self._refresh_prices(_position.pair)
+            if self.risk is not None:
+                self.risk.update_position(_position)
+        self.revalue()
+        self._sum_upl([_position.pair for _position in _dependents])
+
+        self._last = event.time
+        if self._force or self.sampler.sample(event, self.equity):
+            self._emit_equity(event.time)
+        else:
+            self._pending = event.time
+
+    def _sum_upl(self, pairs: List[Pair]) -> None:
+        '''Takes upl and equity from the upl revalued in the arrays, and the
+        upl of the positions of pairs, whose prices have changed.'''
+        for _pair in pairs:
+            self._upl[_pair] = Decimal(str(float(
+                self.upls_qh[self.index[_pair]])))
+        self.upl = Decimal(str(float(self.upls_qh.sum()))).quantize(
+            DECIMAL_PLACES)
+        self._update_equity()
+
+    def _reflect_fill(self, event: FillEvent) -> None:
+        '''Reflects the fill to the Decimal position for balance, then
+        copies its units and avg_price into the arrays and revalues them.'''
+        _i = self.index[event.pair]
+        _position = self.positions[event.pair]
+        _delta_balance: Decimal
+
+        # Positions are not revalued upon ticks, bring upl up to date first.
+        _position.update_position_price()
+        _delta_balance, _ = _position.reflect_filled_order(
+            event.units, event.price, event.ref)
+        self.balance += _delta_balance
+        self.units[_i] = float(_position.units)
+        self.avg_price[_i] = float(_position.avg_price)
+        self._refresh_prices(event.pair)
+        self.revalue()
+        self._sum_upl([event.pair])
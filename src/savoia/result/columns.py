@@ -0,0 +1,74 @@
+import numpy as np
+
+from savoia.types.types import Pair
+
+from typing import Dict, List, Tuple
+
+
+Dtypes = List[Tuple[str, str]]
+
+
+def equity_dtypes(pairs: List[Pair]) -> Dtypes:
+    '''Returns the columns of equity results, named as in Equity.csv, with
+    Timestamp in nanoseconds since the epoch.'''
+    return [('Timestamp', 'i8'), ('Equity', 'f8'), ('Balance', 'f8'),
+        ('UPL[Total]', 'f8')] + [(f'UPL[{_pair}]', 'f8') for _pair in pairs]
+
+
+def execution_dtypes() -> Dtypes:
+    '''Returns the columns of execution results, named as in Execution.csv,
+    with Timestamp in nanoseconds since the epoch.'''
+    return [('Timestamp', 'i8'), ('Pair', 'U6'), ('Units', 'f8'),
+        ('Price', 'f8')]
+
+
+class ColumnBuffer(object):
+    """
+    ColumnBuffer holds rows in a preallocated array per column, so that
+    appending a row only assigns each value into place. The buffer is either
+    emptied once full, or grown by doubling the capacity, which keeps
+    appends amortized O(1).
+    """
+    dtypes: Dtypes
+    columns: Dict[str, np.ndarray]
+    capacity: int
+    size: int
+
+    def __init__(self, dtypes: Dtypes, capacity: int = 1024) -> None:
+        self.dtypes = dtypes
+        self.capacity = capacity
+        self.columns = dict((_name, np.empty(capacity, dtype=_dtype))
+            for _name, _dtype in dtypes)
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def full(self) -> bool:
+        return self.size == self.capacity
+
+    def append(self, row: Tuple[object, ...]) -> None:
+        '''Appends the row of values in the order of the columns. Doubles the
+        capacity if full.'''
+        if self.size == self.capacity:
+            self.grow(self.capacity * 2)
+        for (_name, _), _value in zip(self.dtypes, row):
+            self.columns[_name][self.size] = _value
+        self.size += 1
+
+    def grow(self, capacity: int) -> None:
+        _columns: Dict[str, np.ndarray] = {}
+        for _name, _dtype in self.dtypes:
+            _columns[_name] = np.empty(capacity, dtype=_dtype)
+            _columns[_name][:self.size] = self.columns[_name][:self.size]
+        self.columns = _columns
+        self.capacity = capacity
+
+    def view(self) -> Dict[str, np.ndarray]:
+        '''Returns views of the rows appended, by column.'''
+        return dict((_name, _column[:self.size])
+            for _name, _column in self.columns.items())
+
+    def clear(self) -> None:
+        self.size = 0
@@ -1,18 +1,37 @@
 from abc import ABCMeta, abstractmethod
 from logging import Logger, getLogger
+import numpy as np
 import pandas as pd
+import glob
+import json
+import multiprocessing as mp
 import os
-from queue import Queue, Empty
+import sqlite3
+import uuid
+from queue import Queue, Empty, Full
 from decimal import Decimal
+from inspect import signature
 
-from typing import List, TextIO, Dict
+from typing import Any, List, Optional, TextIO, Dict, Tuple, \
+    TYPE_CHECKING, cast
 
+from savoia.result.columns import ColumnBuffer, equity_dtypes, \
+    execution_dtypes
+from savoia.result.ring import RecordRing
 from savoia.types.types import Pair
 
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet output is optional
+    pa = None
+    pq = None
+
 
 class Result(metaclass=ABCMeta):
     type: str
     time: pd.Timestamp
+    strategy: str  # Name of the strategy, empty if running only one
 
 
 class EquityResult(Result):
@@ -24,12 +43,14 @@ class EquityResult(Result):
             time: pd.Timestamp,
             equity: Decimal,
             balance: Decimal,
-            upl: Dict[str, Decimal]):
+            upl: Dict[str, Decimal],
+            strategy: str = ''):
         self.type = 'EquityResult'
         self.time = time
         self.equity = equity
         self.balance = balance
         self.upl = upl
+        self.strategy = strategy
 
 
 class ExecutionResult(Result):
@@ -41,17 +62,20 @@ class ExecutionResult(Result):
             time: pd.Timestamp,
             pair: Pair,
             units: Decimal,
-            price: Decimal):
+            price: Decimal,
+            strategy: str = ''):
         self.type = 'ExecutionResult'
         self.time = time
         self.pair = pair
         self.units = units
         self.price = price
+        self.strategy = strategy
 
 
 class ResultHandler(metaclass=ABCMeta):
     logger: Logger
     pairs: List[Pair]
+    result_q: 'Queue[Result]'
 
     @abstractmethod
     def __init__(self, pairs: List[Pair], result_q: 'Queue[Result]'):
@@ -66,21 +90,57 @@ class ResultHandler(metaclass=ABCMeta):
     def _write_ExecutionResult(self, result: ExecutionResult) -> None:
         pass
 
-    @abstractmethod
-    def run(self) -> None:
+    def _close(self) -> None:
         pass
 
+    def run(self) -> None:
+        _name = self.__class__.__name__
+        self.logger.info(f'{_name} has started running...')
+        while True:
+            try:
+                _result = self.result_q.get(block=True, timeout=5)
+            except Empty:
+                pass
+            else:
+                if _result is None:
+                    # Close worker
+                    break
+                elif isinstance(_result, EquityResult):
+                    try:
+                        self._write_EquityResult(_result)
+                    except Exception as e:
+                        self.logger.error(
+                            f'{e} - Unable to write EquityResult: {_result}'
+                        )
+                elif isinstance(_result, ExecutionResult):
+                    try:
+                        self._write_ExecutionResult(_result)
+                    except Exception as e:
+                        self.logger.error(
+                            f'{e} - Unable to write ExecutionResult: {_result}'
+                        )
+                else:
+                    self.logger.error(
+                        f'Unexpected Result has been detected: {_result}'
+                    )
+        self._close()
+        self.logger.info(f'{_name} has completed...')
+
 
 class FileResultHandler(ResultHandler):
     '''
     FileResultHandler is to output results to files.
+    Results of each strategy running in the same engine are output to
+    files suffixed with the name of the strategy, e.g. 'Equity_MACS.csv',
+    created upon its first result. Those of an unnamed strategy are output
+    to 'Equity.csv' and 'Execution.csv', which are created at the end with
+    the headers only if no result has been output at all.
     '''
     pairs: List[Pair]
     output_dir: str
     equity_file: str
-    equity_writer: TextIO
     execution_file: str
-    execution_writer: TextIO
+    writers: Dict[str, Tuple[TextIO, TextIO]]
 
     def __init__(self, pairs: List[Pair], result_q: 'Queue[Result]',
             output_dir: str):
@@ -89,11 +149,21 @@ class FileResultHandler(ResultHandler):
         self.result_q = result_q
         self.output_dir = output_dir
         self.equity_file = 'Equity.csv'
-        self.equity_writer = self._create_equity_writer(self.equity_file)
         self.execution_file = 'Execution.csv'
-        self.execution_writer = self._create_execution_writer(
-            self.execution_file
-        )
+        self.writers = {}
+
+    def _get_writers(self, strategy: str) -> Tuple[TextIO, TextIO]:
+        '''Returns the equity and execution writers of the strategy, creating
+        them upon its first result.'''
+        _suffix = f'_{strategy}' if strategy else ''
+        if strategy not in self.writers:
+            self.writers[strategy] = (
+                self._create_equity_writer(
+                    self.equity_file.replace('.csv', f'{_suffix}.csv')),
+                self._create_execution_writer(
+                    self.execution_file.replace('.csv', f'{_suffix}.csv'))
+            )
+        return self.writers[strategy]
 
     def _create_equity_writer(self, filename: str) -> TextIO:
         _out_file = open(os.path.join(self.output_dir, filename), 'w')
@@ -118,44 +188,481 @@ class FileResultHandler(ResultHandler):
         for pair in self.pairs:
             _line += f',{result.upl[pair]}'
         _line += '\n'
-        self.equity_writer.write(_line)
+        self._get_writers(result.strategy)[0].write(_line)
     
     def _write_ExecutionResult(self, result: ExecutionResult) -> None:
         _line = f'{result.time},{result.pair},{result.units},{result.price}\n'
-        self.execution_writer.write(_line)
+        self._get_writers(result.strategy)[1].write(_line)
     
     def _close(self) -> None:
-        self.execution_writer.close()
-        self.equity_writer.close()
+        if not self.writers:
+            self._get_writers('')
+        for _equity_writer, _execution_writer in self.writers.values():
+            _execution_writer.close()
+            _equity_writer.close()
+
+
+class BufferedResultHandler(ResultHandler):
+    '''
+    BufferedResultHandler appends the results of each kind, 'Equity' or
+    'Execution', and strategy to a ColumnBuffer, with the columns named as
+    in the files of FileResultHandler.
+    '''
+    buffers: Dict[Tuple[str, str], ColumnBuffer]
+    capacity: int
+
+    def _get_buffer(self, kind: str, strategy: str) -> ColumnBuffer:
+        _key = (kind, strategy)
+        if _key not in self.buffers:
+            self.buffers[_key] = ColumnBuffer(equity_dtypes(self.pairs)
+                if kind == 'Equity' else execution_dtypes(), self.capacity)
+        return self.buffers[_key]
+
+    def _write_EquityResult(self, result: EquityResult) -> None:
+        self._get_buffer('Equity', result.strategy).append((
+            result.time.value, float(result.equity), float(result.balance),
+            float(result.upl['total'])) +
+            tuple(float(result.upl[_pair]) for _pair in self.pairs))
+
+    def _write_ExecutionResult(self, result: ExecutionResult) -> None:
+        self._get_buffer('Execution', result.strategy).append((
+            result.time.value, result.pair, float(result.units),
+            float(result.price)))
+
+
+class InMemoryResultHandler(BufferedResultHandler):
+    '''
+    InMemoryResultHandler is to keep results in memory, without files.
+    Results of each strategy are appended to arrays by column growing by
+    doubling, and returned by equity() and execution() as DataFrames in the
+    form of VectorizedBacktest.run(), or by arrays() as they are.
+    '''
+    def __init__(self, pairs: List[Pair], result_q: 'Queue[Result]',
+            capacity: int = 1024):
+        self.logger = getLogger(__name__)
+        self.pairs = pairs
+        self.result_q = result_q
+        self.capacity = capacity
+        self.buffers = {}
+
+    def arrays(self, kind: str = 'Equity', strategy: str = '') \
+            -> Dict[str, np.ndarray]:
+        '''Returns the results of kind, 'Equity' or 'Execution', by column
+        with Timestamp in nanoseconds since the epoch.'''
+        return self._get_buffer(kind, strategy).view()
+
+    def equity(self, strategy: str = '') -> pd.DataFrame:
+        _columns = self.arrays('Equity', strategy)
+        _time = _columns.pop('Timestamp')
+        return pd.DataFrame(_columns,
+            index=pd.Index(pd.to_datetime(_time), name='Timestamp'))
+
+    def execution(self, strategy: str = '') -> pd.DataFrame:
+        _columns = self.arrays('Execution', strategy)
+        _columns['Timestamp'] = pd.to_datetime(_columns['Timestamp'])
+        return pd.DataFrame(_columns)
+
+
+class ColumnarResultHandler(BufferedResultHandler):
+    '''
+    ColumnarResultHandler is to output results to files in bulk.
+    Results are buffered into preallocated arrays by column, and each chunk
+    of chunk_size rows is output at once, in one of the formats:
+
+    npz - A file of arrays per chunk, e.g. 'Equity.00000.npz'.
+    parquet - A row group per chunk in e.g. 'Equity.parquet'.
+    csv - Rows appended to e.g. 'Equity.csv', formatted by pandas.
+
+    The format defaults to parquet if pyarrow is available, or npz
+    otherwise. Timestamps are output as nanoseconds since the epoch if
+    epoch, and values as float64 instead of Decimal. Files are named as
+    FileResultHandler does, and read by load().
+    '''
+    FORMATS = ('npz', 'parquet', 'csv')
+
+    output_dir: str
+    format: str
+    epoch: bool
+    chunks: Dict[Tuple[str, str], int]
+    writers: Dict[Tuple[str, str], Any]
+
+    def __init__(self, pairs: List[Pair], result_q: 'Queue[Result]',
+            output_dir: str, format: Optional[str] = None,
+            chunk_size: int = 2 ** 16, epoch: bool = True):
+        self.logger = getLogger(__name__)
+        self.pairs = pairs
+        self.result_q = result_q
+        self.output_dir = output_dir
+        if not os.path.isdir(output_dir):
+            raise Exception(f"No such directory: {output_dir}")
+        if format is None:
+            format = 'npz' if pq is None else 'parquet'
+        if format not in self.FORMATS:
+            raise Exception(f"Unexpected format: {format}, " +
+                f"expected one of {self.FORMATS}.")
+        if format == 'parquet' and pq is None:
+            raise Exception("pyarrow is required for format: parquet")
+        self.format = format
+        self.capacity = chunk_size
+        self.epoch = epoch
+        self.buffers = {}
+        self.chunks = {}
+        self.writers = {}
+
+    @classmethod
+    def _name(cls, kind: str, strategy: str) -> str:
+        return f'{kind}_{strategy}' if strategy else kind
+
+    def _get_buffer(self, kind: str, strategy: str) -> ColumnBuffer:
+        self.chunks.setdefault((kind, strategy), 0)
+        return super()._get_buffer(kind, strategy)
+
+    def _write_EquityResult(self, result: EquityResult) -> None:
+        super()._write_EquityResult(result)
+        if self.buffers[('Equity', result.strategy)].full:
+            self._flush('Equity', result.strategy)
+
+    def _write_ExecutionResult(self, result: ExecutionResult) -> None:
+        super()._write_ExecutionResult(result)
+        if self.buffers[('Execution', result.strategy)].full:
+            self._flush('Execution', result.strategy)
+
+    def _flush(self, kind: str, strategy: str) -> None:
+        '''Outputs the rows buffered at once, and empties the buffer.'''
+        _columns: Dict[str, Any]
+
+        _key = (kind, strategy)
+        _buffer = self.buffers[_key]
+        # Any, as savez takes the keywords for arrays or its own options.
+        _columns = cast(Dict[str, Any], _buffer.view())
+        _path = os.path.join(self.output_dir, self._name(kind, strategy))
+
+        if not self.epoch:
+            _columns['Timestamp'] = _columns['Timestamp'].view(
+                'datetime64[ns]')
+        if self.format == 'npz':
+            np.savez(f'{_path}.{self.chunks[_key]:05d}.npz', **_columns)
+        elif self.format == 'parquet':
+            _table = pa.table(_columns)
+            if _key not in self.writers:
+                self.writers[_key] = pq.ParquetWriter(f'{_path}.parquet',
+                    _table.schema)
+            self.writers[_key].write_table(_table)
+        else:
+            if _key not in self.writers:
+                self.writers[_key] = open(f'{_path}.csv', 'w')
+            pd.DataFrame(_columns).to_csv(self.writers[_key], index=False,
+                header=self.chunks[_key] == 0)
+        self.chunks[_key] += 1
+        _buffer.clear()
+
+    def _close(self) -> None:
+        for _kind, _strategy in self.buffers:
+            if len(self.buffers[(_kind, _strategy)]) or \
+                    self.chunks[(_kind, _strategy)] == 0:
+                self._flush(_kind, _strategy)
+        for _writer in self.writers.values():
+            _writer.close()
+
+    @classmethod
+    def load(cls, output_dir: str, name: str = 'Equity') -> pd.DataFrame:
+        '''Reads the results output to the files of the name, e.g.
+        'Equity_MACS', in any of the formats.'''
+        _path = os.path.join(output_dir, name)
+        _chunks: List[pd.DataFrame]
+        if os.path.exists(f'{_path}.parquet'):
+            return pq.read_table(f'{_path}.parquet').to_pandas()
+        if os.path.exists(f'{_path}.csv'):
+            return pd.read_csv(f'{_path}.csv')
+        _chunks = []
+        for _file in sorted(glob.glob(f'{glob.escape(_path)}.*.npz')):
+            with np.load(_file) as _npz:
+                _chunks.append(pd.DataFrame(dict(_npz.items())))
+        if not _chunks:
+            raise Exception(f"No results found: {_path}")
+        return pd.concat(_chunks, ignore_index=True)
+
+
+class SQLiteResultHandler(ResultHandler):
+    '''
+    SQLiteResultHandler is to store results of runs into a SQLite database,
+    so that results of many runs are compared with SQL.
+    Each run is recorded into table runs with run_id and its parameters as
+    JSON, and its results into tables equity and execution tagged with the
+    run_id and the name of the strategy. Time is in nanoseconds since the
+    epoch, and UPL of each pair in column upl as JSON. Rows are inserted
+    in batches of batch_size, each in a transaction, with the database in
+    WAL mode so that it can be read while written.
+    '''
+    SCHEMA = (
+        '''CREATE TABLE IF NOT EXISTS runs (run_id TEXT PRIMARY KEY,
+            created TEXT, pairs TEXT, parameters TEXT)''',
+        '''CREATE TABLE IF NOT EXISTS equity (run_id TEXT, strategy TEXT,
+            time INTEGER, equity REAL, balance REAL, upl_total REAL,
+            upl TEXT)''',
+        '''CREATE TABLE IF NOT EXISTS execution (run_id TEXT, strategy TEXT,
+            time INTEGER, pair TEXT, units REAL, price REAL)''',
+        '''CREATE INDEX IF NOT EXISTS equity_run_time
+            ON equity (run_id, time)''',
+        '''CREATE INDEX IF NOT EXISTS execution_run_time
+            ON execution (run_id, time)''',
+    )
+
+    database: str
+    run_id: str
+    batch_size: int
+    conn: sqlite3.Connection
+    equity_rows: List[Tuple[Any, ...]]
+    execution_rows: List[Tuple[Any, ...]]
+
+    def __init__(self, pairs: List[Pair], result_q: 'Queue[Result]',
+            database: str, run_id: Optional[str] = None,
+            parameters: Optional[Dict[str, Any]] = None,
+            batch_size: int = 10000):
+        '''
+        Parameters:
+        database - Path to the database, created if not existing.
+        run_id - Unique id of the run, generated if None.
+        parameters - Parameters of the run, given by the engine if None.
+        '''
+        self.logger = getLogger(__name__)
+        self.pairs = pairs
+        self.result_q = result_q
+        self.database = database
+        self.run_id = uuid.uuid4().hex if run_id is None else run_id
+        self.batch_size = batch_size
+        self.equity_rows = []
+        self.execution_rows = []
+        # The connection is made here and used by the thread running.
+        self.conn = sqlite3.connect(database, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        with self.conn:
+            for _statement in self.SCHEMA:
+                self.conn.execute(_statement)
+            self.conn.execute('INSERT INTO runs VALUES (?, ?, ?, ?)', (
+                self.run_id, pd.Timestamp.now().isoformat(),
+                json.dumps(pairs), json.dumps(parameters, default=str)))
+
+    def _write_EquityResult(self, result: EquityResult) -> None:
+        self.equity_rows.append((self.run_id, result.strategy,
+            result.time.value, float(result.equity), float(result.balance),
+            float(result.upl['total']), json.dumps(dict(
+                (_pair, float(result.upl[_pair])) for _pair in self.pairs))))
+        if len(self.equity_rows) >= self.batch_size:
+            self._flush()
+
+    def _write_ExecutionResult(self, result: ExecutionResult) -> None:
+        self.execution_rows.append((self.run_id, result.strategy,
+            result.time.value, result.pair, float(result.units),
+            float(result.price)))
+        if len(self.execution_rows) >= self.batch_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        '''Inserts the rows buffered in a transaction.'''
+        with self.conn:
+            self.conn.executemany(
+                'INSERT INTO equity VALUES (?, ?, ?, ?, ?, ?, ?)',
+                self.equity_rows)
+            self.conn.executemany(
+                'INSERT INTO execution VALUES (?, ?, ?, ?, ?, ?)',
+                self.execution_rows)
+        self.equity_rows = []
+        self.execution_rows = []
+
+    def _close(self) -> None:
+        self._flush()
+        self.conn.close()
+
+
+def record_dtype(pairs: List[Pair], strategy_length: int = 32) -> np.dtype:
+    '''Returns the fixed-width record of results passed through shared
+    memory. Kind is 1 for EquityResult, with Values of equity, balance,
+    UPL[Total] and UPL of each pair, 2 for ExecutionResult, with Values of
+    units and price, and 0 for the end of results.'''
+    return np.dtype([('Kind', 'i1'), ('Strategy', f'U{strategy_length}'),
+        ('Timestamp', 'i8'), ('Pair', 'U6'),
+        ('Values', 'f8', (3 + len(pairs),))])
+
+
+if TYPE_CHECKING:
+    _ResultQueue = Queue[Result]
+else:  # Queue is not subscriptable at runtime before Python 3.9
+    _ResultQueue = Queue
+
+
+class SharedResultQueue(_ResultQueue):
+    '''
+    SharedResultQueue is put results in place of the result queue when
+    results are written out of process. Each result is put as a record into
+    a RecordRing, and got back as a result in the writing process, with the
+    values converted from float.
+    Results are put by policy when the ring is full: 'block' waits for the
+    writer, while 'drop' drops EquityResults, counted in dropped, and only
+    waits for ExecutionResults and the end of results.
+    '''
+    POLICIES = ('block', 'drop')
+
+    pairs: List[Pair]
+    ring: RecordRing
+    policy: str
+    dropped: int
+    writer: Optional[Any]  # Process getting the results, if known
+    _values: int
+    _length: int
+
+    def __init__(self, pairs: List[Pair], ring: RecordRing,
+            policy: str = 'block') -> None:
+        super().__init__()
+        if policy not in self.POLICIES:
+            raise Exception(f'Unknown backpressure policy: {policy}')
+        self.pairs = pairs
+        self.ring = ring
+        self.policy = policy
+        self.dropped = 0
+        self.writer = None
+        self._values = 3 + len(pairs)
+        self._length = ring.dtype['Strategy'].itemsize // 4
+
+    def _record(self, item: Optional[Result]) -> Tuple[Any, ...]:
+        _values = [0.0] * self._values
+        if item is None:
+            return (0, '', 0, '', _values)
+        if len(item.strategy) > self._length:
+            raise Exception(f'Name of strategy too long: {item.strategy}')
+        if isinstance(item, EquityResult):
+            _values[:3] = [float(item.equity), float(item.balance),
+                float(item.upl['total'])]
+            _values[3:] = [float(item.upl[_pair]) for _pair in self.pairs]
+            return (1, item.strategy, item.time.value, '', _values)
+        if isinstance(item, ExecutionResult):
+            _values[:2] = [float(item.units), float(item.price)]
+            return (2, item.strategy, item.time.value, item.pair, _values)
+        raise Exception(f'Unexpected Result has been detected: {item}')
+
+    def put(self, item: Optional[Result], block: bool = True,
+            timeout: Optional[float] = None) -> None:
+        _record = self._record(item)
+
+        if self.policy == 'drop' and isinstance(item, EquityResult):
+            if not self.ring.put(_record, False):
+                self.dropped += 1
+            return
+        if not block or timeout is not None:
+            if not self.ring.put(_record, block, timeout):
+                raise Full
+            return
+        # Waits for the writer as long as it is alive.
+        while not self.ring.put(_record, True, 1):
+            if self.writer is not None and not self.writer.is_alive():
+                raise Exception('Result writer has exited')
+
+    @classmethod
+    def _decimal(cls, value: float) -> Decimal:
+        '''Returns the float as Decimal, integral ones without a fraction as
+        put from Decimal.'''
+        if value.is_integer():
+            return Decimal(int(value))
+        return Decimal(str(value))
+
+    # None ends the results, as put by the engine into any result queue.
+    def get(self, block: bool = True,  # type: ignore[override]
+            timeout: Optional[float] = None) -> Optional[Result]:
+        _record = self.ring.get(block, timeout)
+        _kind: int
+        _values: List[Decimal]
+
+        if _record is None:
+            raise Empty
+        _kind = _record[0]
+        if _kind == 0:
+            return None
+        _values = [self._decimal(float(_v)) for _v in _record[4]]
+        if _kind == 1:
+            return EquityResult(pd.Timestamp(_record[2]), _values[0],
+                _values[1], dict([('total', _values[2])] +
+                    list(zip(self.pairs, _values[3:]))), _record[1])
+        return ExecutionResult(pd.Timestamp(_record[2]), _record[3],
+            _values[0], _values[1], _record[1])
+
+
+def _write_results(pairs: List[Pair], ring: RecordRing, handler: str,
+        params: Dict[str, Any]) -> None:
+    '''Runs the result handler of the name in the writing process.'''
+    _result_q = SharedResultQueue(pairs, ring)
+    try:
+        globals()[handler](pairs=pairs, result_q=_result_q, **params).run()
+    finally:
+        ring.close()
+
+
+class SharedMemoryResultHandler(ResultHandler):
+    '''
+    SharedMemoryResultHandler is to write results in a process of its own,
+    so that formatting and writing them does not hold the GIL against the
+    engine. Results put by the engine are copied as fixed-width records
+    into a ring buffer of slots records in shared memory, which the result
+    handler of name handler, e.g. 'FileResultHandler', gets them from in
+    the writing process, constructed with params. Results put while the
+    ring is full are handled by policy, as SharedResultQueue.
+    Results written in memory, as by InMemoryResultHandler, stay in the
+    writing process.
+    '''
+    handler: str
+    params: Dict[str, Any]
+    ring: RecordRing
+    result_q: SharedResultQueue
+    _context: Any
+
+    def __init__(self, pairs: List[Pair], result_q: 'Queue[Result]',
+            handler: str = 'FileResultHandler',
+            params: Optional[Dict[str, Any]] = None,
+            parameters: Optional[Dict[str, Any]] = None,
+            slots: int = 4096, policy: str = 'block',
+            strategy_length: int = 32, start_method: Optional[str] = None):
+        '''
+        Parameters:
+        result_q - Replaced with the SharedResultQueue to put results on.
+        parameters - Given to the handler if it records them.
+        start_method - Of the writing process, the default of the platform
+            if None. 'spawn' requires the main module to be importable.
+        '''
+        self.logger = getLogger(__name__)
+        self.pairs = pairs
+        if handler not in globals() or \
+                not issubclass(globals()[handler], ResultHandler):
+            raise Exception(f'Unknown result handler: {handler}')
+        self.handler = handler
+        self.params = dict(params or {})
+        if 'parameters' in signature(globals()[handler]).parameters:
+            self.params.setdefault('parameters', parameters)
+        self._context = mp.get_context(start_method)
+        self.ring = RecordRing(record_dtype(pairs, strategy_length), slots,
+            self._context)
+        self.result_q = SharedResultQueue(pairs, self.ring, policy)
+
+    def _write_EquityResult(self, result: EquityResult) -> None:
+        self.result_q.put(result)
+
+    def _write_ExecutionResult(self, result: ExecutionResult) -> None:
+        self.result_q.put(result)
 
     def run(self) -> None:
-        self.logger.info('FileResultHandler has started running...')
-        while True:
-            try:
-                _result = self.result_q.get(block=True, timeout=5)
-            except Empty:
-                pass
-            else:
-                if _result is None:
-                    # Close worker
-                    break
-                elif isinstance(_result, EquityResult):
-                    try:
-                        self._write_EquityResult(_result)
-                    except Exception as e:
-                        self.logger.error(
-                            f'{e} - Unable to write EquityResult: {_result}'
-                        )
-                elif isinstance(_result, ExecutionResult):
-                    try:
-                        self._write_ExecutionResult(_result)
-                    except Exception as e:
-                        self.logger.error(
-                            f'{e} - Unable to write ExecutionResult: {_result}'
-                        )
-                else:
-                    self.logger.error(
-                        f'Unexpected Result has been detected: {_result}'
-                    )
-        self._close()
-        self.logger.info('FileResultHandler has completed...')
+        _name = self.__class__.__name__
+        _writer = self._context.Process(target=_write_results,
+            args=(self.pairs, self.ring, self.handler, self.params),
+            daemon=True)
+
+        self.logger.info(f'{_name} has started running...')
+        _writer.start()
+        self.result_q.writer = _writer
+        _writer.join()
+        if _writer.exitcode != 0:
+            self.logger.error(
+                f'Result writer has exited with code {_writer.exitcode}')
+        if self.result_q.dropped > 0:
+            self.logger.warning(
+                f'{self.result_q.dropped} EquityResults have been dropped')
+        self.ring.close()
+        self.logger.info(f'{_name} has completed...')
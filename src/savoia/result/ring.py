@@ -0,0 +1,99 @@
+import multiprocessing as mp
+import numpy as np
+import os
+
+from typing import Any, Optional, Tuple
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # Python 3.7 has no shared memory
+    shared_memory = None  # type: ignore
+
+
+class RecordRing(object):
+    """
+    RecordRing is a ring buffer of fixed-width records, i.e. of a numpy
+    structured dtype, in shared memory, for one process to put records and
+    another to get them without pickling.
+
+    Putting a record is an assignment into the slot next to the last, and
+    getting one a copy out of the slot next to the first. Semaphores count
+    the slots free and filled, so that put() waits while the ring is full and
+    get() while it is empty. Only one process may put, and one get.
+    """
+    dtype: np.dtype
+    slots: int
+    name: str
+    records: np.ndarray
+    _shm: Any
+    _free: Any  # multiprocessing Semaphore
+    _filled: Any
+    _head: int  # Slot to get next, local to the process
+    _tail: int  # Slot to put next, local to the process
+    _pid: int  # Process which created the ring
+
+    def __init__(self, dtype: np.dtype, slots: int,
+            context: Optional[Any] = None) -> None:
+        '''Creates the ring in shared memory. context is the multiprocessing
+        context the getting process is started by.'''
+        if shared_memory is None:
+            raise Exception('RecordRing requires Python 3.8 or later')
+        _context = context or mp.get_context()
+        self.dtype = dtype
+        self.slots = slots
+        self._shm = shared_memory.SharedMemory(create=True,
+            size=max(dtype.itemsize * slots, 1))
+        self.name = self._shm.name
+        self.records = np.ndarray(slots, dtype=dtype, buffer=self._shm.buf)
+        self._free = _context.Semaphore(slots)
+        self._filled = _context.Semaphore(0)
+        self._head = 0
+        self._tail = 0
+        self._pid = os.getpid()
+
+    def __getstate__(self) -> Tuple[np.dtype, int, str, Any, Any, int]:
+        return self.dtype, self.slots, self.name, self._free, \
+            self._filled, self._pid
+
+    def __setstate__(self,
+            state: Tuple[np.dtype, int, str, Any, Any, int]) -> None:
+        '''Attaches to the ring of the creating process, when spawned.'''
+        self.dtype, self.slots, self.name, self._free, self._filled, \
+            self._pid = state
+        self._shm = shared_memory.SharedMemory(name=self.name)
+        self.records = np.ndarray(self.slots, dtype=self.dtype,
+            buffer=self._shm.buf)
+        self._head = 0
+        self._tail = 0
+
+    def put(self, record: Tuple[Any, ...], block: bool = True,
+            timeout: Optional[float] = None) -> bool:
+        '''Puts the record, waiting up to timeout seconds for a free slot if
+        block. Returns False if no slot was free.'''
+        if not self._free.acquire(block, timeout):
+            return False
+        self.records[self._tail] = record
+        self._tail = (self._tail + 1) % self.slots
+        self._filled.release()
+        return True
+
+    def get(self, block: bool = True, timeout: Optional[float] = None) \
+            -> Optional[Tuple[Any, ...]]:
+        '''Gets the first record as a tuple, waiting up to timeout seconds
+        for one if block. Returns None if no record was put.'''
+        _record: Tuple[Any, ...]
+
+        if not self._filled.acquire(block, timeout):
+            return None
+        # Copied out, as the items of subarrays are views into the slot.
+        _record = self.records[self._head:self._head + 1].copy()[0].item()
+        self._head = (self._head + 1) % self.slots
+        self._free.release()
+        return _record
+
+    def close(self) -> None:
+        '''Detaches from the ring, and frees it if created here.'''
+        del self.records
+        self._shm.close()
+        if os.getpid() == self._pid:
+            self._shm.unlink()
@@ -0,0 +1,118 @@
+from abc import ABCMeta, abstractmethod
+from decimal import Decimal
+import pandas as pd
+from time import monotonic
+
+from typing import Optional, Union
+
+from savoia.event.event import TickEvent
+
+
+class EquitySampler(metaclass=ABCMeta):
+    '''
+    EquitySampler decides on which ticks Portfolio emits an EquityResult.
+
+    Regardless of the sampler, Portfolio always emits the snapshots right
+    before and after each fill and the final one, so that the equity curve
+    keeps its shape around executions.
+    '''
+    @abstractmethod
+    def sample(self, event: TickEvent, equity: Decimal) -> bool:
+        '''Returns True if the snapshot upon the tick is to be emitted.'''
+        pass
+
+    def emitted(self, time: pd.Timestamp, equity: Decimal) -> None:
+        '''Notified of every snapshot emitted, including forced ones.'''
+        pass
+
+
+class EveryTickSampler(EquitySampler):
+    '''Emits a snapshot upon every tick.'''
+    def __init__(self) -> None:
+        pass
+
+    def sample(self, event: TickEvent, equity: Decimal) -> bool:
+        return True
+
+
+class EveryNTicksSampler(EquitySampler):
+    '''Emits a snapshot once every n ticks.'''
+    n: int
+    ticks: int
+
+    def __init__(self, n: int) -> None:
+        self.n = int(n)
+        if self.n <= 0:
+            raise Exception(f"Invalid n: {n}, expected a positive integer.")
+        self.ticks = 0
+
+    def sample(self, event: TickEvent, equity: Decimal) -> bool:
+        self.ticks += 1
+        return self.ticks >= self.n
+
+    def emitted(self, time: pd.Timestamp, equity: Decimal) -> None:
+        self.ticks = 0
+
+
+class IntervalSampler(EquitySampler):
+    '''Emits a snapshot when the interval has passed since the last one.
+    The interval is measured either in market time, i.e. time of ticks, or
+    in wall-clock time.
+    '''
+    clock: str
+    interval: pd.Timedelta
+    _next: Optional[pd.Timestamp]
+    _next_wall: float
+
+    def __init__(self, interval: Union[str, int, float, Decimal],
+            clock: str = 'market') -> None:
+        '''
+        Parameters:
+        interval - Seconds, or a string accepted by pd.Timedelta, e.g. '1min'.
+        clock - Either 'market' or 'wall'.
+        '''
+        if clock not in ('market', 'wall'):
+            raise Exception(f"Unexpected clock: {clock}, " +
+                "expected 'market' or 'wall'.")
+        self.clock = clock
+        if isinstance(interval, str):
+            self.interval = pd.Timedelta(interval)
+        else:
+            self.interval = pd.Timedelta(seconds=float(interval))
+        self._next = None
+        self._next_wall = 0.0
+
+    def sample(self, event: TickEvent, equity: Decimal) -> bool:
+        if self.clock == 'wall':
+            return monotonic() >= self._next_wall
+        return self._next is None or event.time >= self._next
+
+    def emitted(self, time: pd.Timestamp, equity: Decimal) -> None:
+        if self.clock == 'wall':
+            self._next_wall = monotonic() + self.interval.total_seconds()
+        else:
+            self._next = time + self.interval
+
+
+class OnChangeSampler(EquitySampler):
+    '''Emits a snapshot only when the equity differs from the last one.'''
+    last_equity: Optional[Decimal]
+
+    def __init__(self) -> None:
+        self.last_equity = None
+
+    def sample(self, event: TickEvent, equity: Decimal) -> bool:
+        return equity != self.last_equity
+
+    def emitted(self, time: pd.Timestamp, equity: Decimal) -> None:
+        self.last_equity = equity
+
+
+class OnFillSampler(EquitySampler):
+    '''Emits only the snapshots which Portfolio always emits, i.e. the ones
+    around fills and the final one.'''
+    def __init__(self) -> None:
+        pass
+
+    def sample(self, event: TickEvent, equity: Decimal) -> bool:
+        return False
@@ -1,10 +1,12 @@
-import copy
-
 from savoia.event.event import SignalEvent, TickEvent, Event
-from savoia.types.types import Pair
+from savoia.types.types import Pair, TickColumns
+from savoia.indicator.indicator import Indicator, SMA
+from savoia.indicator.registry import IndicatorRegistry
+
 
+import numpy as np
 
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple, Union
 from typing_extensions import TypedDict
 from queue import Queue
 from decimal import Decimal
@@ -12,12 +14,154 @@ from abc import ABCMeta, abstractmethod
 
 
 class Strategy(metaclass=ABCMeta):
+    """
+    Strategy is an abstract base class providing an interface for all the
+    strategies.
+
+    The engine only dispatches ticks of the pairs returned by
+    subscriptions() to calculate_signals(), which defaults to all the pairs
+    the strategy is given. With a warm-up configured, warm_up() is given
+    the ticks before the start beforehand. stop() is called at the end.
+    """
+    pairs: List[Pair]
+
     @abstractmethod
     def calculate_signals(self, event: TickEvent) -> None:
         pass
 
+    def subscriptions(self) -> List[Pair]:
+        '''Returns the pairs whose ticks the strategy receives.'''
+        return self.pairs
+
+    def warm_up(self, columns: Dict[Pair, TickColumns]) -> None:
+        '''Initialises the state in bulk with the ticks of the subscribed
+        pairs before the start.'''
+        pass
+
+    def stop(self) -> None:
+        '''Releases what the strategy holds once it no longer runs.'''
+        pass
+
+
+Signals = Dict[Pair, Tuple[np.ndarray, np.ndarray]]
+
+
+class VectorizedStrategy(Strategy):
+    """
+    VectorizedStrategy generates the signals of a whole run in bulk from
+    NumPy columns of the ticks, instead of one Python call per tick.
+
+    generate_signals() returns, by pair, the indices of the ticks at which
+    signals are issued along with their units, as floats or as Decimals in
+    an object array. The engine hands over the
+    columns through prepare() before the event loop, after which
+    calculate_signals() merely counts ticks and emits a SignalEvent where
+    one is due, so that orders and fills still go through Portfolio.
+
+    The columns are handed over a day at a time so that the ticks of the
+    whole run are never held in memory. generate_signals() is given each
+    chunk preceded by the last `history` ticks of the previous ones, the
+    first of which is the tick `offsets` of the run, and only its signals
+    over the new ticks are kept. Any state carried over from the previous
+    chunks is up to the strategy.
+    """
+    pairs: List[Pair]
+    event_q: 'Queue[Event]'
+    signals: Signals
+    ticks: Dict[Pair, int]
+    history: int = 0
+    offsets: Dict[Pair, int]
+    _tails: Dict[Pair, TickColumns]
+    _next: Dict[Pair, int]
+
+    def __init__(self, pairs: List[Pair], event_q: 'Queue[Event]') -> None:
+        self.pairs = pairs
+        self.event_q = event_q
+        self.signals = {}
+        self.ticks = dict((p, 0) for p in pairs)
+        self.offsets = dict((p, 0) for p in pairs)
+        self._tails = {}
+        self._next = dict((p, 0) for p in pairs)
+
+    @abstractmethod
+    def generate_signals(self, columns: Dict[Pair, TickColumns]) -> Signals:
+        '''Returns (tick indices, units) arrays of the signals by pair.'''
+        pass
+
+    def warm_up(self, columns: Dict[Pair, TickColumns]) -> None:
+        '''Counts the ticks before the start, which are given to prepare()
+        as well, so that signals over them are never emitted.'''
+        for _pair, _columns in columns.items():
+            self.ticks[_pair] += len(_columns['time'])
+
+    def prepare(self, columns: Dict[Pair, TickColumns]) -> None:
+        '''Generates the signals over the next chunk of the ticks.'''
+        _joined: Dict[Pair, TickColumns] = {}
+        _tail: Optional[TickColumns]
+        _kept: np.ndarray
+        _order: np.ndarray
+        _n: int
+
+        for _pair, _columns in columns.items():
+            _tail = self._tails.get(_pair)
+            _joined[_pair] = _columns if _tail is None else {
+                'time': np.concatenate([_tail['time'], _columns['time']]),
+                'bid': np.concatenate([_tail['bid'], _columns['bid']]),
+                'ask': np.concatenate([_tail['ask'], _columns['ask']])}
+        for _pair, (_ticks, _units) in \
+                self.generate_signals(_joined).items():
+            _tail = self._tails.get(_pair)
+            _kept = _ticks >= (0 if _tail is None else len(_tail['time']))
+            _ticks = _ticks[_kept] + self.offsets[_pair]
+            _units = _units[_kept]
+            _order = np.argsort(_ticks, kind='stable')
+            if _pair in self.signals:
+                self.signals[_pair] = (
+                    np.concatenate([self.signals[_pair][0], _ticks[_order]]),
+                    np.concatenate([self.signals[_pair][1], _units[_order]]))
+            else:
+                self.signals[_pair] = (_ticks[_order], _units[_order])
+            self._next[_pair] = int(np.searchsorted(self.signals[_pair][0],
+                self.ticks[_pair]))
+        # Copies of the tails, so as not to hold the chunks.
+        for _pair, _columns in _joined.items():
+            _n = min(self.history, len(_columns['time']))
+            _tail = {
+                'time': _columns['time'][len(_columns['time']) - _n:].copy(),
+                'bid': _columns['bid'][len(_columns['bid']) - _n:].copy(),
+                'ask': _columns['ask'][len(_columns['ask']) - _n:].copy()}
+            self._tails[_pair] = _tail
+            self.offsets[_pair] += len(_columns['time']) - _n
+
+    def calculate_signals(self, event: TickEvent) -> None:
+        _pair = event.pair
+        _tick = self.ticks[_pair]
+        _signals = self.signals.get(_pair)
+        _size: Union[Decimal, float]
+        _units: Decimal
+        _ref = f'{_pair}-{_tick}'
+        _n = 0  # Signals of the tick so far, to keep the refs unique
+        if _signals is not None:
+            _ticks, _sizes = _signals
+            while self._next[_pair] < len(_ticks) and \
+                    _ticks[self._next[_pair]] == _tick:
+                _size = _sizes[self._next[_pair]]
+                _units = _size if isinstance(_size, Decimal) else \
+                    Decimal(str(float(_size)))
+                self.event_q.put(SignalEvent(
+                    ref=f'{_ref}-{_n}' if _n > 0 else _ref,
+                    pair=_pair,
+                    order_type="market",
+                    units=_units,
+                    time=event.time,
+                    price=event.ask if _units > 0 else event.bid
+                ))
+                self._next[_pair] += 1
+                _n += 1
+        self.ticks[_pair] = _tick + 1
 
-class DummyStrategy(object):
+
+class DummyStrategy(Strategy):
     def __init__(self, pairs: List[Pair], event_q: 'Queue[Event]') -> None:
         self.pairs = pairs
         self.event_q = event_q
@@ -51,63 +195,148 @@ class DummyStrategy(object):
                     self.invested = False
             self.ticks += 1
 
+    def subscriptions(self) -> List[Pair]:
+        return self.pairs[:1]
+
 
 class MACSAttr(TypedDict):
     ticks: int
     invested: bool
-    short_sma: Decimal
-    long_sma: Decimal
+    short_sma: Indicator[Decimal]
+    long_sma: Indicator[Decimal]
 
 
-class MovingAverageCrossStrategy(object):
+class MovingAverageCrossStrategy(Strategy):
     def __init__(
         self, pairs: List[Pair], event_q: 'Queue[Event]',
-        short_window: int = 500, long_window: int = 2000
+        short_window: int = 500, long_window: int = 2000,
+        units: Decimal = Decimal(100),
+        indicators: Optional[IndicatorRegistry] = None
     ) -> None:
         self.pairs: List[Pair] = pairs
-        self.pairs_dict = self.create_pairs_dict()
         self.event_q = event_q
         self.short_window = short_window
         self.long_window = long_window
+        self.units = units
+        self.indicators = indicators
+        self.pairs_dict = self.create_pairs_dict()
+
+    def _sma(self, pair: Pair, window: int) -> Indicator[Decimal]:
+        '''Returns SMA of the bid prices, shared through the registry if
+        given, in which case it is updated by the registry upon ticks.'''
+        if self.indicators is None:
+            return SMA(window, decimal=True)
+        return self.indicators.get(self.indicators.subscribe(
+            self, pair, 'SMA', 'bid', window=int(window), decimal=True))
+
+    def stop(self) -> None:
+        '''Unsubscribes from the SMAs shared through the registry.'''
+        if self.indicators is not None:
+            self.indicators.release(self)
 
     def create_pairs_dict(self) -> Dict[Pair, MACSAttr]:
-        attr_dict: MACSAttr = {
-            "ticks": 0,
-            "invested": False,
-            "short_sma": Decimal(0),
-            "long_sma": Decimal(0)
-        }
-        pairs_dict = {}
+        pairs_dict: Dict[Pair, MACSAttr] = {}
         for p in self.pairs:
-            pairs_dict[p] = copy.deepcopy(attr_dict)
+            pairs_dict[p] = {
+                "ticks": 0,
+                "invested": False,
+                "short_sma": self._sma(p, self.short_window),
+                "long_sma": self._sma(p, self.long_window)
+            }
         return pairs_dict
 
-    def calc_rolling_sma(self, sma_m_1: Decimal, window: int, price: Decimal) \
-            -> Decimal:
-        return ((sma_m_1 * (window - 1)) + price) / window
+    def warm_up(self, columns: Dict[Pair, TickColumns]) -> None:
+        '''Warms up the SMAs with the bid prices, unless shared through the
+        registry which warms them up.'''
+        for _pair, _columns in columns.items():
+            _attr = self.pairs_dict[_pair]
+            if self.indicators is None:
+                _attr["short_sma"].warm_up(_columns['bid'])
+                _attr["long_sma"].warm_up(_columns['bid'])
+            _attr["ticks"] += len(_columns['bid'])
 
     def calculate_signals(self, event: TickEvent) -> None:
         if event.type == 'TICK':
             pair = event.pair
             price = event.bid
             pd = self.pairs_dict[pair]
-            if pd["ticks"] == 0:
-                pd["short_sma"] = price
-                pd["long_sma"] = price
+            if self.indicators is None:
+                short_sma = pd["short_sma"].update(price)
+                long_sma = pd["long_sma"].update(price)
             else:
-                pd["short_sma"] = self.calc_rolling_sma(
-                    pd["short_sma"], self.short_window, price)
-                pd["long_sma"] = self.calc_rolling_sma(pd["long_sma"],
-                                                       self.long_window, price)
-            if pd["ticks"] > self.short_window:
-                if pd["short_sma"] > pd["long_sma"] and not pd["invested"]:
-                    signal = SignalEvent(pair, "market", "buy",
-                                         event.time)
+                short_sma = pd["short_sma"].value
+                long_sma = pd["long_sma"].value
+            if short_sma is not None and long_sma is not None:
+                if short_sma > long_sma and not pd["invested"]:
+                    signal = SignalEvent(
+                        ref=f'{pair}-{pd["ticks"]}',
+                        pair=pair,
+                        order_type="market",
+                        units=self.units,
+                        time=event.time,
+                        price=event.ask
+                    )
                     self.event_q.put(signal)
                     pd["invested"] = True
-                if pd["short_sma"] < pd["long_sma"] and pd["invested"]:
-                    signal = SignalEvent(pair, "market", "sell",
-                                         event.time)
+                if short_sma < long_sma and pd["invested"]:
+                    signal = SignalEvent(
+                        ref=f'{pair}-{pd["ticks"]}',
+                        pair=pair,
+                        order_type="market",
+                        units=-self.units,
+                        time=event.time,
+                        price=event.bid
+                    )
                     self.event_q.put(signal)
                     pd["invested"] = False
             pd["ticks"] += 1
+
+
+class VectorizedMovingAverageCrossStrategy(VectorizedStrategy):
+    """
+    Vectorized version of MovingAverageCrossStrategy. The SMAs of the bid
+    prices are computed from cumulative sums in float64, so that crossings
+    within rounding error of equality may differ from the Decimal version.
+    """
+    def __init__(
+        self, pairs: List[Pair], event_q: 'Queue[Event]',
+        short_window: int = 500, long_window: int = 2000,
+        units: Decimal = Decimal(100)
+    ) -> None:
+        super().__init__(pairs, event_q)
+        self.short_window = int(short_window)
+        self.long_window = int(long_window)
+        self.units = units
+        # The ticks before the first whose long SMA takes a chunk.
+        self.history = self.long_window - 1
+        self._states = dict((p, -1.0) for p in pairs)
+
+    def generate_signals(self, columns: Dict[Pair, TickColumns]) -> Signals:
+        _signals: Signals = {}
+        _sw, _lw = self.short_window, self.long_window
+        _first: int
+        for _pair in self.pairs:
+            _bid = columns[_pair]['bid']
+            # Start uninvested from the first tick after warm-up, if any.
+            _first = max(_lw - 1, self.ticks[_pair] - self.offsets[_pair])
+            if len(_bid) <= _first:
+                _signals[_pair] = (np.array([], dtype=np.int64),
+                    np.array([], dtype=object))
+                continue
+            _csum = np.concatenate([[0.0], np.cumsum(_bid)])
+            _ticks = np.arange(_first, len(_bid))
+            _sign = np.sign(
+                (_csum[_ticks + 1] - _csum[_ticks + 1 - _sw]) / _sw -
+                (_csum[_ticks + 1] - _csum[_ticks + 1 - _lw]) / _lw)
+            # Being invested or not only flips at a strict crossing, so
+            # carry the last non-zero sign forward from the one the
+            # previous chunk ended with, initially -1.
+            _state = np.concatenate([[self._states[_pair]], _sign])
+            _state = _state[np.maximum.accumulate(
+                np.where(_state != 0, np.arange(len(_state)), 0))]
+            self._states[_pair] = float(_state[-1])
+            _flips = np.flatnonzero(_state[1:] != _state[:-1])
+            _signals[_pair] = (_ticks[_flips], np.array(
+                [self.units if _s > 0 else -self.units
+                    for _s in _state[1:][_flips]], dtype=object))
+        return _signals
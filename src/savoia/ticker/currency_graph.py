@@ -0,0 +1,157 @@
+from decimal import Decimal
+from savoia.config.decimal_config import DECIMAL_PLACES
+
+import pandas as pd
+
+from savoia.types.types import Pair, Price
+
+from logging import getLogger, Logger
+from collections import deque
+from typing import List, Dict, Tuple, Deque
+
+
+class CurrencyGraph(object):
+    """
+    CurrencyGraph derives cross rates for pairs which are not traded
+    directly, by chaining the pairs (and their inverses) held by Ticker.
+
+    Each currency is a node and each available pair is an edge. A derived
+    cross is written into the same prices dict as the traded pairs, so that
+    cursors held by Position objects keep working, and it is recalculated
+    only when one of the traded pairs on its path ticks.
+    """
+    logger: Logger
+    pairs: List[Pair]
+    prices: Dict[Pair, Price]
+    paths: Dict[Pair, List[Pair]]
+    dependents: Dict[Pair, List[Pair]]
+    _adjacency: Dict[str, List[Tuple[str, Pair]]]
+    _traded: Dict[Pair, Pair]
+
+    def __init__(self, pairs: List[Pair], prices: Dict[Pair, Price]) -> None:
+        """
+        Initialises the CurrencyGraph
+
+        Parameters:
+        pairs - The list of traded currency pairs.
+        prices - The prices dict of Ticker, which derived crosses are
+            added to.
+        """
+        self.logger = getLogger(__name__)
+        self.pairs = pairs
+        self.prices = prices
+        self.paths = {}
+        self.dependents = {}
+        self._traded = self._set_up_traded_dict()
+        self._adjacency = self._set_up_adjacency()
+
+    @classmethod
+    def invert_pair(cls, pair: Pair) -> Pair:
+        return Pair("%s%s" % (pair[3:], pair[:3]))
+
+    def _set_up_traded_dict(self) -> Dict[Pair, Pair]:
+        '''Maps each pair and its inverse to the pair actually traded.'''
+        _traded: Dict[Pair, Pair] = {}
+        for _pair in self.pairs:
+            _traded[_pair] = _pair
+            _traded[self.invert_pair(_pair)] = _pair
+        return _traded
+
+    def _set_up_adjacency(self) -> Dict[str, List[Tuple[str, Pair]]]:
+        _adjacency: Dict[str, List[Tuple[str, Pair]]] = {}
+        for _pair in self.pairs:
+            _base, _quote = _pair[:3], _pair[3:]
+            _adjacency.setdefault(_base, []).append((_quote, _pair))
+            _adjacency.setdefault(_quote, []).append(
+                (_base, self.invert_pair(_pair)))
+        return _adjacency
+
+    def find_path(self, pair: Pair) -> List[Pair]:
+        '''Returns the shortest chain of available pairs converting the base
+        currency of the pair into its quote currency.
+        '''
+        _start: str = pair[:3]
+        _goal: str = pair[3:]
+        _prev: Dict[str, Tuple[str, Pair]] = {}
+        _queue: Deque[str] = deque([_start])
+        _visited = {_start}
+
+        while _queue:
+            _ccy = _queue.popleft()
+            if _ccy == _goal:
+                break
+            for _next, _leg in self._adjacency.get(_ccy, []):
+                if _next not in _visited:
+                    _visited.add(_next)
+                    _prev[_next] = (_ccy, _leg)
+                    _queue.append(_next)
+
+        if _goal not in _prev:
+            raise Exception(f"No conversion path is available for {pair}.")
+        _path: List[Pair] = []
+        _ccy = _goal
+        while _ccy != _start:
+            _ccy, _leg = _prev[_ccy]
+            _path.append(_leg)
+        _path.reverse()
+        return _path
+
+    def sources(self, pair: Pair) -> List[Pair]:
+        '''Returns the traded pairs whose ticks move the price of the pair.'''
+        if pair in self._traded:
+            return [self._traded[pair]]
+        _cross = pair if pair in self.paths else self.invert_pair(pair)
+        return [self._traded[_leg] for _leg in self.paths[_cross]]
+
+    def add_cross(self, pair: Pair) -> None:
+        '''Registers a derived cross and its inverse in the prices dict, and
+        calculates their prices from the latest ones of the legs.
+        '''
+        if pair in self.prices:
+            return
+        _path = self.find_path(pair)
+        self.paths[pair] = _path
+        for _p in [pair, self.invert_pair(pair)]:
+            self.prices[_p] = Price({
+                "bid": Decimal(0),
+                "ask": Decimal(0),
+                "time": pd.Timestamp(0)
+            })
+        for _leg in _path:
+            _dependents = self.dependents.setdefault(self._traded[_leg], [])
+            if pair not in _dependents:
+                _dependents.append(pair)
+        self.logger.info(f"Derived cross {pair} via {_path}")
+        self._calc_cross(pair)
+
+    def update_crosses(self, pair: Pair) -> None:
+        '''Recalculates only the crosses depending on the pair just ticked.'''
+        for _cross in self.dependents.get(pair, []):
+            self._calc_cross(_cross)
+
+    def _calc_cross(self, pair: Pair) -> None:
+        _bid: Decimal = Decimal('1')
+        _ask: Decimal = Decimal('1')
+        _time: pd.Timestamp = pd.Timestamp(0)
+        _price: Price
+
+        for _leg in self.paths[pair]:
+            _price = self.prices[_leg]
+            _bid *= _price['bid']
+            _ask *= _price['ask']
+            _time = max(_time, _price['time'])
+        _bid = _bid.quantize(DECIMAL_PLACES)
+        _ask = _ask.quantize(DECIMAL_PLACES)
+
+        _price = self.prices[pair]
+        _price['bid'] = _bid
+        _price['ask'] = _ask
+        _price['time'] = _time
+        _price = self.prices[self.invert_pair(pair)]
+        if _bid == 0 or _ask == 0:
+            _price['bid'] = Decimal(0)
+            _price['ask'] = Decimal(0)
+        else:
+            _price['bid'] = (Decimal("1.0") / _ask).quantize(DECIMAL_PLACES)
+            _price['ask'] = (Decimal("1.0") / _bid).quantize(DECIMAL_PLACES)
+        _price['time'] = _time
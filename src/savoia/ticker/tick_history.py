@@ -0,0 +1,74 @@
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+from typing import Optional, Tuple
+
+
+class TickHistory(object):
+    """
+    TickHistory is a fixed-capacity ring buffer of the latest bid/ask/time
+    of a currency pair, backed by NumPy arrays.
+
+    Every tick is written twice, at its slot and at slot + capacity, so that
+    the last N ticks always form a contiguous slice and can be handed out
+    as read-only views without copying.
+    """
+    capacity: int
+    count: int
+    _pos: int
+    _times: np.ndarray
+    _bids: np.ndarray
+    _asks: np.ndarray
+
+    def __init__(self, capacity: int) -> None:
+        """
+        Initialises the TickHistory
+
+        Parameters:
+        capacity - The maximum number of ticks kept.
+        """
+        self.capacity = int(capacity)
+        if self.capacity <= 0:
+            raise Exception(f"Invalid capacity: {capacity}, " +
+                "expected a positive integer.")
+        self.count = 0
+        self._pos = 0
+        self._times = np.zeros(2 * self.capacity, dtype=np.int64)
+        self._bids = np.zeros(2 * self.capacity, dtype=np.float64)
+        self._asks = np.zeros(2 * self.capacity, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def append(self, time: pd.Timestamp, bid: Decimal, ask: Decimal) -> None:
+        '''Stores a tick, overwriting the oldest one when full.'''
+        _time: int = time.value
+        _bid: float = float(bid)
+        _ask: float = float(ask)
+        _lo: int = self._pos
+        _hi: int = self._pos + self.capacity
+
+        self._times[_lo] = self._times[_hi] = _time
+        self._bids[_lo] = self._bids[_hi] = _bid
+        self._asks[_lo] = self._asks[_hi] = _ask
+        self._pos = (self._pos + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def _view(self, array: np.ndarray, n: int) -> np.ndarray:
+        _end = self._pos + self.capacity
+        _view = array[_end - n:_end]
+        _view.flags.writeable = False
+        return _view
+
+    def window(self, n: Optional[int] = None) \
+            -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        '''Returns views of times (epoch nanoseconds), bids and asks of the
+        last n ticks, oldest first. All the ticks held are returned if n is
+        omitted or exceeds the number of ticks held.
+        '''
+        _n = self.count if n is None else min(int(n), self.count)
+        return (self._view(self._times, _n), self._view(self._bids, _n),
+            self._view(self._asks, _n))
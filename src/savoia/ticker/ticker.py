@@ -5,27 +5,49 @@ import pandas as pd
 
 from savoia.types.types import Pair, Price
 from savoia.event.event import TickEvent
+from savoia.ticker.currency_graph import CurrencyGraph
+from savoia.ticker.tick_history import TickHistory
 
+import numpy as np
 from logging import getLogger, Logger
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
 
 
 class Ticker(object):
     """
     Ticker is responsible for holding latest prices for each
-    currencies.
+    currencies. Optionally it also keeps a bounded history of the recent
+    ticks of the pairs configured.
+
+    Readiness of prices is tracked as a bitmap, a bit per traded pair set
+    upon its first tick, so that whether all the pairs an order depends on
+    have been priced is checked with a single mask operation.
     """
     logger: Logger
     pairs: List[Pair]
     prices: Dict[Pair, Price]
+    graph: CurrencyGraph
+    history: Dict[Pair, TickHistory]
+    ready: int
+    _bits: Dict[Pair, int]
 
-    def __init__(self, pairs: List[Pair]) -> None:
+    def __init__(self, pairs: List[Pair],
+            history: Optional[Dict[Pair, int]] = None) -> None:
         """
         Initialises the Ticker
+
+        Parameters:
+        pairs - The list of currency pairs to hold prices for.
+        history - The number of recent ticks to keep for each pair. Pairs
+            not included keep only the latest price.
         """
         self.logger = getLogger(__name__)
         self.pairs = pairs
         self.prices = self._set_up_prices_dict()
+        self.graph = CurrencyGraph(self.pairs, self.prices)
+        self.history = self._set_up_history(history or {})
+        self.ready = 0
+        self._bits = self._set_up_bits()
 
     def _set_up_prices_dict(self) -> Dict[Pair, Price]:
         prices_dict = dict((Pair(k), v)
@@ -43,6 +65,33 @@ class Ticker(object):
         prices_dict.update(inv_prices_dict)
         return prices_dict
 
+    def _set_up_history(self, history: Dict[Pair, int]) \
+            -> Dict[Pair, TickHistory]:
+        for _pair in history:
+            if _pair not in self.pairs:
+                raise Exception(f"Unexpected pair for history: {_pair}")
+        return dict((_pair, TickHistory(_capacity))
+                    for _pair, _capacity in history.items())
+
+    def _set_up_bits(self) -> Dict[Pair, int]:
+        _bits: Dict[Pair, int] = {}
+        for _i, _pair in enumerate(self.pairs):
+            _bits[_pair] = 1 << _i
+        return _bits
+
+    def ready_mask(self, pairs: List[Pair]) -> int:
+        '''Returns the mask of the traded pairs which the prices of the pairs
+        (including inverses and derived crosses) depend on.'''
+        _mask: int = 0
+        for _pair in pairs:
+            for _source in self.graph.sources(_pair):
+                _mask |= self._bits[_source]
+        return _mask
+
+    def is_ready(self, mask: int) -> bool:
+        '''Returns True if all the pairs in the mask have been ticked.'''
+        return self.ready & mask == mask
+
     @classmethod
     def invert_prices(cls, pair: Pair, bid: Decimal, ask: Decimal) \
             -> Tuple[Pair, Decimal, Decimal]:
@@ -51,6 +100,18 @@ class Ticker(object):
         inv_ask = (Decimal("1.0") / bid).quantize(DECIMAL_PLACES)
         return inv_pair, inv_bid, inv_ask
 
+    def add_cross(self, pair: Pair) -> Price:
+        '''Derives prices of a pair which is not traded directly from the
+        pairs available, and returns its price entry.'''
+        self.graph.add_cross(pair)
+        return self.prices[pair]
+
+    def window(self, pair: Pair, n: Optional[int] = None) \
+            -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        '''Returns read-only views of times, bids and asks of the last n ticks
+        of the pair. See TickHistory.window().'''
+        return self.history[pair].window(n)
+
     def update_ticker(self, event: TickEvent) -> None:
         '''Updates prices upon TickEvent'''
         _pair: Pair
@@ -73,3 +134,7 @@ class Ticker(object):
             self.prices[inv_pair]["bid"] = inv_bid
             self.prices[inv_pair]["ask"] = inv_ask
             self.prices[inv_pair]['time'] = _time
+            self.graph.update_crosses(_pair)
+            self.ready |= self._bits[_pair]
+            if _pair in self.history:
+                self.history[_pair].append(_time, _bid, _ask)
@@ -1,6 +1,7 @@
 from typing import NewType
 from typing_extensions import TypedDict
 from decimal import Decimal
+import numpy as np
 import pandas as pd
 
 
@@ -16,3 +17,12 @@ class Price(TypedDict):
     bid: Decimal
     ask: Decimal
     time: pd.Timestamp
+
+
+class TickColumns(TypedDict):
+    """TickColumns type holds the ticks of a currency pair as NumPy columns,
+    times in nanoseconds since the epoch and prices in float64.
+    """
+    time: np.ndarray
+    bid: np.ndarray
+    ask: np.ndarray
@@ -1,11 +1,13 @@
 import pytest
 from savoia.datafeed.datafeed import DataFeeder, HistoricCSVDataFeeder
 from savoia.ticker.ticker import Ticker
+from savoia.event.event import TickEvent
 from queue import Queue
 from decimal import Decimal
 import pandas as pd
 import os
-from typing import Tuple
+from typing import Dict, List, Tuple
+from pathlib import Path
 
 
 @pytest.fixture(scope='function')
@@ -107,3 +109,107 @@ def test_run(setupDataFeeder: Tuple[Ticker, DataFeeder]) -> None:
     df.run()
     assert df.continue_backtest is False
     assert df.feed_q.qsize() == 11
+
+
+def test_load_columns(setupDataFeeder: Tuple[Ticker, DataFeeder]) -> None:
+    """load_columns should return the ticks of each pair in the order they
+    are streamed.
+    """
+    ticker, df = setupDataFeeder
+    columns = df.load_columns()
+    streamed: Dict[str, List[TickEvent]] = {'USDJPY': [], 'GBPUSD': []}
+    while df.continue_backtest:
+        df._stream_next_tick()
+    while not df.feed_q.empty():
+        tick = df.feed_q.get(False)
+        streamed[tick.pair].append(tick)
+    for pair, ticks in streamed.items():
+        assert list(columns[pair]['time']) == [t.time.value for t in ticks]
+        assert list(columns[pair]['bid']) == [float(t.bid) for t in ticks]
+        assert list(columns[pair]['ask']) == [float(t.ask) for t in ticks]
+
+
+def test_stream_from_start() -> None:
+    """Ticks before the start should not be fed"""
+    start = pd.Timestamp('2014-01-02 00:03:00')
+    df = HistoricCSVDataFeeder(["USDJPY", "GBPUSD"], Queue(),
+        './tests/datafeed', start=start)
+    while df.continue_backtest:
+        df._stream_next_tick()
+    times = [t.time for t in df.feed_q.queue]
+    assert len(times) == 4
+    assert min(times) >= start
+
+
+def test_skip_days_before_start() -> None:
+    """Files of the days before the start should not be read"""
+    df = HistoricCSVDataFeeder(["USDJPY", "GBPUSD"], Queue(),
+        './tests/datafeed', start=pd.Timestamp('2014-01-02 00:03:00'))
+    assert df.cur_date_idx == 1
+    assert all(line.startswith('02.01.2014') for line in df.pair_frames)
+
+
+def test_load_columns_within() -> None:
+    """Only the files of the days from start to end should be read"""
+    df = HistoricCSVDataFeeder(["USDJPY", "GBPUSD"], Queue(),
+        './tests/datafeed')
+    columns = df.load_columns(pd.Timestamp('2014-01-02 00:00:00'),
+        pd.Timestamp('2014-01-02 00:03:00'))
+    assert [pd.Timestamp(t) for t in columns['GBPUSD']['time']] == \
+        [pd.Timestamp(f'2014-01-02 {t}') for t in
+            ['00:02:24.967', '00:04:42.625', '00:07:18.417']]
+    assert len(columns['USDJPY']['time']) == 2
+    columns = df.load_columns(end=pd.Timestamp('2014-01-01 00:00:00'))
+    assert len(columns['USDJPY']['time']) == 0
+
+
+def test_iter_columns() -> None:
+    """Columns yielded a day at a time should make up those loaded"""
+    df = HistoricCSVDataFeeder(["USDJPY", "GBPUSD"], Queue(),
+        './tests/datafeed')
+    columns = df.load_columns()
+    chunks = list(df.iter_columns(pd.Timestamp('2014-01-01 12:00:00')))
+    assert len(chunks) == 2
+    for pair in ["USDJPY", "GBPUSD"]:
+        assert [t for c in chunks for t in c[pair]['time']] == \
+            list(columns[pair]['time'])
+    assert len(list(df.iter_columns(pd.Timestamp('2014-01-02 12:00')))) == 1
+
+
+def _write_days(csv_dir: Path) -> None:
+    rows = {
+        '20140112': ['12.01.2014 23:59:58.500,1.50054,1.49854,1,1'],
+        '20140113': ['13.01.2014 00:00:01.250,1.50064,1.49864,1,1',
+                     '13.01.2014 00:00:02.000,1.50074,1.49874,1,1'],
+    }
+    for date, lines in rows.items():
+        (csv_dir / f'GBPUSD_{date}.csv').write_text(
+            'Time,Ask,Bid,AskVolume,BidVolume\n' + '\n'.join(lines) + '\n')
+
+
+def test_day_first_times(tmp_path: Path) -> None:
+    """Times should be read day-first alike when streamed and loaded, the
+    data crossing from day 12 to 13"""
+    _write_days(tmp_path)
+    df = HistoricCSVDataFeeder(["GBPUSD"], Queue(), str(tmp_path))
+    assert df._day_of('20140112') == pd.Timestamp('2014-01-12')
+    columns = df.load_columns()
+    while df.continue_backtest:
+        df._stream_next_tick()
+    times = [t.time for t in df.feed_q.queue]
+    assert times == [pd.Timestamp('2014-01-12 23:59:58.500'),
+        pd.Timestamp('2014-01-13 00:00:01.250'),
+        pd.Timestamp('2014-01-13 00:00:02')]
+    assert list(columns['GBPUSD']['time']) == [t.value for t in times]
+
+
+def test_skip_day_before_start_day_first(tmp_path: Path) -> None:
+    """Days of file names should not be read as months"""
+    _write_days(tmp_path)
+    df = HistoricCSVDataFeeder(["GBPUSD"], Queue(), str(tmp_path),
+        start=pd.Timestamp('2014-01-13'))
+    assert df.file_dates[df.cur_date_idx] == '20140113'
+    assert df._dates_within(pd.Timestamp('2014-01-12 12:00'),
+        pd.Timestamp('2014-01-13')) == ['20140112']
+    assert len(df.load_columns(end=pd.Timestamp('2014-01-13'))['GBPUSD']
+        ['time']) == 1
@@ -1,11 +1,20 @@
 from savoia.engine.engine import Engine, datafeed_params, \
     execution_params, strategy_params, engine_params, result_params
 from savoia.config.dir_config import CSV_DATA_DIR, OUTPUT_RESULTS_DIR
+from savoia.event.event import SignalEvent, OrderEvent, FillEvent
+from savoia.execution.execution import SimulatedExecution
+from savoia.strategy.strategy import MovingAverageCrossStrategy, \
+    VectorizedMovingAverageCrossStrategy
+from savoia.types.types import TickColumns
 
 from decimal import Decimal
 import logging.config
 import os
 import json
+import sqlite3
+import pandas as pd
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, cast
 
 import pytest
 
@@ -70,5 +79,305 @@ def test_engine_run() -> None:
     eg.run()
 
 
+def test_engine_dispatch(tmp_path: Path) -> None:
+    """Ticks should be dispatched only to the strategies subscribing to the
+    pair"""
+    eg = Engine(
+        engine={'pairs': ['GBPUSD', 'USDJPY'], 'home_currency': 'JPY',
+            'equity': Decimal(10 ** 6), 'isBacktest': True, 'max_iters': 10,
+            'heart_beat': 0},
+        datafeed={'module_name': 'HistoricCSVDataFeeder',
+            'params': {'csv_dir': './tests/datafeed'}},
+        execution={'module_name': 'SimulatedExecution',
+            'params': {'heartbeat': 0}},
+        strategy=[
+            {'module_name': 'DummyStrategy', 'params': {}},
+            {'module_name': 'MovingAverageCrossStrategy',
+                'params': {'pairs': ['USDJPY']}},
+            {'module_name': 'MovingAverageCrossStrategy', 'params': {}},
+        ],
+        result={'module_name': 'FileResultHandler',
+            'params': {'output_dir': str(tmp_path)}}
+    )
+    dummy, usdjpy, both = eg.strategies
+    assert eg.dispatch == {'GBPUSD': [dummy, both],
+        'USDJPY': [usdjpy, both]}
+    # Each strategy has a portfolio of its own, which its signals reach.
+    assert list(eg.portfolios.keys()) == ['DummyStrategy',
+        'MovingAverageCrossStrategy_1', 'MovingAverageCrossStrategy_2']
+    assert all(p.equity == Decimal(10 ** 6) for p in eg.portfolios.values())
+    usdjpy.event_q.put(SignalEvent('ref', 'USDJPY', pd.Timestamp(0),
+        'market', Decimal('1'), Decimal('100')))
+    both.event_q.put(SignalEvent('ref', 'USDJPY', pd.Timestamp(0),
+        'market', Decimal('1'), Decimal('100')))
+    signal = eg.event_q.get(False)
+    assert signal.strategy == 'MovingAverageCrossStrategy_1'
+    # Refs are prefixed with the strategy so that those of strategies do not
+    # collide in the order registry.
+    assert signal.ref == 'MovingAverageCrossStrategy_1:ref'
+    assert eg.event_q.get(False).ref == 'MovingAverageCrossStrategy_2:ref'
+
+
+def test_engine_stop_strategies(tmp_path: Path) -> None:
+    """Indicators shared among strategies should be evicted once the
+    strategies stop at the end"""
+    eg = Engine(
+        engine={'pairs': ['GBPUSD', 'USDJPY'], 'home_currency': 'JPY',
+            'equity': Decimal(10 ** 6), 'isBacktest': True,
+            'max_iters': 10 ** 5, 'heart_beat': 0},
+        datafeed={'module_name': 'HistoricCSVDataFeeder',
+            'params': {'csv_dir': './tests/datafeed'}},
+        execution={'module_name': 'SimulatedExecution',
+            'params': {'heartbeat': 0}},
+        strategy=[
+            {'module_name': 'MovingAverageCrossStrategy', 'params': {}},
+            {'module_name': 'MovingAverageCrossStrategy', 'params': {}},
+        ],
+        result={'module_name': 'FileResultHandler',
+            'params': {'output_dir': str(tmp_path)}}
+    )
+    assert len(eg.indicators.indicators) == 4
+    eg.run()
+    assert eg.indicators.indicators == {}
+
+
+def test_engine_unexpected_strategy_pair(tmp_path: Path) -> None:
+    with pytest.raises(Exception):
+        Engine(
+            engine={'pairs': ['GBPUSD', 'USDJPY'], 'home_currency': 'JPY',
+                'equity': Decimal(10 ** 6), 'isBacktest': True,
+                'max_iters': 10, 'heart_beat': 0},
+            datafeed={'module_name': 'HistoricCSVDataFeeder',
+                'params': {'csv_dir': './tests/datafeed'}},
+            execution={'module_name': 'SimulatedExecution',
+                'params': {'heartbeat': 0}},
+            strategy={'module_name': 'DummyStrategy',
+                'params': {'pairs': ['EURUSD']}},
+            result={'module_name': 'FileResultHandler',
+                'params': {'output_dir': str(tmp_path)}}
+        )
+
+
+def test_engine_order_timeout(tmp_path: Path) -> None:
+    """Orders whose fills are lost should expire rather than hang the
+    backtest"""
+    class LostExecution(SimulatedExecution):
+        def execute_orders(self, events: List[OrderEvent]) \
+                -> List[FillEvent]:
+            return []
+
+    eg = Engine(
+        engine={'pairs': ['GBPUSD', 'USDJPY'], 'home_currency': 'JPY',
+            'equity': Decimal(10 ** 6), 'isBacktest': True,
+            'max_iters': 10 ** 5, 'heart_beat': 0, 'order_timeout': 0.01},
+        datafeed={'module_name': 'HistoricCSVDataFeeder',
+            'params': {'csv_dir': './tests/datafeed'}},
+        execution={'module_name': 'SimulatedExecution',
+            'params': {'heartbeat': 0}},
+        strategy={'module_name': 'VectorizedMovingAverageCrossStrategy',
+            'params': {'short_window': 1, 'long_window': 2}},
+        result={'module_name': 'FileResultHandler',
+            'params': {'output_dir': str(tmp_path)}}
+    )
+    eg.execution = LostExecution(eg.event_q, eg.exec_q)
+    eg.run()
+    report = eg.orders.report()
+    assert report['submitted'] > 0
+    assert report['expired'] == report['submitted']
+    assert report['in_flight'] == 0
+
+
+def test_engine_warm_up(tmp_path: Path) -> None:
+    """Ticks within lookback before the start should prime the ticker and
+    warm up the indicators and strategies, only the files of them read"""
+    eg = Engine(
+        engine={'pairs': ['GBPUSD', 'USDJPY'], 'home_currency': 'JPY',
+            'equity': Decimal(10 ** 6), 'isBacktest': True,
+            'max_iters': 10 ** 5, 'heart_beat': 0,
+            'warm_up': {'start': '2014-01-02 00:05:00', 'lookback': '2min'}},
+        datafeed={'module_name': 'HistoricCSVDataFeeder',
+            'params': {'csv_dir': './tests/datafeed'}},
+        execution={'module_name': 'SimulatedExecution',
+            'params': {'heartbeat': 0}},
+        strategy={'module_name': 'MovingAverageCrossStrategy',
+            'params': {'short_window': 1, 'long_window': 2}},
+        result={'module_name': 'FileResultHandler',
+            'params': {'output_dir': str(tmp_path)}}
+    )
+    load_columns = eg.datafeed.load_columns
+    loaded = []
+
+    def _load(*args: Any) -> Dict[str, TickColumns]:
+        columns = load_columns(*args)
+        loaded.append(dict((p, len(c['time'])) for p, c in columns.items()))
+        return columns
+    setattr(eg.datafeed, 'load_columns', _load)
+    eg._prepare()
+    assert loaded == [{'GBPUSD': 3, 'USDJPY': 2}]
+    assert eg.ticker.prices['GBPUSD']['time'] == \
+        pd.Timestamp('2014-01-02 00:04:42.625')
+    assert eg.ticker.prices['GBPUSD']['bid'] == Decimal('1.49779')
+    assert eg.ticker.prices['USDJPY']['time'] == \
+        pd.Timestamp('2014-01-02 00:03:24.967')
+    strategy = eg.strategies[0]
+    assert isinstance(strategy, MovingAverageCrossStrategy)
+    assert strategy.pairs_dict['GBPUSD']['ticks'] == 1
+    assert strategy.pairs_dict['GBPUSD']['short_sma'].value == \
+        Decimal('1.49779')
+    assert strategy.pairs_dict['GBPUSD']['long_sma'].value is None
+
+
+def test_engine_vectorized_by_day(tmp_path: Path) -> None:
+    """Vectorized strategies should be prepared with the ticks of a day at a
+    time from the beginning of the lookback"""
+    eg = Engine(
+        engine={'pairs': ['GBPUSD', 'USDJPY'], 'home_currency': 'JPY',
+            'equity': Decimal(10 ** 6), 'isBacktest': True,
+            'max_iters': 10 ** 5, 'heart_beat': 0,
+            'warm_up': {'start': '2014-01-02 00:05:00', 'lookback': '2min'}},
+        datafeed={'module_name': 'HistoricCSVDataFeeder',
+            'params': {'csv_dir': './tests/datafeed'}},
+        execution={'module_name': 'SimulatedExecution',
+            'params': {'heartbeat': 0}},
+        strategy={'module_name': 'VectorizedMovingAverageCrossStrategy',
+            'params': {'short_window': 1, 'long_window': 2}},
+        result={'module_name': 'FileResultHandler',
+            'params': {'output_dir': str(tmp_path)}}
+    )
+    iter_columns = eg.datafeed.iter_columns
+    chunks = []
+
+    def _iter(*args: Any) -> Iterator[Dict[str, TickColumns]]:
+        for columns in iter_columns(*args):
+            chunks.append(dict((p, len(c['time']))
+                for p, c in columns.items()))
+            yield columns
+    setattr(eg.datafeed, 'iter_columns', _iter)
+    eg._prepare()
+    assert chunks == [{'GBPUSD': 3, 'USDJPY': 2}]
+    strategy = eg.strategies[0]
+    assert isinstance(strategy, VectorizedMovingAverageCrossStrategy)
+    # Ticks of the day before the lookback are left out.
+    assert strategy.ticks == {'GBPUSD': 1, 'USDJPY': 1}
+    assert strategy.offsets == {'GBPUSD': 1, 'USDJPY': 1}
+
+
+def test_engine_coalescing(tmp_path: Path) -> None:
+    """Opposing orders of strategies should be crossed at the mid without
+    an order submitted"""
+    eg = Engine(
+        engine={'pairs': ['GBPUSD', 'USDJPY'], 'home_currency': 'JPY',
+            'equity': Decimal(10 ** 6), 'isBacktest': True,
+            'max_iters': 10 ** 5, 'heart_beat': 0, 'coalescing': {}},
+        datafeed={'module_name': 'HistoricCSVDataFeeder',
+            'params': {'csv_dir': './tests/datafeed'}},
+        execution={'module_name': 'TickDrivenExecution', 'params': {}},
+        strategy=[
+            {'module_name': 'VectorizedMovingAverageCrossStrategy',
+                'name': 'long', 'params': {'short_window': 1,
+                'long_window': 2}},
+            {'module_name': 'VectorizedMovingAverageCrossStrategy',
+                'name': 'short', 'params': {'short_window': 1,
+                'long_window': 2, 'units': -100}},
+        ],
+        result={'module_name': 'FileResultHandler',
+            'params': {'output_dir': str(tmp_path)}}
+    )
+    eg.run()
+    long = pd.read_csv(tmp_path / 'Execution_long.csv')
+    short = pd.read_csv(tmp_path / 'Execution_short.csv')
+    assert len(long) > 0
+    assert list(long['Units']) == list(-short['Units'])
+    assert list(long['Price']) == list(short['Price'])
+    assert 'submitted' not in eg.orders.report()
+    assert eg.coalescer is not None and eg.coalescer.cross
+
+
+def test_engine_coalescing_flush(tmp_path: Path) -> None:
+    """Orders still held at the end of the feed should be submitted and
+    filled before the engine stops"""
+    units = {}
+    for coalescing in [None, {'ticks': 10 ** 6}]:
+        engine: Dict[str, Any] = {'pairs': ['GBPUSD', 'USDJPY'],
+            'home_currency': 'JPY', 'equity': Decimal(10 ** 6),
+            'isBacktest': True, 'max_iters': 10 ** 5, 'heart_beat': 0}
+        if coalescing is not None:
+            engine['coalescing'] = coalescing
+        eg = Engine(
+            engine=cast(engine_params, engine),
+            datafeed={'module_name': 'HistoricCSVDataFeeder',
+                'params': {'csv_dir': './tests/datafeed'}},
+            execution={'module_name': 'SimulatedExecution',
+                'params': {'heartbeat': 0}},
+            strategy={'module_name': 'MovingAverageCrossStrategy',
+                'params': {'short_window': 1, 'long_window': 2}},
+            result={'module_name': 'FileResultHandler',
+                'params': {'output_dir': str(tmp_path)}}
+        )
+        eg.run()
+        units[str(coalescing)] = dict((p, pos.units) for p, pos in
+            list(eg.portfolios.values())[0].positions.items())
+        assert eg.coalescer is None or not eg.coalescer.held
+        assert eg.orders.report()['in_flight'] == 0
+    assert any(u != 0 for u in units['None'].values())
+    assert units[str({'ticks': 10 ** 6})] == units['None']
+
+
+def test_engine_run_parameters(tmp_path: Path) -> None:
+    """Result handlers recording runs should get the parameters as given"""
+    eg = Engine(
+        engine={'pairs': ['GBPUSD', 'USDJPY'], 'home_currency': 'JPY',
+            'equity': Decimal(10 ** 6), 'isBacktest': True, 'max_iters': 10,
+            'heart_beat': 0},
+        datafeed={'module_name': 'HistoricCSVDataFeeder',
+            'params': {'csv_dir': './tests/datafeed'}},
+        execution={'module_name': 'SimulatedExecution',
+            'params': {'heartbeat': 0}},
+        strategy={'module_name': 'MovingAverageCrossStrategy',
+            'params': {'short_window': 2}},
+        result={'module_name': 'SQLiteResultHandler',
+            'params': {'database': str(tmp_path / 'results.db'),
+                'run_id': 'run'}}
+    )
+    eg.result._close()
+    conn = sqlite3.connect(str(tmp_path / 'results.db'))
+    parameters = json.loads(conn.execute(
+        "SELECT parameters FROM runs WHERE run_id = 'run'").fetchone()[0])
+    conn.close()
+    assert parameters['strategy'] == {
+        'module_name': 'MovingAverageCrossStrategy',
+        'params': {'short_window': 2}}
+    assert parameters['engine']['equity'] == '1000000'
+
+
+def test_engine_shared_memory_result(tmp_path: Path) -> None:
+    """Results written out of process should be those written in process"""
+    for name, result in [('file', {'module_name': 'FileResultHandler',
+            'params': {'output_dir': str(tmp_path / 'file')}}),
+            ('shared', {'module_name': 'SharedMemoryResultHandler',
+            'params': {'params': {'output_dir': str(tmp_path / 'shared')},
+                'slots': 4}})]:
+        os.mkdir(tmp_path / name)
+        Engine(
+            engine={'pairs': ['GBPUSD', 'USDJPY'], 'home_currency': 'JPY',
+                'equity': Decimal(10 ** 6), 'isBacktest': True,
+                'max_iters': 10 ** 5, 'heart_beat': 0},
+            datafeed={'module_name': 'HistoricCSVDataFeeder',
+                'params': {'csv_dir': './tests/datafeed'}},
+            execution={'module_name': 'SimulatedExecution',
+                'params': {'heartbeat': 0, 'seed': 1}},
+            strategy={'module_name': 'MovingAverageCrossStrategy',
+                'params': {'short_window': 2, 'long_window': 5}},
+            result=result
+        ).run()
+    # Values pass through shared memory as float.
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / 'file' /
+        'Equity.csv'), pd.read_csv(tmp_path / 'shared' / 'Equity.csv'),
+        check_dtype=False)
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / 'file' /
+        'Execution.csv'), pd.read_csv(tmp_path / 'shared' / 'Execution.csv'),
+        check_dtype=False)
+
+
 if __name__ == '__main__':
     test_engine_run()
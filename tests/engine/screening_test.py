@@ -0,0 +1,241 @@
+from decimal import Decimal
+from queue import Queue
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from savoia.datafeed.datafeed import HistoricCSVDataFeeder
+from savoia.engine.engine import Engine
+from savoia.engine.screening import VectorizedBacktest
+from savoia.event.event import Event, TickEvent, SignalEvent, FillEvent
+from savoia.portfolio.portfolio import Portfolio
+from savoia.result.result import Result, EquityResult, ExecutionResult, \
+    InMemoryResultHandler
+from savoia.strategy.strategy import Signals, \
+    VectorizedMovingAverageCrossStrategy
+from savoia.ticker.ticker import Ticker
+from savoia.types.types import Pair, TickColumns
+
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+
+def replay(columns: Dict[Pair, TickColumns], signals: Signals,
+        home_currency: str, equity: Decimal) \
+        -> Tuple[pd.DataFrame, pd.DataFrame]:
+    '''Replays the ticks and signals through the event-driven Ticker and
+    Portfolio, filling each order at the price of the tick issuing it, and
+    returns the results in the form VectorizedBacktest.run() does.'''
+    pairs = list(columns.keys())
+    ticker = Ticker(pairs)
+    event_q: 'Queue[Event]' = Queue()
+    result_q: 'Queue[Result]' = Queue()
+    port = Portfolio(ticker, event_q, result_q, home_currency, pairs, equity)
+    ticks = sorted(((int(columns[p]['time'][i]), n, p, i)
+        for n, p in enumerate(pairs) for i in range(len(columns[p]['time']))))
+    due = dict(((p, int(t)), u) for p, (ts, us) in signals.items()
+        for t, u in zip(ts, us))
+    for time, _, pair, i in ticks:
+        tick = TickEvent(pair, pd.Timestamp(time),
+            Decimal(str(columns[pair]['bid'][i])),
+            Decimal(str(columns[pair]['ask'][i])))
+        ticker.update_ticker(tick)
+        port.update_portfolio(tick)
+        if (pair, i) in due:
+            units = Decimal(str(float(due[(pair, i)])))
+            port.execute_signal(SignalEvent(f'{pair}-{i}', pair, tick.time,
+                'market', units, tick.ask if units > 0 else tick.bid))
+            while not event_q.empty():
+                order = event_q.get(False)
+                port.execute_fill(FillEvent(order.ref, order.pair, order.time,
+                    order.units, order.price, 'filled'))
+    port.flush_results()
+    equity_rows: List[Dict[str, object]] = []
+    execution_rows: List[Dict[str, object]] = []
+    while not result_q.empty():
+        r = result_q.get(False)
+        if isinstance(r, EquityResult):
+            row: Dict[str, object] = {'Timestamp': r.time,
+                'Equity': float(r.equity), 'Balance': float(r.balance),
+                'UPL[Total]': float(r.upl['total'])}
+            for p in pairs:
+                row[f'UPL[{p}]'] = float(r.upl[p])
+            equity_rows.append(row)
+        elif isinstance(r, ExecutionResult):
+            execution_rows.append({'Timestamp': r.time, 'Pair': r.pair,
+                'Units': float(r.units), 'Price': float(r.price)})
+    return pd.DataFrame(equity_rows).set_index('Timestamp'), \
+        pd.DataFrame(execution_rows)
+
+
+def assert_consistent(columns: Dict[Pair, TickColumns], signals: Signals,
+        home_currency: str) -> None:
+    equity = Decimal('1000000')
+    expected_equity, expected_execution = replay(columns, signals,
+        home_currency, equity)
+    actual_equity, actual_execution = VectorizedBacktest(columns,
+        home_currency, equity).run(signals)
+    assert len(expected_execution) > 0
+    assert list(actual_equity.columns) == list(expected_equity.columns)
+    assert list(actual_equity.index) == list(expected_equity.index)
+    np.testing.assert_allclose(actual_equity.values, expected_equity.values,
+        rtol=1e-9, atol=1e-4)
+    assert list(actual_execution['Pair']) == \
+        list(expected_execution['Pair'])
+    np.testing.assert_allclose(
+        actual_execution[['Units', 'Price']].values.astype(np.float64),
+        expected_execution[['Units', 'Price']].values.astype(np.float64))
+
+
+def test_consistent_with_portfolio_on_csv() -> None:
+    """VectorizedBacktest should agree with the event-driven portfolio on the
+    test data, including conversion into home currency"""
+    columns = HistoricCSVDataFeeder(['GBPUSD', 'USDJPY'], Queue(),
+        './tests/datafeed').load_columns()
+    strategy = VectorizedMovingAverageCrossStrategy(['GBPUSD', 'USDJPY'],
+        Queue(), short_window=1, long_window=2)
+    assert_consistent(columns, strategy.generate_signals(columns), 'JPY')
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+@pytest.mark.parametrize('home_currency', ['JPY', 'USD'])
+def test_consistent_with_portfolio_random(seed: int, home_currency: str) \
+        -> None:
+    """Random fills including reversals should be reflected as Position
+    with average accounting does"""
+    rng = np.random.RandomState(seed)
+    columns: Dict[Pair, TickColumns] = {}
+    signals: Signals = {}
+    for pair, mid in (('GBPUSD', 1.25), ('USDJPY', 107.5)):
+        n = 300
+        mids = mid * np.cumprod(1 + rng.normal(0, 0.001, size=n))
+        columns[Pair(pair)] = {
+            'time': np.sort(rng.randint(0, 10 ** 12, size=n)) + 10 ** 18,
+            'bid': np.round(mids * 0.9999, 5),
+            'ask': np.round(mids * 1.0001, 5),
+        }
+        ticks = np.sort(rng.choice(n, size=40, replace=False))
+        signals[Pair(pair)] = (ticks,
+            rng.randint(-10, 11, size=40).astype(np.float64) * 100)
+    assert_consistent(columns, signals, home_currency)
+
+
+@pytest.mark.parametrize('home_currency', ['JPY', 'USD', 'EUR'])
+def test_consistent_with_portfolio_cross(home_currency: str) -> None:
+    """Pairs not quoted against the home currency should be converted
+    through the cross derived by the ticker"""
+    rng = np.random.RandomState(0)
+    columns: Dict[Pair, TickColumns] = {}
+    n = 300
+    for pair, mid in (('GBPUSD', 1.25), ('USDJPY', 107.5),
+            ('EURGBP', 0.9)):
+        mids = mid * np.cumprod(1 + rng.normal(0, 0.001, size=n))
+        columns[Pair(pair)] = {
+            'time': np.sort(rng.randint(0, 10 ** 12, size=n)) + 10 ** 18,
+            'bid': np.round(mids * 0.9999, 5),
+            'ask': np.round(mids * 1.0001, 5),
+        }
+    # Only the cross is traded, e.g. via GBPUSD and USDJPY into JPY.
+    signals: Signals = {Pair('EURGBP'): (
+        np.sort(rng.choice(n, size=40, replace=False)),
+        rng.randint(-10, 11, size=40).astype(np.float64) * 100)}
+    assert_consistent(columns, signals, home_currency)
+
+
+def test_unconvertible_pair() -> None:
+    """Pairs with no chain of pairs into the home currency should be
+    rejected"""
+    columns: Dict[Pair, TickColumns] = {Pair('GBPUSD'): {
+        'time': np.array([1]), 'bid': np.array([1.25]),
+        'ask': np.array([1.26])}}
+    with pytest.raises(Exception, match='No conversion path'):
+        VectorizedBacktest(columns, 'JPY', Decimal('1000000'))
+
+
+def test_screen() -> None:
+    columns = HistoricCSVDataFeeder(['GBPUSD', 'USDJPY'], Queue(),
+        './tests/datafeed').load_columns()
+
+    def _signals(columns: Dict[Pair, TickColumns], short_window: int,
+            long_window: int) -> Signals:
+        return VectorizedMovingAverageCrossStrategy(['GBPUSD', 'USDJPY'],
+            Queue(), short_window, long_window).generate_signals(columns)
+    backtest = VectorizedBacktest(columns, 'JPY', Decimal('1000000'))
+    grid = [{'short_window': 1, 'long_window': 2},
+        {'short_window': 2, 'long_window': 3}]
+    result = backtest.screen(_signals, grid)
+    assert list(result.columns) == ['short_window', 'long_window', 'equity',
+        'max_drawdown', 'executions']
+    equity, execution = backtest.run(_signals(columns, 1, 2))
+    assert result['equity'][0] == equity['Equity'].iloc[-1]
+    assert result['executions'][0] == len(execution)
+
+
+def test_consistent_with_engine(tmp_path: Path) -> None:
+    """VectorizedBacktest should agree with the full event-driven Engine
+    filling orders at the market without latency"""
+    pairs = ['GBPUSD', 'USDJPY']
+    engine = Engine(
+        engine={'pairs': pairs, 'home_currency': 'JPY',
+            'equity': Decimal('1000000'), 'isBacktest': True,
+            'max_iters': 10 ** 6, 'heart_beat': 0},
+        datafeed={'module_name': 'HistoricCSVDataFeeder',
+            'params': {'csv_dir': './tests/datafeed'}},
+        execution={'module_name': 'TickDrivenExecution',
+            'params': {'latency': 0}},
+        strategy={'module_name': 'VectorizedMovingAverageCrossStrategy',
+            'params': {'short_window': 1, 'long_window': 2}},
+        result={'module_name': 'FileResultHandler',
+            'params': {'output_dir': str(tmp_path)}}
+    )
+    engine.run()
+    expected_equity = pd.read_csv(tmp_path / 'Equity.csv',
+        index_col='Timestamp', parse_dates=['Timestamp'])
+    expected_execution = pd.read_csv(tmp_path / 'Execution.csv',
+        parse_dates=['Timestamp'])
+
+    columns = HistoricCSVDataFeeder(pairs, Queue(),
+        './tests/datafeed').load_columns()
+    signals = VectorizedMovingAverageCrossStrategy(pairs, Queue(),
+        short_window=1, long_window=2).generate_signals(columns)
+    actual_equity, actual_execution = VectorizedBacktest(columns, 'JPY',
+        Decimal('1000000')).run(signals)
+
+    assert len(expected_execution) > 0
+    assert list(actual_equity.index) == list(expected_equity.index)
+    np.testing.assert_allclose(actual_equity.values,
+        expected_equity[actual_equity.columns].values, rtol=1e-9, atol=1e-4)
+    assert list(actual_execution['Timestamp']) == \
+        list(expected_execution['Timestamp'])
+    np.testing.assert_allclose(
+        actual_execution[['Units', 'Price']].values.astype(np.float64),
+        expected_execution[['Units', 'Price']].values)
+
+
+def test_consistent_with_engine_in_memory() -> None:
+    """Results kept in memory by the Engine should be those of
+    VectorizedBacktest as they are"""
+    pairs = ['GBPUSD', 'USDJPY']
+    result = Engine(
+        engine={'pairs': pairs, 'home_currency': 'JPY',
+            'equity': Decimal('1000000'), 'isBacktest': True,
+            'max_iters': 10 ** 6, 'heart_beat': 0},
+        datafeed={'module_name': 'HistoricCSVDataFeeder',
+            'params': {'csv_dir': './tests/datafeed'}},
+        execution={'module_name': 'TickDrivenExecution', 'params': {}},
+        strategy={'module_name': 'VectorizedMovingAverageCrossStrategy',
+            'params': {'short_window': 1, 'long_window': 2}},
+        result={'module_name': 'InMemoryResultHandler', 'params': {}}
+    ).run()
+    assert isinstance(result, InMemoryResultHandler)
+
+    columns = HistoricCSVDataFeeder(pairs, Queue(),
+        './tests/datafeed').load_columns()
+    signals = VectorizedMovingAverageCrossStrategy(pairs, Queue(),
+        short_window=1, long_window=2).generate_signals(columns)
+    equity, execution = VectorizedBacktest(columns, 'JPY',
+        Decimal('1000000')).run(signals)
+    pd.testing.assert_frame_equal(result.equity(), equity, rtol=1e-9)
+    pd.testing.assert_frame_equal(result.execution(),
+        execution.astype({'Units': np.float64, 'Price': np.float64}))
@@ -0,0 +1,124 @@
+from savoia.execution.coalescer import OrderCoalescer
+from savoia.event.event import OrderEvent, FillEvent, TickEvent
+from savoia.ticker.ticker import Ticker
+
+from decimal import Decimal
+from typing import Optional, Tuple
+import pandas as pd
+
+
+def _setup(window: float = 0, ticks: int = 0) \
+        -> Tuple[Ticker, OrderCoalescer]:
+    ticker = Ticker(['USDJPY'])
+    _tick(ticker, None, '2020-07-10 20:59:32')
+    return ticker, OrderCoalescer(ticker, window, ticks)
+
+
+def _tick(ticker: Ticker, coalescer: Optional[OrderCoalescer],
+        time: str) -> None:
+    tick = TickEvent('USDJPY', pd.Timestamp(time), Decimal('107.88'),
+        Decimal('107.90'))
+    ticker.update_ticker(tick)
+    if coalescer is not None:
+        coalescer.on_tick(tick)
+
+
+def _order(ref: str, units: str, strategy: str = '',
+        order_type: str = 'market') -> OrderEvent:
+    return OrderEvent(ref=ref, pair='USDJPY',
+        time=pd.Timestamp('2020-07-10 20:59:32'), order_type=order_type,
+        units=Decimal(units), price=Decimal('107.90'), strategy=strategy)
+
+
+def test_net_and_allocate() -> None:
+    """Units crossed should be filled at the mid, and the fill of the net
+    allocated back pro rata"""
+    ticker, coalescer = _setup()
+    assert coalescer.add(_order('A', '100', 'a'))
+    assert coalescer.add(_order('B', '300', 'b'))
+    assert coalescer.add(_order('C', '-200', 'c'))
+    assert not coalescer.add(_order('D', '100', 'd', 'limit'))
+    orders, fills = coalescer.due()
+    assert coalescer.held == {}
+    assert [(f.ref, f.units, f.price, f.status, f.strategy) for f in fills] \
+        == [('A', Decimal('50'), Decimal('107.89'), 'partial', 'a'),
+            ('B', Decimal('150'), Decimal('107.89'), 'partial', 'b'),
+            ('C', Decimal('-200'), Decimal('107.89'), 'filled', 'c')]
+    assert len(orders) == 1
+    net = orders[0]
+    assert (net.units, net.order_type) == (Decimal('200'), 'market')
+
+    fills = coalescer.allocate(FillEvent(net.ref, 'USDJPY',
+        pd.Timestamp('2020-07-10 20:59:33'), Decimal('80'), Decimal('107.95'),
+        'partial'))
+    assert [(f.ref, f.units, f.status) for f in fills] == \
+        [('A', Decimal('20'), 'partial'), ('B', Decimal('60'), 'partial')]
+    fills = coalescer.allocate(FillEvent(net.ref, 'USDJPY',
+        pd.Timestamp('2020-07-10 20:59:33'), Decimal('120'),
+        Decimal('107.96'), 'partial'))
+    assert [(f.ref, f.units, f.price, f.status) for f in fills] == \
+        [('A', Decimal('30'), Decimal('107.96'), 'filled'),
+            ('B', Decimal('90'), Decimal('107.96'), 'filled')]
+    assert coalescer.nets == {}
+    other = FillEvent('X', 'USDJPY', pd.Timestamp('2020-07-10 20:59:33'),
+        Decimal('1'), Decimal('1'), 'filled')
+    assert coalescer.allocate(other) == [other]
+
+
+def test_net_zero_and_single() -> None:
+    ticker, coalescer = _setup()
+    coalescer.add(_order('A', '100'))
+    coalescer.add(_order('B', '-100'))
+    orders, fills = coalescer.due()
+    assert orders == [] and len(fills) == 2
+    single = _order('C', '100')
+    coalescer.add(single)
+    assert coalescer.due() == ([single], [])
+
+
+def test_window() -> None:
+    """Orders should be released once either the window or the ticks have
+    passed"""
+    ticker, coalescer = _setup(window=2, ticks=5)
+    coalescer.add(_order('A', '100'))
+    _tick(ticker, coalescer, '2020-07-10 20:59:33')
+    _tick(ticker, coalescer, '2020-07-10 20:59:33.5')
+    assert coalescer.due() == ([], [])
+    _tick(ticker, coalescer, '2020-07-10 20:59:34')
+    assert [o.ref for o in coalescer.due()[0]] == ['A']
+    ticker, coalescer = _setup(window=60, ticks=3)
+    coalescer.add(_order('B', '100'))
+    _tick(ticker, coalescer, '2020-07-10 20:59:33')
+    _tick(ticker, coalescer, '2020-07-10 20:59:33.5')
+    assert coalescer.due() == ([], [])
+    _tick(ticker, coalescer, '2020-07-10 20:59:34')
+    assert [o.ref for o in coalescer.due()[0]] == ['B']
+
+
+def test_window_only() -> None:
+    ticker, coalescer = _setup(window=2)
+    coalescer.add(_order('A', '100'))
+    _tick(ticker, coalescer, '2020-07-10 20:59:33')
+    assert coalescer.due() == ([], [])
+    _tick(ticker, coalescer, '2020-07-10 20:59:34')
+    assert [o.ref for o in coalescer.due()[0]] == ['A']
+
+
+def test_no_cross() -> None:
+    """Without crossing, orders of each side should be merged without
+    netting the sides"""
+    ticker = Ticker(['USDJPY'])
+    _tick(ticker, None, '2020-07-10 20:59:32')
+    coalescer = OrderCoalescer(ticker, cross=False)
+    coalescer.add(_order('A', '100', 'a'))
+    coalescer.add(_order('B', '300', 'b'))
+    coalescer.add(_order('C', '-200', 'c'))
+    orders, fills = coalescer.due()
+    assert fills == []
+    assert [o.units for o in orders] == [Decimal('400'), Decimal('-200')]
+    assert orders[1].ref == 'C'
+    fills = coalescer.allocate(FillEvent(orders[0].ref, 'USDJPY',
+        pd.Timestamp('2020-07-10 20:59:33'), Decimal('400'),
+        Decimal('107.95'), 'filled'))
+    assert [(f.ref, f.units, f.status) for f in fills] == \
+        [('A', Decimal('100'), 'filled'), ('B', Decimal('300'), 'filled')]
@@ -0,0 +1,36 @@
+from savoia.execution.connection import ConnectionPool, RateLimiter
+
+import threading
+import time
+
+
+def test_rate_limiter() -> None:
+    """Requests beyond the burst should be spaced out at the rate"""
+    limiter = RateLimiter(rate=50, burst=2)
+    start = time.monotonic()
+    for _ in range(7):
+        limiter.acquire()
+    assert 0.09 <= time.monotonic() - start < 0.5
+
+
+def test_rate_limiter_threads() -> None:
+    limiter = RateLimiter(rate=100, burst=1)
+    threads = [threading.Thread(target=limiter.acquire) for _ in range(11)]
+    start = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert 0.09 <= time.monotonic() - start < 0.5
+
+
+def test_connection_pool() -> None:
+    """Connections should be reused, and no more than size be created"""
+    pool = ConnectionPool('127.0.0.1', 1, ssl=False, size=2)
+    first = pool.acquire()
+    second = pool.acquire()
+    pool.release(first)
+    assert pool.acquire() is first
+    pool.release(second, reuse=False)
+    assert pool.acquire() is not second
+    pool.close()
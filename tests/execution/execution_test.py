@@ -1,12 +1,19 @@
 import pytest
 
-from savoia.execution.execution import SimulatedExecution
-from savoia.event.event import Event, OrderEvent, FillEvent
+from savoia.execution.execution import SimulatedExecution, \
+    TickDrivenExecution, OANDAExecution
+from savoia.execution.mock_broker import MockBroker
+from savoia.event.event import Event, OrderEvent, OrderBatchEvent, \
+    FillEvent, TickEvent
+from savoia.ticker.ticker import Ticker
 
 from queue import Queue
-from typing import Tuple
+from typing import Iterator, List, Tuple
 from decimal import Decimal
 import pandas as pd
+import socket
+import threading
+import time
 
 
 # ================================================================
@@ -45,3 +52,273 @@ def test_return_fill_event(setupSE: Tuple['Queue[Event]', 'Queue[Event]',
     assert fe.pair == 'USDJPY'
     assert fe.units == Decimal('0.5')
     assert fe.status == 'filled'
+
+
+def test_execute_orders_seeded() -> None:
+    """Batches should be filled together, reproducibly with a seed"""
+    orders = [OrderEvent(ref=f'ID{i}', pair='USDJPY',
+        time=pd.Timestamp('2020-07-10 20:59:32'), order_type='market',
+        units=Decimal('100'), price=Decimal('107.89')) for i in range(3)]
+    fills = SimulatedExecution(Queue(), Queue(), seed=1).execute_orders(orders)
+    assert [f.ref for f in fills] == ['ID0', 'ID1', 'ID2']
+    event_q: 'Queue[Event]' = Queue()
+    exec_q: 'Queue[Event]' = Queue()
+    exec_q.put(OrderBatchEvent(orders))
+    exec_q.put(None)
+    SimulatedExecution(event_q, exec_q, seed=1).run()
+    assert [(f.price, f.time) for f in fills] == \
+        [(f.price, f.time) for f in [event_q.get(False) for _ in orders]]
+
+
+# ================================================================
+# TickDrivenExecution
+# ================================================================
+def _tick(pair: str, time: str, bid: str, ask: str) -> TickEvent:
+    return TickEvent(pair, pd.Timestamp(time), Decimal(bid), Decimal(ask))
+
+
+def _order(units: str, order_type: str = 'market') -> OrderEvent:
+    return OrderEvent(ref='ID1234', pair='USDJPY',
+        time=pd.Timestamp('2020-07-10 20:59:32'), order_type=order_type,
+        units=Decimal(units), price=Decimal('107.89'))
+
+
+def test_tick_driven_fill_at_latest_prices() -> None:
+    """Orders should be filled at the latest prices without latency"""
+    event_q: 'Queue[Event]' = Queue()
+    ticker = Ticker(['USDJPY'])
+    ticker.update_ticker(_tick('USDJPY', '2020-07-10 20:59:32', '107.88',
+        '107.90'))
+    te = TickDrivenExecution(event_q, Queue(), ticker)
+    assert te.inline
+    te.execute_order(_order('100'))
+    te.execute_order(_order('-100'))
+    buy: FillEvent = event_q.get(False)
+    sell: FillEvent = event_q.get(False)
+    assert (buy.price, buy.time) == (Decimal('107.90'),
+        pd.Timestamp('2020-07-10 20:59:32'))
+    assert (buy.units, sell.units) == (Decimal('100'), Decimal('-100'))
+    assert sell.price == Decimal('107.88')
+
+
+def test_tick_driven_fill_after_latency() -> None:
+    """Orders should be filled by the first tick of the pair at or after the
+    latency"""
+    event_q: 'Queue[Event]' = Queue()
+    te = TickDrivenExecution(event_q, Queue(), Ticker(['USDJPY', 'GBPUSD']),
+        latency=Decimal('5'))
+    te.execute_order(_order('100'))
+    te.execute_order(_order('-50', 'limit'))
+    te.on_tick(_tick('USDJPY', '2020-07-10 20:59:36', '107.80', '107.82'))
+    te.on_tick(_tick('GBPUSD', '2020-07-10 20:59:37', '1.25', '1.26'))
+    assert event_q.empty()
+    te.on_tick(_tick('USDJPY', '2020-07-10 20:59:37', '107.70', '107.72'))
+    fe: FillEvent = event_q.get(False)
+    assert (fe.ref, fe.units, fe.price, fe.time) == ('ID1234',
+        Decimal('100'), Decimal('107.72'), pd.Timestamp('2020-07-10 20:59:37'))
+    te.on_tick(_tick('USDJPY', '2020-07-10 20:59:38', '107.70', '107.72'))
+    assert event_q.empty()
+
+
+def test_tick_driven_resting_orders() -> None:
+    """Limit and stop orders should rest until triggered, and be filled at
+    the prices of the triggering tick"""
+    event_q: 'Queue[Event]' = Queue()
+    ticker = Ticker(['USDJPY'])
+    ticker.update_ticker(_tick('USDJPY', '2020-07-10 20:59:32', '107.98',
+        '108.00'))
+    te = TickDrivenExecution(event_q, Queue(), ticker)
+    te.execute_order(_order('100', 'limit'))
+    te.execute_order(OrderEvent(ref='ID5678', pair='USDJPY',
+        time=pd.Timestamp('2020-07-10 20:59:32'), order_type='stop',
+        units=Decimal('-100'), price=Decimal('107.80')))
+    te.on_tick(_tick('USDJPY', '2020-07-10 20:59:33', '107.90', '107.92'))
+    assert event_q.empty()
+    te.on_tick(_tick('USDJPY', '2020-07-10 20:59:34', '107.80', '107.82'))
+    buy: FillEvent = event_q.get(False)
+    sell: FillEvent = event_q.get(False)
+    assert (buy.ref, buy.price) == ('ID1234', Decimal('107.82'))
+    assert (sell.ref, sell.price) == ('ID5678', Decimal('107.80'))
+    assert event_q.empty()
+
+    te.execute_order(_order('100', 'limit'))
+    te.execute_order(_order('100', 'cancel'))
+    te.on_tick(_tick('USDJPY', '2020-07-10 20:59:35', '107.70', '107.72'))
+    assert event_q.empty()
+
+
+def test_tick_driven_execute_orders() -> None:
+    """Fills of a batch should be returned rather than put onto event_q"""
+    event_q: 'Queue[Event]' = Queue()
+    ticker = Ticker(['USDJPY'])
+    ticker.update_ticker(_tick('USDJPY', '2020-07-10 20:59:32', '107.88',
+        '107.90'))
+    te = TickDrivenExecution(event_q, Queue(), ticker)
+    stop, limit = _order('-100', 'stop'), _order('100', 'limit')
+    stop.ref, limit.ref = 'ID1', 'ID2'
+    fills = te.execute_orders([_order('100'), stop, limit])
+    assert [(f.units, f.price) for f in fills] == [
+        (Decimal('100'), Decimal('107.90')),
+        (Decimal('-100'), Decimal('107.88'))]
+    assert len(te.books['USDJPY']) == 1
+    assert event_q.empty()
+
+
+# ================================================================
+# OANDAExecution
+# ================================================================
+@pytest.fixture(scope='function')
+def broker() -> Iterator[MockBroker]:
+    broker = MockBroker({'USD_JPY': (Decimal('107.88'), Decimal('107.90'))})
+    broker.start()
+    yield broker
+    broker.stop()
+
+
+def _run_oanda(broker: MockBroker, orders: List[OrderEvent],
+        **params: float) -> Tuple[List[FillEvent], float]:
+    '''Executes the orders on the broker, and returns the fills with the
+    seconds elapsed.'''
+    assert broker.server is not None
+    event_q: 'Queue[Event]' = Queue()
+    exec_q: 'Queue[Event]' = Queue()
+    oe = OANDAExecution(event_q, exec_q, '127.0.0.1', 'token', '001',
+        port=broker.server.server_address[1], ssl=False, backoff=0.01,
+        **params)
+    thread = threading.Thread(target=oe.run)
+    start = time.time()
+    thread.start()
+    for order in orders:
+        exec_q.put(order)
+    exec_q.put(None)
+    thread.join()
+    elapsed = time.time() - start
+    return [event_q.get(False) for _ in range(event_q.qsize())], elapsed
+
+
+def test_oanda_fill_concurrently(broker: MockBroker) -> None:
+    """Orders should be sent concurrently over the pooled connections"""
+    broker.latency = 0.1
+    orders = [OrderEvent(ref=f'ID{i}', pair='USDJPY',
+        time=pd.Timestamp('2020-07-10 20:59:32'), order_type='market',
+        units=Decimal(100 if i % 2 else -100), price=Decimal('107.89'))
+        for i in range(8)]
+    fills, elapsed = _run_oanda(broker, orders, pool_size=4)
+    assert elapsed < 0.8
+    assert broker.connections <= 4
+    assert sorted((f.ref, f.units, f.price, f.status) for f in fills) == \
+        sorted((o.ref, o.units, Decimal('107.90') if o.units > 0 else
+            Decimal('107.88'), 'filled') for o in orders)
+
+
+def test_oanda_execute_orders(broker: MockBroker) -> None:
+    assert broker.server is not None
+    oe = OANDAExecution(Queue(), Queue(), '127.0.0.1', 'token', '001',
+        port=broker.server.server_address[1], ssl=False)
+    fills = oe.execute_orders([_order('100'), _order('-100', 'limit'),
+        OrderEvent(ref='ID5678', pair='USDJPY',
+            time=pd.Timestamp('2020-07-10 20:59:32'), order_type='market',
+            units=Decimal('-50'), price=Decimal('107.89'))])
+    oe.executor.shutdown()
+    assert [(f.ref, f.units, f.price) for f in fills] == [
+        ('ID1234', Decimal('100'), Decimal('107.90')),
+        ('ID5678', Decimal('-50'), Decimal('107.88'))]
+
+
+def test_oanda_retry(broker: MockBroker) -> None:
+    broker.failures = 2
+    fills, _ = _run_oanda(broker, [_order('100')])
+    assert len(broker.requests) == 3
+    assert [(f.ref, f.price, f.status) for f in fills] == \
+        [('ID1234', Decimal('107.90'), 'filled')]
+
+
+def test_oanda_rejected(broker: MockBroker) -> None:
+    """Orders failed should be put as rejected with no units"""
+    broker.failures = 10
+    fills, _ = _run_oanda(broker, [_order('100')], max_retries=1)
+    assert len(broker.requests) == 2
+    assert [(f.ref, f.units, f.status) for f in fills] == \
+        [('ID1234', Decimal('0'), 'rejected')]
+
+
+def test_oanda_resting_orders(broker: MockBroker) -> None:
+    fills, _ = _run_oanda(broker, [_order('100', 'stop'),
+        _order('50', 'replace'), _order('50', 'cancel')], pool_size=1)
+    assert fills == []
+    assert [(m, p, b.get('order', {}).get('type'))
+        for m, p, b in broker.requests] == [
+        ('POST', '/v3/accounts/001/orders', 'STOP'),
+        ('PUT', '/v3/accounts/001/orders/@ID1234', 'STOP'),
+        ('PUT', '/v3/accounts/001/orders/@ID1234/cancel', None)]
+
+
+def test_oanda_no_resend(broker: MockBroker) -> None:
+    """POSTs failed after the broker may have taken them should be looked
+    up rather than sent again"""
+    broker.failure_status = 500
+    broker.failures = 1
+    fills, _ = _run_oanda(broker, [_order('100')])
+    assert [(m, p) for m, p, _ in broker.requests] == [
+        ('POST', '/v3/accounts/001/orders'),
+        ('GET', '/v3/accounts/001/orders/@ID1234')]
+    assert [(f.ref, f.units, f.status) for f in fills] == \
+        [('ID1234', Decimal('0'), 'rejected')]
+
+
+def test_oanda_lost_response(broker: MockBroker) -> None:
+    """Orders taken by the broker despite a failed response should be
+    filled once"""
+    broker.lost = 1
+    fills, _ = _run_oanda(broker, [_order('100')])
+    assert [m for m, p, _ in broker.requests].count('POST') == 1
+    assert [(f.ref, f.units, f.price, f.status) for f in fills] == \
+        [('ID1234', Decimal('100'), Decimal('107.90'), 'filled')]
+
+
+def test_oanda_connect_error() -> None:
+    """Requests failed to connect should be retried, as never sent"""
+    server = socket.socket()
+    server.bind(('127.0.0.1', 0))
+    port = server.getsockname()[1]
+    server.close()
+    oe = OANDAExecution(Queue(), Queue(), '127.0.0.1', 'token', '001',
+        port=port, ssl=False, backoff=0.01, max_retries=2)
+    fills = oe.execute_orders([_order('100')])
+    oe.executor.shutdown()
+    assert [(f.ref, f.status) for f in fills] == [('ID1234', 'rejected')]
+
+
+def test_oanda_partial_market(broker: MockBroker) -> None:
+    """The units of a market order not filled should be put as cancelled,
+    so that the order completes"""
+    broker.liquidity = Decimal('60')
+    fills, _ = _run_oanda(broker, [_order('100')])
+    assert [(f.ref, f.units, f.status) for f in fills] == \
+        [('ID1234', Decimal('60'), 'partial'),
+            ('ID1234', Decimal('0'), 'cancelled')]
+
+
+def test_oanda_poll_fills(broker: MockBroker) -> None:
+    """Fills of working orders should be polled from the transactions"""
+    assert broker.server is not None
+    event_q: 'Queue[Event]' = Queue()
+    exec_q: 'Queue[Event]' = Queue()
+    oe = OANDAExecution(event_q, exec_q, '127.0.0.1', 'token', '001',
+        port=broker.server.server_address[1], ssl=False, poll=0.01)
+    thread = threading.Thread(target=oe.run)
+    thread.start()
+    exec_q.put(_order('100', 'limit'))
+    while 'ID1234' not in oe.working:
+        time.sleep(0.01)
+    broker.fill('ID1234', Decimal('40'))
+    first = event_q.get(timeout=5)
+    broker.fill('ID1234', Decimal('60'))
+    second = event_q.get(timeout=5)
+    exec_q.put(None)
+    thread.join()
+    assert [(f.units, f.price, f.status) for f in [first, second]] == \
+        [(Decimal('40'), Decimal('107.89'), 'partial'),
+            (Decimal('60'), Decimal('107.89'), 'filled')]
+    assert oe.working == {} and oe.resting == {}
+    assert event_q.empty()
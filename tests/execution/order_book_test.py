@@ -0,0 +1,80 @@
+from savoia.execution.order_book import OrderBook
+from savoia.event.event import OrderEvent
+
+from decimal import Decimal
+import pandas as pd
+import pytest
+
+
+def _order(ref: str, order_type: str, units: str, price: str) -> OrderEvent:
+    return OrderEvent(ref=ref, pair='USDJPY',
+        time=pd.Timestamp('2020-07-10 20:59:32'), order_type=order_type,
+        units=Decimal(units), price=Decimal(price))
+
+
+@pytest.mark.parametrize('order_type, units, price, bid, ask, expected', [
+    ('limit', '100', '107.50', '107.48', '107.50', True),
+    ('limit', '100', '107.50', '107.49', '107.51', False),
+    ('limit', '-100', '107.50', '107.50', '107.52', True),
+    ('limit', '-100', '107.50', '107.49', '107.51', False),
+    ('stop', '100', '107.50', '107.48', '107.50', True),
+    ('stop', '100', '107.50', '107.47', '107.49', False),
+    ('stop', '-100', '107.50', '107.50', '107.52', True),
+    ('stop', '-100', '107.50', '107.51', '107.53', False),
+])
+def test_match_trigger(order_type: str, units: str, price: str, bid: str,
+        ask: str, expected: bool) -> None:
+    """Buy orders should trigger on the ask and sell orders on the bid"""
+    book = OrderBook('USDJPY')
+    book.add(_order('ID1', order_type, units, price), 1)
+    matched = book.match(Decimal(bid), Decimal(ask))
+    assert (len(matched) == 1) == expected
+    assert len(book) == (0 if expected else 1)
+
+
+def test_match_in_order_of_seq() -> None:
+    book = OrderBook('USDJPY')
+    book.add(_order('ID1', 'stop', '-100', '107.00'), 1)
+    book.add(_order('ID2', 'limit', '100', '107.20'), 2)
+    book.add(_order('ID3', 'limit', '100', '107.40'), 3)
+    book.add(_order('ID4', 'limit', '100', '106.00'), 4)
+    matched = book.match(Decimal('106.98'), Decimal('107.00'))
+    assert [o.ref for o in matched] == ['ID1', 'ID2', 'ID3']
+    assert list(book.orders.keys()) == ['ID4']
+
+
+def test_cancel_and_replace() -> None:
+    """Cancelled orders should never be matched, and replaced orders should
+    keep their type with the new price and units"""
+    book = OrderBook('USDJPY')
+    book.add(_order('ID1', 'limit', '100', '107.00'), 1)
+    book.add(_order('ID2', 'limit', '100', '107.00'), 2)
+    assert book.cancel('ID1') is not None
+    assert book.cancel('ID1') is None
+    old = book.replace(_order('ID2', 'replace', '50', '106.00'), 3)
+    assert old is not None and old.price == Decimal('107.00')
+    assert book.replace(_order('ID9', 'replace', '50', '106.00'), 4) is None
+    assert book.match(Decimal('106.98'), Decimal('107.00')) == []
+    matched = book.match(Decimal('105.98'), Decimal('106.00'))
+    assert [(o.ref, o.order_type, o.units) for o in matched] == \
+        [('ID2', 'limit', Decimal('50'))]
+    assert len(book) == 0
+
+
+def test_compaction() -> None:
+    """Dead entries should be dropped from the heaps once they outnumber the
+    resting orders"""
+    book = OrderBook('USDJPY')
+    for i in range(200):
+        book.add(_order(f'ID{i}', 'limit', '100', '100'), i)
+    for i in range(150):
+        book.cancel(f'ID{i}')
+    assert len(book) == 50
+    assert sum(len(h) for h in book._heaps.values()) <= 50 + 64 + 1
+    matched = book.match(Decimal('99'), Decimal('100'))
+    assert [o.ref for o in matched] == [f'ID{i}' for i in range(150, 200)]
+
+
+def test_unexpected_order_type() -> None:
+    with pytest.raises(Exception):
+        OrderBook('USDJPY').add(_order('ID1', 'market', '100', '100'), 1)
@@ -0,0 +1,72 @@
+from savoia.execution.order_registry import OrderRegistry
+from savoia.event.event import OrderEvent, FillEvent
+
+from decimal import Decimal
+import pandas as pd
+
+
+def _order(ref: str, units: str, order_type: str = 'market') -> OrderEvent:
+    return OrderEvent(ref=ref, pair='USDJPY',
+        time=pd.Timestamp('2020-07-10 20:59:32'), order_type=order_type,
+        units=Decimal(units), price=Decimal('107.89'))
+
+
+def _fill(ref: str, units: str, price: str, status: str = 'filled') \
+        -> FillEvent:
+    return FillEvent(ref=ref, pair='USDJPY',
+        time=pd.Timestamp('2020-07-10 20:59:33'), units=Decimal(units),
+        price=Decimal(price), status=status)
+
+
+def test_fill() -> None:
+    """Orders should stay in flight until filled, accumulating partial
+    fills"""
+    reg = OrderRegistry()
+    reg.submit(_order('ID1', '100'), 0)
+    reg.submit(_order('ID2', '-100'), 0)
+    assert len(reg) == 2 and 'ID1' in reg
+    in_flight = reg.fill(_fill('ID1', '40', '107.00', 'partial'))
+    assert in_flight is not None and in_flight.status == 'partial'
+    in_flight = reg.fill(_fill('ID1', '60', '108.00', 'partial'))
+    assert in_flight is not None and in_flight.status == 'filled'
+    assert (in_flight.units, in_flight.price) == \
+        (Decimal('100'), Decimal('107.6'))
+    in_flight = reg.fill(_fill('ID2', '-50', '107.00', 'rejected'))
+    assert in_flight is not None and in_flight.status == 'rejected'
+    assert reg.fill(_fill('ID2', '-50', '107.00')) is None
+    assert reg.report() == {'submitted': 2, 'filled': 1, 'rejected': 1,
+        'in_flight': 0}
+
+
+def test_expire() -> None:
+    """Only the orders due should expire, and not those completed or
+    resubmitted since"""
+    reg = OrderRegistry(timeout=5)
+    reg.submit(_order('ID1', '100'), 0)
+    reg.submit(_order('ID2', '100'), 1)
+    reg.submit(_order('ID3', '100'), 2)
+    reg.fill(_fill('ID2', '100', '107.00'))
+    reg.submit(_order('ID3', '100', 'replace'), 3)
+    reg.submit(_order('ID1', '200'), 4)
+    assert reg.next_expiry(4) == 3
+    assert reg.expire(6) == []
+    expired = reg.expire(7)
+    assert [(i.order.ref, i.status) for i in expired] == [('ID3', 'expired')]
+    assert reg.next_expiry(7) == 2
+    assert [i.order.ref for i in reg.expire(10)] == ['ID1']
+    assert reg.next_expiry(10) is None
+    assert reg.report() == {'submitted': 4, 'filled': 1, 'resubmitted': 1,
+        'expired': 2, 'in_flight': 0}
+
+
+def test_cancel_and_replace() -> None:
+    reg = OrderRegistry()
+    reg.submit(_order('ID1', '100', 'limit'), 0)
+    reg.submit(_order('ID1', '50', 'replace'), 1)
+    in_flight = reg.get('ID1')
+    assert in_flight is not None
+    assert (in_flight.order.order_type, in_flight.order.units) == \
+        ('limit', Decimal('50'))
+    reg.submit(_order('ID1', '0', 'cancel'), 2)
+    assert len(reg) == 0
+    assert reg.report() == {'submitted': 1, 'cancelled': 1, 'in_flight': 0}
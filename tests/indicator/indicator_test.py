@@ -0,0 +1,149 @@
+import pytest
+from savoia.indicator.indicator import RingBuffer, SMA, EMA, \
+    RollingVariance, RollingStd, RollingMax, RollingMin, RSI, ATR, Indicator
+
+from decimal import Decimal
+import numpy as np
+import pandas as pd
+from typing import Any, Callable, List, Optional
+
+
+@pytest.fixture(scope='module')
+def prices() -> np.ndarray:
+    rng = np.random.RandomState(42)
+    return np.round(100 + np.cumsum(rng.normal(0, 0.5, 300)), 3)
+
+
+def _feed(ind: 'Indicator[Any]', values: np.ndarray) -> List[Optional[float]]:
+    return [None if v is None else float(v)
+            for v in (ind.update(x) for x in values)]
+
+
+def _expected(series: pd.Series) -> List[Optional[float]]:
+    return [None if np.isnan(v) else v for v in series]
+
+
+def _wilder(values: np.ndarray, window: int) -> np.ndarray:
+    """Reference implementation of Wilder's smoothing, NaN until ready"""
+    out = np.full(len(values), np.nan)
+    avg = values[:window].mean()
+    out[window - 1] = avg
+    for i in range(window, len(values)):
+        avg = (avg * (window - 1) + values[i]) / window
+        out[i] = avg
+    return out
+
+
+# ---------------------------------------------------------------
+# RingBuffer
+# ---------------------------------------------------------------
+def test_ring_buffer() -> None:
+    rb = RingBuffer(3)
+    assert [rb.push(v) for v in [1.0, 2.0, 3.0, 4.0, 5.0]] == \
+        [None, None, None, 1.0, 2.0]
+    assert list(rb.values()) == [3.0, 4.0, 5.0]
+    rb_d: 'RingBuffer[Decimal]' = RingBuffer(3, decimal=True)
+    rb_d.push(Decimal('1.1'))
+    assert list(rb_d.values()) == [Decimal('1.1')]
+    with pytest.raises(Exception):
+        RingBuffer(0)
+
+
+# ---------------------------------------------------------------
+# Indicators
+# ---------------------------------------------------------------
+def test_sma(prices: np.ndarray) -> None:
+    actual = _feed(SMA(20), prices)
+    expected = _expected(pd.Series(prices).rolling(20).mean())
+    assert actual == pytest.approx(expected)
+
+
+def test_ema(prices: np.ndarray) -> None:
+    actual = _feed(EMA(20), prices)
+    expected = pd.Series(prices).ewm(span=20, adjust=False).mean()
+    expected[:19] = np.nan
+    assert actual == pytest.approx(_expected(expected))
+
+
+@pytest.mark.parametrize('cls, ddof, method', [
+    (RollingVariance, 1, 'var'), (RollingVariance, 0, 'var'),
+    (RollingStd, 1, 'std')])
+def test_rolling_variance(prices: np.ndarray, cls: type, ddof: int,
+        method: str) -> None:
+    actual = _feed(cls(20, ddof=ddof), prices)
+    expected = getattr(pd.Series(prices).rolling(20), method)(ddof=ddof)
+    assert actual == pytest.approx(_expected(expected))
+
+
+@pytest.mark.parametrize('cls, method', [(RollingMax, 'max'),
+                                         (RollingMin, 'min')])
+def test_rolling_min_max(prices: np.ndarray, cls: type, method: str) -> None:
+    actual = _feed(cls(15), prices)
+    expected = getattr(pd.Series(prices).rolling(15), method)()
+    assert actual == _expected(expected)
+
+
+def test_rsi(prices: np.ndarray) -> None:
+    changes = np.diff(prices)
+    gain = _wilder(np.maximum(changes, 0), 14)
+    loss = _wilder(np.maximum(-changes, 0), 14)
+    expected = np.concatenate([[np.nan], 100 - 100 / (1 + gain / loss)])
+    actual = _feed(RSI(14), prices)
+    assert actual == pytest.approx(_expected(pd.Series(expected)))
+
+
+def test_rsi_no_loss() -> None:
+    assert _feed(RSI(2), np.array([1.0, 2.0, 3.0])) == [None, None, 100.0]
+
+
+def test_atr(prices: np.ndarray) -> None:
+    highs = prices + 0.2
+    lows = prices - 0.3
+    closes = prices
+    tr = highs - lows
+    tr[1:] = np.maximum.reduce([tr[1:], np.abs(highs[1:] - closes[:-1]),
+                                np.abs(lows[1:] - closes[:-1])])
+    expected = _wilder(tr, 14)
+    atr = ATR(14)
+    actual = [atr.update(h, l, c) for h, l, c in zip(highs, lows, closes)]
+    assert actual == pytest.approx(_expected(pd.Series(expected)))
+    # Single price series of ticks
+    tick_atr = ATR(14)
+    actual = _feed(tick_atr, prices)
+    expected = _wilder(np.concatenate([[0], np.abs(np.diff(prices))]), 14)
+    assert actual == pytest.approx(_expected(pd.Series(expected)))
+
+
+@pytest.mark.parametrize('factory', [
+    lambda d: SMA(20, decimal=d), lambda d: EMA(20, decimal=d),
+    lambda d: RollingStd(20, decimal=d), lambda d: RollingMax(20, decimal=d),
+    lambda d: RollingMin(20, decimal=d), lambda d: RSI(14, decimal=d),
+    lambda d: ATR(14, decimal=d)])
+def test_decimal(prices: np.ndarray,
+        factory: Callable[[bool], 'Indicator[Any]']) -> None:
+    """Decimal variants should agree with float ones, returning Decimal"""
+    ind_f = factory(False)
+    ind_d = factory(True)
+    for p in prices:
+        vf = ind_f.update(p)
+        vd = ind_d.update(Decimal(str(p)))
+    assert isinstance(vd, Decimal)
+    assert float(vd) == pytest.approx(vf)
+
+
+@pytest.mark.parametrize('factory', [
+    lambda: SMA(20), lambda: EMA(20), lambda: RollingVariance(20),
+    lambda: RollingStd(20), lambda: RollingMax(20), lambda: RollingMin(20),
+    lambda: RSI(14), lambda: ATR(14), lambda: SMA(20, decimal=True)])
+@pytest.mark.parametrize('split', [5, 100, 250])
+def test_warm_up(prices: np.ndarray, factory: Callable[[], 'Indicator[Any]'],
+        split: int) -> None:
+    """warm_up followed by updates should match updates only"""
+    expected = factory()
+    actual = factory()
+    _feed(expected, prices)
+    actual.warm_up(prices[:split])
+    assert actual.count == split
+    _feed(actual, prices[split:])
+    assert actual.value is not None and expected.value is not None
+    assert float(actual.value) == pytest.approx(float(expected.value))
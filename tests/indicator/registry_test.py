@@ -0,0 +1,95 @@
+from savoia.indicator.indicator import SMA, ATR
+from savoia.indicator.registry import IndicatorRegistry
+from savoia.event.event import TickEvent
+
+from decimal import Decimal
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def _tick(pair: str, bid: str, ask: str) -> TickEvent:
+    return TickEvent(pair, pd.Timestamp(0), Decimal(bid), Decimal(ask))
+
+
+def test_subscribe_shares_indicator() -> None:
+    reg = IndicatorRegistry()
+    a, b = object(), object()
+    key_a = reg.subscribe(a, 'USDJPY', 'SMA', 'bid', window=2)
+    key_b = reg.subscribe(b, 'USDJPY', 'SMA', 'bid', window=2)
+    key_c = reg.subscribe(b, 'USDJPY', 'SMA', 'ask', window=2)
+    assert key_a == key_b
+    assert key_a != key_c
+    assert reg.get(key_a) is reg.get(key_b)
+    assert len(reg.indicators) == 2
+
+
+def test_update_once_per_tick() -> None:
+    reg = IndicatorRegistry()
+    a, b = object(), object()
+    key = reg.subscribe(a, 'USDJPY', 'SMA', 'mid', window=2, decimal=True)
+    reg.subscribe(b, 'USDJPY', 'SMA', 'mid', window=2, decimal=True)
+    atr = reg.subscribe(a, 'USDJPY', 'ATR', window=2)
+    reg.update(_tick('USDJPY', '100.0', '100.2'))
+    reg.update(_tick('GBPUSD', '1.2', '1.3'))
+    reg.update(_tick('USDJPY', '100.4', '100.6'))
+    assert reg.get(key).count == 2
+    assert reg.value(key) == Decimal('100.3')
+    ref = ATR(2)
+    ref.update(100.2, 100.0, 100.1)
+    ref.update(100.6, 100.4, 100.5)
+    assert reg.value(atr) == pytest.approx(ref.value)
+
+
+def test_unsubscribe_evicts_unused() -> None:
+    reg = IndicatorRegistry()
+    a, b = object(), object()
+    key = reg.subscribe(a, 'USDJPY', 'SMA', window=2)
+    reg.subscribe(b, 'USDJPY', 'SMA', window=2)
+    reg.unsubscribe(a, key)
+    assert key in reg.indicators
+    reg.unsubscribe(b, key)
+    assert key not in reg.indicators
+    assert reg._by_pair == {}
+    reg.update(_tick('USDJPY', '100.0', '100.2'))
+    # Subscribing again starts afresh.
+    key = reg.subscribe(a, 'USDJPY', 'SMA', window=2)
+    assert isinstance(reg.get(key), SMA)
+    assert reg.get(key).count == 0
+
+
+def test_release() -> None:
+    """Releasing a subscriber should unsubscribe all of its indicators"""
+    reg = IndicatorRegistry()
+    a, b = object(), object()
+    shared = reg.subscribe(a, 'USDJPY', 'SMA', window=2)
+    reg.subscribe(a, 'GBPUSD', 'SMA', window=2)
+    reg.subscribe(b, 'USDJPY', 'SMA', window=2)
+    reg.release(a)
+    assert list(reg.indicators) == [shared]
+    assert list(reg._by_pair) == ['USDJPY']
+    reg.release(b)
+    assert reg.indicators == {}
+    assert reg._keys == {}
+
+
+def test_subscribe_unexpected() -> None:
+    reg = IndicatorRegistry()
+    with pytest.raises(Exception):
+        reg.subscribe(object(), 'USDJPY', 'MACD')
+    with pytest.raises(Exception):
+        reg.subscribe(object(), 'USDJPY', 'SMA', 'last', window=2)
+
+
+def test_warm_up() -> None:
+    reg = IndicatorRegistry()
+    sma = reg.subscribe(object(), 'USDJPY', 'SMA', 'mid', window=2)
+    atr = reg.subscribe(object(), 'USDJPY', 'ATR', window=2)
+    other = reg.subscribe(object(), 'GBPUSD', 'SMA', window=2)
+    reg.warm_up({'USDJPY': {'time': np.arange(3),
+        'bid': np.array([100.0, 100.4, 100.2]),
+        'ask': np.array([100.2, 100.6, 100.4])}})
+    assert reg.value(sma) == pytest.approx(100.4)
+    assert reg.get(sma).count == 3
+    assert reg.get(atr).count == 3
+    assert reg.value(other) is None
@@ -0,0 +1,111 @@
+from savoia.portfolio.ledger import LotLedger
+from savoia.portfolio.position import Position
+from savoia.ticker.ticker import Ticker
+
+from decimal import Decimal
+import pytest
+
+
+def _fill(ledger: LotLedger, units: str, price: str, ref: str) -> Decimal:
+    return ledger.fill(Decimal(units), Decimal(price), ref)[0]
+
+
+def test_init_() -> None:
+    ledger = LotLedger()
+    assert ledger.method == 'fifo'
+    assert len(ledger.lots) == 0
+    assert ledger.avg_price == Decimal('0')
+    with pytest.raises(Exception):
+        LotLedger('hifo')
+
+
+# method, exp_realized, exp_lots(order_id, units, price), exp_by_lot
+data1 = [
+    ('fifo', '200', [('b', '50', '110')], {'b': Decimal('-300')}),
+    ('lifo', '-300', [('a', '50', '100')], {'a': Decimal('200')}),
+    ('average', '-50', [('a', '50', '105')], {'a': Decimal('-50')}),
+]
+
+
+@pytest.mark.parametrize('method, exp_realized, exp_lots, exp_by_lot', data1)
+def test_fill_partial_close(method: str, exp_realized: str, exp_lots: list,
+        exp_by_lot: dict) -> None:
+    ledger = LotLedger(method)
+    _fill(ledger, '100', '100', 'a')
+    _fill(ledger, '100', '110', 'b')
+    assert ledger.avg_price == Decimal('105')
+    realized = _fill(ledger, '-50', '106', 'c')
+    realized += _fill(ledger, '-100', '104', 'd')
+    assert realized == Decimal(exp_realized)
+    assert ledger.realized_by_lot == exp_by_lot
+    assert [(lot.order_id, lot.units, lot.exp_price)
+            for lot in ledger.lots] == \
+        [(i, Decimal(u), Decimal(p)) for i, u, p in exp_lots]
+    assert ledger.units == Decimal('50')
+    assert ledger.realized == realized
+
+
+def test_fill_closed_lots() -> None:
+    """fill should report each lot closed along with its realized PnL"""
+    ledger = LotLedger('fifo')
+    _fill(ledger, '100', '100', 'a')
+    _fill(ledger, '100', '110', 'b')
+    realized, closed = ledger.fill(Decimal('-150'), Decimal('106'), 'c')
+    assert realized == Decimal('400')
+    assert closed == [('a', Decimal('100'), Decimal('600')),
+                      ('b', Decimal('50'), Decimal('-200'))]
+    assert ledger.realized_by_lot == {'b': Decimal('-200')}
+
+
+def test_fill_flip() -> None:
+    """Remaining units of a fill crossing zero should open a new lot"""
+    ledger = LotLedger('lifo')
+    _fill(ledger, '-30', '1.5', 'a')
+    realized = _fill(ledger, '50', '1.4', 'b')
+    assert realized == Decimal('3.0')
+    assert [(lot.order_id, lot.units) for lot in ledger.lots] == \
+        [('b', Decimal('20'))]
+    assert ledger.avg_price == Decimal('1.4')
+
+
+def test_fill_many_lots() -> None:
+    ledger = LotLedger('fifo')
+    for i in range(5000):
+        _fill(ledger, '1', str(100 + i % 10), str(i))
+    realized = _fill(ledger, '-4999', '110', 'x')
+    assert len(ledger.lots) == 1
+    assert ledger.realized_by_lot == {}
+    assert ledger.units == Decimal('1')
+    assert realized == sum(Decimal(10 - i % 10) for i in range(4999))
+
+
+# ================================================================
+# Position
+# ================================================================
+def test_position_fifo() -> None:
+    ticker = Ticker(['USDJPY'])
+    ticker.prices['USDJPY']['bid'] = Decimal('105')
+    ticker.prices['USDJPY']['ask'] = Decimal('105.1')
+    ps = Position('JPY', 'USDJPY', ticker, 'fifo')
+    balance, upl = ps.reflect_filled_order(Decimal('10'), Decimal('100'), 'a')
+    assert (balance, upl) == (Decimal('0'), Decimal('50'))
+    balance, upl = ps.reflect_filled_order(Decimal('10'), Decimal('110'), 'b')
+    assert (balance, upl) == (Decimal('0'), Decimal('-50'))
+    assert ps.avg_price == Decimal('105')
+    balance, upl = ps.reflect_filled_order(Decimal('-15'), Decimal('108'), 'c')
+    assert balance == Decimal('70')
+    assert ps.avg_price == Decimal('110')
+    assert ps.units == Decimal('5')
+    assert ps.upl == Decimal('-25')
+    assert upl == Decimal('-25')
+    assert ps.update_position_price() == Decimal('-25')
+    assert ps.ledger is not None and len(ps.ledger.lots) == 1
+
+
+def test_position_average() -> None:
+    """Average accounting should be kept by Position without a ledger"""
+    ticker = Ticker(['USDJPY'])
+    ps = Position('JPY', 'USDJPY', ticker)
+    assert ps.ledger is None
+    with pytest.raises(Exception):
+        Position('JPY', 'USDJPY', ticker, 'hifo')
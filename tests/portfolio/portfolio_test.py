@@ -20,15 +20,11 @@ def TickerMock() -> Ticker:
         "USDJPY": {"bid": Decimal("107.25"), "ask": Decimal("107.80")},
     }
     tm = Ticker(_pairs)
-    # Create decimalaised prices for trade pair
+    # Tick decimalaised prices for trade pair, which also creates prices for
+    # inverted pair and marks the pair ready
     for pair, price in _prices.items():
-        _bid, _ask = price['bid'], price['ask']
-        tm.prices[pair]["bid"] = _bid
-        tm.prices[pair]["ask"] = _ask
-        # Create decimalised prices for inverted pair
-        inv_pair, inv_bid, inv_ask = tm.invert_prices(pair, _bid, _ask)
-        tm.prices[inv_pair]["bid"] = inv_bid
-        tm.prices[inv_pair]["ask"] = inv_ask
+        tm.update_ticker(TickEvent(pair, pd.Timestamp(0), price['bid'],
+            price['ask']))
     return tm
 
 
@@ -101,21 +97,25 @@ def test_execute_signal(pair: str, order_type: str, units: str, time: str,
     assert _order.price == _price
 
 
-@pytest.mark.parametrize("pair, order_type, units, time, quote, ref", [
-    ("GBPUSD", "market", "3000", "2020-07-08 12:00:00", "ask", "11111"),
-    ("USDJPY", "market", "-0.9", "2020-07-09 03:03:50", "bid", "22222"),
+@pytest.mark.parametrize("pair, order_type, units, time, ticked, ref", [
+    ("GBPUSD", "market", "3000", "2020-07-08 12:00:00", "GBPUSD", "11111"),
+    ("GBPUSD", "market", "3000", "2020-07-08 12:00:00", "USDJPY", "11111"),
+    ("USDJPY", "market", "-0.9", "2020-07-09 03:03:50", "GBPUSD", "22222"),
 ])
-def test_execute_signal_lackofticker(port: Portfolio,
-                                    pair: str,
+def test_execute_signal_lackofticker(pair: str,
                                     order_type: str,
                                     units: str,
                                     time: str,
-                                    quote: str, ref: str) -> None:
+                                    ticked: str, ref: str) -> None:
+    """Orders should not be issued until all the pairs they depend on,
+    including quote/home conversion, have been ticked."""
     from testfixtures import LogCapture
 
-    tmp = port.ticker.prices[pair][quote]
-    port.ticker.prices[pair][quote] = None
-    print(port.ticker.prices[pair])
+    ticker = Ticker(['GBPUSD', 'USDJPY'])
+    ticker.update_ticker(TickEvent(ticked, pd.Timestamp(time),
+        Decimal('1.2541'), Decimal('1.2543')))
+    port = Portfolio(ticker, Queue(), Queue(), 'JPY', ['GBPUSD', 'USDJPY'],
+        Decimal('1234567'))
     with LogCapture() as log:
         port.execute_signal(event=SignalEvent(
             ref=ref,
@@ -129,7 +129,7 @@ def test_execute_signal_lackofticker(port: Portfolio,
             ('savoia.portfolio.portfolio', 'ERROR', "Unable to execute order " +
              'as price data was insufficient.')
         )
-    port.ticker.prices[pair][quote] = tmp
+    assert port.event_q.empty()
 
 
 # ================================================================
@@ -335,3 +335,96 @@ def test_update_portfolio_home(home_currency: str, pair: Pair, exec_price: str,
     assert port.balance == Decimal(exp_balance)
     assert port.upl == Decimal(exp_upl)
     assert port.equity == Decimal(exp_equity)
+
+
+def test_set_up_dependents(TickerMock1: Ticker) -> None:
+    """Positions should be indexed by every pair moving their upl"""
+    port = Portfolio(TickerMock1, Queue(), Queue(), 'JPY',
+        ["GBPUSD", "EURUSD", "USDJPY"], Decimal('100000'))
+    deps = dict((k, [p.pair for p in v]) for k, v in port.dependents.items())
+    assert deps == {
+        'GBPUSD': ['GBPUSD'],
+        'EURUSD': ['EURUSD'],
+        'USDJPY': ['GBPUSD', 'EURUSD', 'USDJPY'],
+    }
+
+
+def test_update_portfolio_incremental(TickerMock1: Ticker) -> None:
+    """Running upl should match a full revaluation of all the positions"""
+    port = Portfolio(TickerMock1, Queue(), Queue(), 'JPY',
+        ["GBPUSD", "EURUSD", "USDJPY"], Decimal('100000'))
+    time = pd.Timestamp('2020-07-08 21:56:00')
+    port.execute_fill(FillEvent('ref1', 'GBPUSD', time, Decimal('1200'),
+        Decimal('1.40349'), 'filled'))
+    port.execute_fill(FillEvent('ref2', 'USDJPY', time, Decimal('-3'),
+        Decimal('106.074'), 'filled'))
+    for pair, bid, ask in [('GBPUSD', '1.2541', '1.2543'),
+                           ('USDJPY', '107.25', '107.80'),
+                           ('GBPUSD', '1.2741', '1.2745'),
+                           ('USDJPY', '106.01', '106.03')]:
+        event = TickEvent(pair, time, Decimal(bid), Decimal(ask))
+        TickerMock1.update_ticker(event)
+        port.update_portfolio(event)
+        result = port.result_q.get(False)
+        while result.type != 'EquityResult':
+            result = port.result_q.get(False)
+        expected = dict((p, port.positions[p].update_position_price())
+                        for p in port.pairs)
+        assert port.upl == sum(expected.values())
+        assert port.equity == port.balance + port.upl
+        assert result.upl == dict(expected, total=port.upl)
+
+
+def test_update_portfolio_sampling(TickerMock1: Ticker) -> None:
+    """Snapshots around fills and the final one should always be kept"""
+    from savoia.result.sampling import OnFillSampler
+    port = Portfolio(TickerMock1, Queue(), Queue(), 'JPY',
+        ["GBPUSD", "USDJPY"], Decimal('100000'), sampler=OnFillSampler())
+    times = [pd.Timestamp('2020-07-08 21:56:%02d' % i) for i in range(6)]
+    for time in times[:3]:
+        port.update_portfolio(TickEvent('USDJPY', time, Decimal('105.774'),
+            Decimal('110.863')))
+    port.execute_fill(FillEvent('ref1', 'USDJPY', times[2], Decimal('1'),
+        Decimal('106.074'), 'filled'))
+    for time in times[3:]:
+        port.update_portfolio(TickEvent('USDJPY', time, Decimal('105.774'),
+            Decimal('110.863')))
+    port.flush_results()
+    port.flush_results()
+
+    results = []
+    while not port.result_q.empty():
+        results.append(port.result_q.get(False))
+    assert [(r.type, r.time) for r in results] == [
+        ('EquityResult', times[2]),
+        ('ExecutionResult', times[2]),
+        ('EquityResult', times[3]),
+        ('EquityResult', times[5]),
+    ]
+    assert results[0].equity == Decimal('100000')
+    assert results[3].equity == port.equity
+
+
+def test_flush_results_after_fill(TickerMock1: Ticker) -> None:
+    """The final snapshot should reflect a fill following the last tick"""
+    port = Portfolio(TickerMock1, Queue(), Queue(), 'JPY',
+        ["GBPUSD", "USDJPY"], Decimal('100000'))
+    tick_time = pd.Timestamp('2020-07-08 21:56:00')
+    fill_time = pd.Timestamp('2020-07-08 21:56:05')
+    port.update_portfolio(TickEvent('USDJPY', tick_time, Decimal('105.774'),
+        Decimal('110.863')))
+    port.execute_fill(FillEvent('ref1', 'USDJPY', fill_time, Decimal('1'),
+        Decimal('106.074'), 'filled'))
+    port.flush_results()
+    port.flush_results()
+
+    results = []
+    while not port.result_q.empty():
+        results.append(port.result_q.get(False))
+    assert [(r.type, r.time) for r in results] == [
+        ('EquityResult', tick_time),
+        ('ExecutionResult', fill_time),
+        ('EquityResult', fill_time),
+    ]
+    assert results[2].upl['USDJPY'] == port.upl
+    assert results[2].equity == port.equity != Decimal('100000')
@@ -0,0 +1,136 @@
+from decimal import Decimal
+import pytest
+
+from queue import Queue
+import pandas as pd
+
+from savoia.portfolio.portfolio import Portfolio
+from savoia.portfolio.risk import RiskManager
+from savoia.ticker.ticker import Ticker
+from savoia.event.event import SignalEvent, FillEvent, TickEvent
+
+
+@pytest.fixture(scope='function')
+def ticker() -> Ticker:
+    tk = Ticker(['GBPUSD', 'USDJPY'])
+    time = pd.Timestamp('2020-07-08 12:00:00')
+    tk.update_ticker(TickEvent('GBPUSD', time, Decimal('1.25'),
+        Decimal('1.26')))
+    tk.update_ticker(TickEvent('USDJPY', time, Decimal('100'),
+        Decimal('101')))
+    return tk
+
+
+def _port(ticker: Ticker, risk: RiskManager) -> Portfolio:
+    return Portfolio(ticker, Queue(), Queue(), 'JPY', ['GBPUSD', 'USDJPY'],
+        Decimal('100000'), risk=risk)
+
+
+def _signal(pair: str, units: str, ref: str = 'ref') -> SignalEvent:
+    return SignalEvent(ref, pair, pd.Timestamp('2020-07-08 12:00:00'),
+        'market', Decimal(units), None)
+
+
+def _fill(pair: str, units: str, price: str, ref: str = 'ref',
+        status: str = 'filled') -> FillEvent:
+    return FillEvent(ref, pair, pd.Timestamp('2020-07-08 12:00:00'),
+        Decimal(units), Decimal(price), status)
+
+
+def test_update_position(ticker: Ticker) -> None:
+    """Exposures should be aggregated in home currency upon fills/ticks"""
+    risk = RiskManager()
+    port = _port(ticker, risk)
+    port.execute_fill(_fill('GBPUSD', '100', '1.26'))
+    port.execute_fill(_fill('USDJPY', '-50', '100'))
+    assert risk.pair_exposure == {'GBPUSD': Decimal('12500'),
+                                  'USDJPY': Decimal('-5050')}
+    assert risk.currency_exposure == {'GBP': Decimal('12500'),
+                                      'USD': Decimal('-17550'),
+                                      'JPY': Decimal('5050')}
+    assert risk.gross_exposure == Decimal('17550')
+
+    event = TickEvent('USDJPY', pd.Timestamp('2020-07-08 12:00:01'),
+        Decimal('110'), Decimal('111'))
+    ticker.update_ticker(event)
+    port.update_portfolio(event)
+    assert risk.pair_exposure == {'GBPUSD': Decimal('13750'),
+                                  'USDJPY': Decimal('-5550')}
+    assert risk.gross_exposure == Decimal('19300')
+    assert sum(risk.currency_exposure.values()) == Decimal('0')
+
+
+@pytest.mark.parametrize('limits, pair, units, reason', [
+    ({'max_pair_exposure': Decimal('10000')}, 'GBPUSD', '100', 'pair'),
+    ({'max_pair_exposure': Decimal('10000')}, 'GBPUSD', '-70', None),
+    ({'max_pair_exposure': Decimal('10000')}, 'GBPUSD', '-200', 'pair'),
+    ({'max_currency_exposure': {'USD': Decimal('15000')}}, 'USDJPY', '-10',
+     'currency'),
+    ({'max_currency_exposure': {'USD': Decimal('15000')}}, 'USDJPY', '50',
+     None),
+    ({'max_currency_exposure': {'JPY': Decimal('15000')}}, 'USDJPY', '-10',
+     None),
+    ({'max_leverage': Decimal('0.1')}, 'GBPUSD', '1', 'leverage'),
+    ({'max_leverage': Decimal('0.2')}, 'USDJPY', '10', None),
+])
+def test_check(ticker: Ticker, limits: dict, pair: str, units: str,
+        reason: str) -> None:
+    risk = RiskManager(**limits)
+    port = _port(ticker, risk)
+    port.execute_fill(_fill('GBPUSD', '60', '1.26'))
+    port.execute_fill(_fill('USDJPY', '-80', '100'))
+    assert risk.check(port.positions[pair], Decimal(units), port.equity) == \
+        reason
+
+
+def test_execute_signal_rejected(ticker: Ticker) -> None:
+    """Rejected signals should not be issued as orders, but counted"""
+    risk = RiskManager(max_pair_exposure=Decimal('10000'))
+    port = _port(ticker, risk)
+    port.execute_signal(_signal('GBPUSD', '100'))
+    port.execute_signal(_signal('USDJPY', '10'))
+    assert port.event_q.qsize() == 1
+    assert port.event_q.get(False).pair == 'USDJPY'
+    assert risk.report() == {'pair': 1, 'currency': 0, 'leverage': 0,
+                             'accepted': 1, 'rejected': 1}
+
+
+def test_pending_orders(ticker: Ticker) -> None:
+    """Orders not filled yet should count towards the limits until over"""
+    risk = RiskManager(max_pair_exposure=Decimal('10000'))
+    port = _port(ticker, risk)
+    # Each of the orders on the tick is within the limit, but not both.
+    port.execute_signal(_signal('GBPUSD', '50', 'a'))
+    port.execute_signal(_signal('GBPUSD', '50', 'b'))
+    assert [o.ref for o in port.event_q.queue] == ['a']
+    assert risk.pending_units == {'GBPUSD': Decimal('50')}
+    assert risk.pending_exposure == {'GBPUSD': Decimal('6250')}
+
+    port.execute_fill(_fill('GBPUSD', '20', '1.26', 'a', 'partial'))
+    assert risk.pending == {'a': ('GBPUSD', Decimal('30'), Decimal('3750'))}
+    port.execute_signal(_signal('GBPUSD', '40', 'c'))
+    assert risk.report()['rejected'] == 2
+    port.execute_fill(_fill('GBPUSD', '30', '1.26', 'a'))
+    assert risk.pending == {}
+    assert risk.pending_units == {}
+
+    port.execute_signal(_signal('GBPUSD', '20', 'd'))
+    assert risk.pending_units == {'GBPUSD': Decimal('20')}
+    port.release_order('d')  # e.g. rejected by the broker
+    assert risk.pending_units == {}
+    assert risk.report() == {'pair': 2, 'currency': 0, 'leverage': 0,
+                             'accepted': 2, 'rejected': 2}
+
+
+def test_pending_currency_leverage(ticker: Ticker) -> None:
+    """Pending orders should count towards currency and gross exposures"""
+    risk = RiskManager(max_currency_exposure={'USD': Decimal('15000')},
+        max_leverage=Decimal('0.2'))
+    port = _port(ticker, risk)
+    port.execute_signal(_signal('USDJPY', '100', 'a'))
+    assert risk.check(port.positions['USDJPY'], Decimal('60'),
+        port.equity) == 'currency'
+    assert risk.check(port.positions['GBPUSD'], Decimal('100'),
+        port.equity) == 'leverage'
+    assert risk.check(port.positions['USDJPY'], Decimal('-60'),
+        port.equity) is None
@@ -0,0 +1,81 @@
+from decimal import Decimal
+import pytest
+
+from queue import Queue
+import numpy as np
+import pandas as pd
+
+from savoia.portfolio.portfolio import Portfolio
+from savoia.portfolio.vectorized import VectorizedPortfolio
+from savoia.ticker.ticker import Ticker
+from savoia.event.event import FillEvent, TickEvent
+
+
+PAIRS = ['GBPUSD', 'USDJPY', 'EURUSD', 'EURGBP']
+
+
+def _run(cls: type, seed: int) -> Portfolio:
+    rng = np.random.RandomState(seed)
+    ticker = Ticker(PAIRS)
+    port = cls(ticker, Queue(), Queue(), 'JPY', PAIRS, Decimal('1000000'))
+    mids = {'GBPUSD': 1.25, 'USDJPY': 107.5, 'EURUSD': 1.12, 'EURGBP': 0.9}
+    time = pd.Timestamp('2020-07-08 21:56:00')
+    for i in range(400):
+        pair = PAIRS[rng.randint(len(PAIRS))]
+        mids[pair] *= 1 + rng.normal(0, 0.001)
+        bid = Decimal(str(round(mids[pair] * 0.9999, 5)))
+        ask = Decimal(str(round(mids[pair] * 1.0001, 5)))
+        time += pd.Timedelta(seconds=1)
+        event = TickEvent(pair, time, bid, ask)
+        ticker.update_ticker(event)
+        port.update_portfolio(event)
+        if i > 4 and rng.rand() < 0.1:
+            units = Decimal(int(rng.randint(-1000, 1000)))
+            port.execute_fill(FillEvent('ref%d' % i, pair, time, units,
+                ask if units > 0 else bid, 'filled'))
+    port.update_portfolio(event)
+    return port
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_matches_decimal_portfolio(seed: int) -> None:
+    """VectorizedPortfolio should agree with Portfolio within tolerance"""
+    expected = _run(Portfolio, seed)
+    actual = _run(VectorizedPortfolio, seed)
+    assert actual.balance == expected.balance
+    assert float(actual.upl) == pytest.approx(float(expected.upl), abs=1e-3)
+    assert float(actual.equity) == pytest.approx(float(expected.equity),
+        abs=1e-3)
+    for pair in PAIRS:
+        i = actual.index[pair]
+        assert actual.units[i] == float(expected.positions[pair].units)
+        assert actual.upls_qh[i] == pytest.approx(
+            float(expected._upl[pair]), abs=1e-3)
+
+
+def test_revalue_batch() -> None:
+    port = _run(VectorizedPortfolio, 0)
+    bids = np.vstack([port.bids, port.bids * 1.01])
+    asks = np.vstack([port.asks, port.asks * 1.01])
+    qh = np.vstack([port.qh_factors, port.qh_factors])
+    upls_qh = port.revalue_batch(bids, asks, qh)
+    assert upls_qh.shape == (2, len(PAIRS))
+    np.testing.assert_allclose(upls_qh[0], port.upls_qh)
+
+
+def test_execute_fill_revalues() -> None:
+    """upl and equity should be taken from the arrays right after a fill"""
+    port = _run(VectorizedPortfolio, 0)
+    expected = _run(Portfolio, 0)
+    time = pd.Timestamp('2020-07-09')
+    for p in [port, expected]:
+        p.execute_fill(FillEvent('last', 'GBPUSD', time, Decimal('500'),
+            p.positions['GBPUSD'].price_cur['ask'], 'filled'))
+    for pair, i in port.index.items():
+        assert port._upl[pair] == Decimal(str(float(port.upls_qh[i])))
+    assert isinstance(port.upl, Decimal)
+    assert port.upl == Decimal(str(float(port.upls_qh.sum()))).quantize(
+        Decimal('1E-8'))
+    assert port.equity == port.balance + port.upl
+    assert port.balance == expected.balance
+    assert float(port.upl) == pytest.approx(float(expected.upl), abs=1e-3)
@@ -0,0 +1,19 @@
+from savoia.result.columns import ColumnBuffer, execution_dtypes
+
+import numpy as np
+
+
+def test_column_buffer() -> None:
+    """Rows should be kept in place while the buffer grows by doubling"""
+    buffer = ColumnBuffer(execution_dtypes(), capacity=2)
+    for i in range(5):
+        buffer.append((i, 'USDJPY', float(i), 100.0 + i))
+    assert (len(buffer), buffer.capacity) == (5, 8)
+    columns = buffer.view()
+    np.testing.assert_array_equal(columns['Timestamp'], np.arange(5))
+    np.testing.assert_array_equal(columns['Price'], 100.0 + np.arange(5))
+    assert list(columns['Pair']) == ['USDJPY'] * 5
+    buffer.clear()
+    assert len(buffer) == 0 and not buffer.full
+    buffer.append((9, 'GBPUSD', 1.0, 1.0))
+    assert list(buffer.view()['Pair']) == ['GBPUSD']
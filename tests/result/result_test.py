@@ -1,11 +1,16 @@
 import pytest
 import py
 import os
+import sqlite3
 
 from savoia.result.result import EquityResult, ExecutionResult, \
-    FileResultHandler, Result
+    FileResultHandler, ColumnarResultHandler, InMemoryResultHandler, \
+    SQLiteResultHandler, SharedMemoryResultHandler, SharedResultQueue, \
+    Result, record_dtype
+from savoia.result.ring import RecordRing
 
-from queue import Queue
+from queue import Queue, Full
+import threading
 import pandas as pd
 from decimal import Decimal
 
@@ -66,3 +71,181 @@ def test_run(tmpdir: py.path.local) -> None:
         '2020-07-15 22:18:23,111.1,2222.22,33.333,4.4444,5.55555\n'
     assert execution_file_result[0] == 'Timestamp,Pair,Units,Price\n'
     assert execution_file_result[1] == '2020-07-14 22:20:00,USDJPY,2.22,99.9\n'
+
+
+def test_run_strategies(tmpdir: py.path.local) -> None:
+    """Results of named strategies should be output to files of their own"""
+    pairs = ['GBPUSD', 'USDJPY']
+    result_q: 'Queue[Result]' = Queue()
+    upl = {'total': Decimal('0'), 'GBPUSD': Decimal('0'),
+        'USDJPY': Decimal('0')}
+    frh = FileResultHandler(pairs, result_q, tmpdir)
+    for name in ['A', 'B']:
+        result_q.put(EquityResult(pd.Timestamp('2020-07-15 22:18:23'),
+            Decimal('1'), Decimal('1'), upl, strategy=name))
+    result_q.put(ExecutionResult(pd.Timestamp('2020-07-14 22:20:00'),
+        'USDJPY', Decimal('2.22'), Decimal('99.9'), strategy='B'))
+    result_q.put(None)
+    frh.run()
+
+    # No unsuffixed files are left empty next to those of the strategies.
+    assert not os.path.exists(tmpdir.join('Equity.csv'))
+    assert not os.path.exists(tmpdir.join('Execution.csv'))
+    assert len(tmpdir.join('Equity_A.csv').readlines()) == 2
+    assert len(tmpdir.join('Equity_B.csv').readlines()) == 2
+    assert len(tmpdir.join('Execution_A.csv').readlines()) == 1
+    assert tmpdir.join('Execution_B.csv').readlines()[1] == \
+        '2020-07-14 22:20:00,USDJPY,2.22,99.9\n'
+
+
+# =============================================================
+# ColumnarResultHandler
+# =============================================================
+def _put_results(result_q: 'Queue[Result]', n: int) -> None:
+    for i in range(n):
+        result_q.put(EquityResult(pd.Timestamp('2020-07-15 22:18:23') +
+            pd.Timedelta(seconds=i), Decimal('111.1') + i, Decimal('2222.22'),
+            {'total': Decimal('33.333'), 'GBPUSD': Decimal('4.4444'),
+                'USDJPY': Decimal('5.55555')}))
+    result_q.put(ExecutionResult(pd.Timestamp('2020-07-14 22:20:00'),
+        'USDJPY', Decimal('2.22'), Decimal('99.9'), strategy='B'))
+    result_q.put(None)
+
+
+@pytest.mark.parametrize('format', ['npz', 'csv', 'parquet'])
+def test_columnar_run(tmpdir: py.path.local, format: str) -> None:
+    """Results should be output in chunks, and read back as they are"""
+    if format == 'parquet':
+        pytest.importorskip('pyarrow')
+    pairs = ['GBPUSD', 'USDJPY']
+    result_q: 'Queue[Result]' = Queue()
+    _put_results(result_q, 5)
+    ColumnarResultHandler(pairs, result_q, str(tmpdir), format=format,
+        chunk_size=2).run()
+
+    if format == 'npz':
+        assert len(tmpdir.listdir(lambda p: p.basename.startswith(
+            'Equity.'))) == 3
+    equity = ColumnarResultHandler.load(str(tmpdir))
+    assert list(equity.columns) == ['Timestamp', 'Equity', 'Balance',
+        'UPL[Total]', 'UPL[GBPUSD]', 'UPL[USDJPY]']
+    assert list(equity['Timestamp']) == [
+        (pd.Timestamp('2020-07-15 22:18:23') + pd.Timedelta(seconds=i)).value
+        for i in range(5)]
+    assert list(equity['Equity']) == [111.1 + i for i in range(5)]
+    assert list(equity['UPL[USDJPY]']) == [5.55555] * 5
+    execution = ColumnarResultHandler.load(str(tmpdir), 'Execution_B')
+    assert execution.values.tolist() == [
+        [pd.Timestamp('2020-07-14 22:20:00').value, 'USDJPY', 2.22, 99.9]]
+
+
+def test_columnar_datetime(tmpdir: py.path.local) -> None:
+    result_q: 'Queue[Result]' = Queue()
+    _put_results(result_q, 1)
+    ColumnarResultHandler(['GBPUSD', 'USDJPY'], result_q, str(tmpdir),
+        format='csv', epoch=False).run()
+    assert tmpdir.join('Equity.csv').readlines()[1] == \
+        '2020-07-15 22:18:23,111.1,2222.22,33.333,4.4444,5.55555\n'
+
+
+# =============================================================
+# InMemoryResultHandler
+# =============================================================
+def test_in_memory_run() -> None:
+    pairs = ['GBPUSD', 'USDJPY']
+    result_q: 'Queue[Result]' = Queue()
+    _put_results(result_q, 5)
+    handler = InMemoryResultHandler(pairs, result_q, capacity=2)
+    handler.run()
+
+    equity = handler.equity()
+    assert list(equity.columns) == ['Equity', 'Balance', 'UPL[Total]',
+        'UPL[GBPUSD]', 'UPL[USDJPY]']
+    assert list(equity.index) == [pd.Timestamp('2020-07-15 22:18:23') +
+        pd.Timedelta(seconds=i) for i in range(5)]
+    assert list(equity['Equity']) == [111.1 + i for i in range(5)]
+    assert handler.execution().empty
+    assert handler.execution('B').values.tolist() == [
+        [pd.Timestamp('2020-07-14 22:20:00'), 'USDJPY', 2.22, 99.9]]
+    assert list(handler.arrays('Execution', 'B')['Timestamp']) == \
+        [pd.Timestamp('2020-07-14 22:20:00').value]
+
+
+# =============================================================
+# SQLiteResultHandler
+# =============================================================
+def test_sqlite_run(tmpdir: py.path.local) -> None:
+    """Results of runs should be stored in batches tagged with the run"""
+    pairs = ['GBPUSD', 'USDJPY']
+    database = str(tmpdir.join('results.db'))
+    for run_id in ['run1', 'run2']:
+        result_q: 'Queue[Result]' = Queue()
+        _put_results(result_q, 5)
+        SQLiteResultHandler(pairs, result_q, database, run_id=run_id,
+            parameters={'short_window': Decimal('2')}, batch_size=2).run()
+
+    conn = sqlite3.connect(database)
+    assert conn.execute('PRAGMA journal_mode').fetchone() == ('wal',)
+    assert conn.execute('SELECT run_id, pairs, parameters FROM runs ' +
+        'ORDER BY run_id').fetchall() == [
+        ('run1', '["GBPUSD", "USDJPY"]', '{"short_window": "2"}'),
+        ('run2', '["GBPUSD", "USDJPY"]', '{"short_window": "2"}')]
+    assert conn.execute('SELECT time, equity, upl_total, upl FROM equity ' +
+        "WHERE run_id = 'run2' ORDER BY time LIMIT 1").fetchone() == (
+        pd.Timestamp('2020-07-15 22:18:23').value, 111.1, 33.333,
+        '{"GBPUSD": 4.4444, "USDJPY": 5.55555}')
+    assert conn.execute('SELECT run_id, COUNT(*) FROM equity ' +
+        'GROUP BY run_id').fetchall() == [('run1', 5), ('run2', 5)]
+    assert conn.execute('SELECT strategy, pair, units, price FROM execution ' +
+        "WHERE run_id = 'run1'").fetchall() == [('B', 'USDJPY', 2.22, 99.9)]
+    assert {'equity_run_time', 'execution_run_time'} <= set(r[0] for r in
+        conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'"))
+    conn.close()
+
+
+# =============================================================
+# SharedMemoryResultHandler
+# =============================================================
+@pytest.mark.parametrize('start_method', ['fork', 'spawn'])
+def test_shared_memory_run(tmpdir: py.path.local, start_method: str) -> None:
+    """Results should be written by the handler given in another process"""
+    pairs = ['GBPUSD', 'USDJPY']
+    handler = SharedMemoryResultHandler(pairs, Queue(),
+        params={'output_dir': str(tmpdir)}, slots=2,
+        start_method=start_method)
+    thread = threading.Thread(target=handler.run)
+    thread.start()
+    _put_results(handler.result_q, 5)
+    thread.join()
+
+    assert tmpdir.join('Equity.csv').readlines()[1:3] == [
+        '2020-07-15 22:18:23,111.1,2222.22,33.333,4.4444,5.55555\n',
+        '2020-07-15 22:18:24,112.1,2222.22,33.333,4.4444,5.55555\n']
+    assert len(tmpdir.join('Equity.csv').readlines()) == 6
+    assert tmpdir.join('Execution_B.csv').readlines()[1] == \
+        '2020-07-14 22:20:00,USDJPY,2.22,99.9\n'
+
+
+def test_shared_memory_drop() -> None:
+    """EquityResults should be dropped while the ring is full"""
+    pairs = ['GBPUSD', 'USDJPY']
+    ring = RecordRing(record_dtype(pairs), 2)
+    result_q = SharedResultQueue(pairs, ring, policy='drop')
+    for i in range(5):
+        result_q.put(EquityResult(pd.Timestamp('2020-07-15 22:18:23') +
+            pd.Timedelta(seconds=i), Decimal('111.1') + i,
+            Decimal('2222.22'), {'total': Decimal('33.333'),
+                'GBPUSD': Decimal('4.4444'), 'USDJPY': Decimal('5.55555')}))
+    assert result_q.dropped == 3
+    assert ring.get(False)[:3] == (1, '',
+        pd.Timestamp('2020-07-15 22:18:23').value)
+    result = result_q.get(False)
+    assert (result.equity, result.upl['USDJPY']) == \
+        (Decimal('112.1'), Decimal('5.55555'))
+    result_q.put(None)
+    result_q.put(result)
+    result_q.put(result)
+    assert result_q.dropped == 4
+    with pytest.raises(Full):
+        result_q.put(None, block=False)
+    ring.close()
@@ -0,0 +1,71 @@
+import pytest
+
+from savoia.result.sampling import EveryTickSampler, EveryNTicksSampler, \
+    IntervalSampler, OnChangeSampler, OnFillSampler
+from savoia.event.event import TickEvent
+
+from decimal import Decimal
+import pandas as pd
+
+
+def _tick(time: str) -> TickEvent:
+    return TickEvent('GBPUSD', pd.Timestamp(time), Decimal('1.2'),
+        Decimal('1.3'))
+
+
+# =============================================================
+# EquitySampler
+# =============================================================
+def test_every_tick() -> None:
+    smp = EveryTickSampler()
+    assert smp.sample(_tick('2020-07-15 22:18:23'), Decimal('1')) is True
+
+
+def test_every_n_ticks() -> None:
+    smp = EveryNTicksSampler(3)
+    sampled = []
+    for i in range(7):
+        s = smp.sample(_tick('2020-07-15 22:18:23'), Decimal('1'))
+        if s:
+            smp.emitted(pd.Timestamp('2020-07-15 22:18:23'), Decimal('1'))
+        sampled.append(s)
+    assert sampled == [False, False, True, False, False, True, False]
+    with pytest.raises(Exception):
+        EveryNTicksSampler(0)
+
+
+@pytest.mark.parametrize('interval', ['10s', 10, Decimal('10')])
+def test_interval_market(interval: object) -> None:
+    smp = IntervalSampler(interval)
+    sampled = []
+    for t in ['22:18:00', '22:18:05', '22:18:10', '22:18:19', '22:18:21']:
+        event = _tick('2020-07-15 ' + t)
+        s = smp.sample(event, Decimal('1'))
+        if s:
+            smp.emitted(event.time, Decimal('1'))
+        sampled.append(s)
+    assert sampled == [True, False, True, False, True]
+
+
+def test_interval_wall() -> None:
+    smp = IntervalSampler(3600, clock='wall')
+    event = _tick('2020-07-15 22:18:00')
+    assert smp.sample(event, Decimal('1')) is True
+    smp.emitted(event.time, Decimal('1'))
+    assert smp.sample(event, Decimal('1')) is False
+    with pytest.raises(Exception):
+        IntervalSampler(1, clock='exchange')
+
+
+def test_on_change() -> None:
+    smp = OnChangeSampler()
+    event = _tick('2020-07-15 22:18:00')
+    assert smp.sample(event, Decimal('1')) is True
+    smp.emitted(event.time, Decimal('1'))
+    assert smp.sample(event, Decimal('1.0')) is False
+    assert smp.sample(event, Decimal('1.1')) is True
+
+
+def test_on_fill() -> None:
+    smp = OnFillSampler()
+    assert smp.sample(_tick('2020-07-15 22:18:00'), Decimal('1')) is False
@@ -0,0 +1,176 @@
+from savoia.strategy.strategy import MovingAverageCrossStrategy, \
+    VectorizedMovingAverageCrossStrategy, VectorizedStrategy, Signals
+from savoia.types.types import Pair, TickColumns
+from savoia.event.event import Event, TickEvent, SignalEvent
+from savoia.indicator.registry import IndicatorRegistry
+
+from queue import Queue
+from decimal import Decimal
+from typing import Dict
+import numpy as np
+import pandas as pd
+
+
+# ================================================================
+# MovingAverageCrossStrategy
+# ================================================================
+def test_calculate_signals() -> None:
+    """Signals should be issued when the true SMAs cross"""
+    event_q: 'Queue[Event]' = Queue()
+    macs = MovingAverageCrossStrategy(['USDJPY'], event_q, short_window=2,
+        long_window=4, units=Decimal('10'))
+    prices = ['100', '100', '100', '99', '101', '102', '99', '98', '97']
+    base = pd.Timestamp('2020-07-10 20:59:32')
+    for i, p in enumerate(prices):
+        macs.calculate_signals(TickEvent('USDJPY',
+            base + pd.Timedelta(seconds=i), Decimal(p),
+            Decimal(p) + Decimal('0.1')))
+    signals = []
+    while not event_q.empty():
+        signals.append(event_q.get(False))
+    # SMA(2) vs SMA(4): tick 3 (99.5 < 99.75), 4 (100 = 100),
+    # 5 (101.5 > 100.5) buy, 6 (100.5 > 100.25), 7 (98.5 < 100) sell
+    assert [(s.ref, s.units, s.price) for s in signals
+            if isinstance(s, SignalEvent)] == [
+        ('USDJPY-5', Decimal('10'), Decimal('102.1')),
+        ('USDJPY-7', Decimal('-10'), Decimal('98')),
+    ]
+
+
+def test_calculate_signals_shared_indicators() -> None:
+    """Strategies sharing the registry should signal as if standalone"""
+    event_q: 'Queue[Event]' = Queue()
+    reg = IndicatorRegistry()
+    macs = [MovingAverageCrossStrategy(['USDJPY'], event_q, short_window=2,
+        long_window=4, units=Decimal('10'), indicators=reg)
+        for _ in range(2)]
+    assert len(reg.indicators) == 2
+    prices = ['100', '100', '100', '99', '101', '102', '99', '98', '97']
+    base = pd.Timestamp('2020-07-10 20:59:32')
+    for i, p in enumerate(prices):
+        tick = TickEvent('USDJPY', base + pd.Timedelta(seconds=i),
+            Decimal(p), Decimal(p) + Decimal('0.1'))
+        reg.update(tick)
+        for m in macs:
+            m.calculate_signals(tick)
+    signals = []
+    while not event_q.empty():
+        signals.append(event_q.get(False))
+    assert [s.ref for s in signals if isinstance(s, SignalEvent)] == \
+        ['USDJPY-5', 'USDJPY-5', 'USDJPY-7', 'USDJPY-7']
+
+
+# ================================================================
+# VectorizedMovingAverageCrossStrategy
+# ================================================================
+def test_vectorized_calculate_signals() -> None:
+    """Vectorized signals should match those of the tick-by-tick version"""
+    rng = np.random.RandomState(0)
+    bids = 100 + np.cumsum(rng.randint(-1, 2, size=500)).astype(np.float64)
+    base = pd.Timestamp('2020-07-10 20:59:32')
+    ticks = [TickEvent('USDJPY', base + pd.Timedelta(seconds=i),
+        Decimal(str(b)), Decimal(str(b)) + Decimal('0.1'))
+        for i, b in enumerate(bids)]
+    expected_q: 'Queue[Event]' = Queue()
+    vectorized_q: 'Queue[Event]' = Queue()
+    macs = MovingAverageCrossStrategy(['USDJPY'], expected_q,
+        short_window=5, long_window=20)
+    vmacs = VectorizedMovingAverageCrossStrategy(['USDJPY'], vectorized_q,
+        short_window=5, long_window=20)
+    vmacs.prepare({'USDJPY': {
+        'time': np.array([t.time.value for t in ticks]),
+        'bid': bids, 'ask': bids + 0.1}})
+    for t in ticks:
+        macs.calculate_signals(t)
+        vmacs.calculate_signals(t)
+
+    def _drain(q: 'Queue[Event]') -> list:
+        _signals = []
+        while not q.empty():
+            _s = q.get(False)
+            _signals.append((_s.ref, _s.units, _s.price, _s.time))
+        return _signals
+    expected = _drain(expected_q)
+    assert len(expected) > 2
+    assert _drain(vectorized_q) == expected
+
+
+def test_warm_up() -> None:
+    """Strategies warmed up in bulk should signal alike from the start"""
+    rng = np.random.RandomState(1)
+    bids = 100 + np.cumsum(rng.randint(-1, 2, size=500)).astype(np.float64)
+    base = pd.Timestamp('2020-07-10 20:59:32')
+    times = np.array([(base + pd.Timedelta(seconds=i)).value
+        for i in range(len(bids))])
+    start = 200
+    columns = {'USDJPY': {'time': times, 'bid': bids, 'ask': bids + 0.1}}
+    warm = {'USDJPY': {'time': times[:start], 'bid': bids[:start],
+        'ask': bids[:start] + 0.1}}
+    expected_q: 'Queue[Event]' = Queue()
+    vectorized_q: 'Queue[Event]' = Queue()
+    macs = MovingAverageCrossStrategy(['USDJPY'], expected_q,
+        short_window=5, long_window=20)
+    vmacs = VectorizedMovingAverageCrossStrategy(['USDJPY'], vectorized_q,
+        short_window=5, long_window=20)
+    macs.warm_up(warm)
+    vmacs.warm_up(warm)
+    vmacs.prepare(columns)
+    assert macs.pairs_dict['USDJPY']['ticks'] == start
+    assert macs.pairs_dict['USDJPY']['long_sma'].value == \
+        Decimal(str(bids[start - 20:start].sum())) / 20
+    for i in range(start, len(bids)):
+        t = TickEvent('USDJPY', pd.Timestamp(times[i]),
+            Decimal(str(bids[i])), Decimal(str(bids[i])) + Decimal('0.1'))
+        macs.calculate_signals(t)
+        vmacs.calculate_signals(t)
+    expected = [(s.ref, s.units) for s in expected_q.queue]
+    assert len(expected) > 2
+    assert int(expected[0][0].split('-')[1]) >= start
+    assert expected[0][1] > 0
+    assert [(s.ref, s.units) for s in vectorized_q.queue] == expected
+
+
+def test_vectorized_chunks() -> None:
+    """Signals prepared a chunk at a time should match those prepared over
+    the whole run at once"""
+    rng = np.random.RandomState(2)
+    bids = 100 + np.cumsum(rng.randint(-1, 2, size=500)).astype(np.float64)
+    times = np.arange(len(bids), dtype=np.int64)
+    warm = {'USDJPY': {'time': times[:120], 'bid': bids[:120],
+        'ask': bids[:120] + 0.1}}
+    whole, chunked = [VectorizedMovingAverageCrossStrategy(['USDJPY'],
+        Queue(), short_window=5, long_window=20) for _ in range(2)]
+    for s in (whole, chunked):
+        s.warm_up(warm)
+    whole.prepare({'USDJPY': {'time': times, 'bid': bids,
+        'ask': bids + 0.1}})
+    # Chunks shorter than the history as well.
+    for start, end in [(0, 100), (100, 110), (110, 113), (113, 500)]:
+        chunked.prepare({'USDJPY': {'time': times[start:end],
+            'bid': bids[start:end], 'ask': bids[start:end] + 0.1}})
+    assert len(whole.signals['USDJPY'][0]) > 2
+    assert whole.signals['USDJPY'][0][0] >= 120
+    assert list(chunked.signals['USDJPY'][0]) == \
+        list(whole.signals['USDJPY'][0])
+    assert list(chunked.signals['USDJPY'][1]) == \
+        list(whole.signals['USDJPY'][1])
+    assert chunked._next == whole._next
+
+
+def test_vectorized_same_tick_refs() -> None:
+    """Signals issued on one tick should have refs of their own"""
+    class _Twice(VectorizedStrategy):
+        def generate_signals(self,
+                columns: Dict[Pair, TickColumns]) -> Signals:
+            return {'USDJPY': (np.array([1, 1]), np.array([1.0, -1.0]))}
+
+    event_q: 'Queue[Event]' = Queue()
+    twice = _Twice(['USDJPY'], event_q)
+    twice.prepare({})
+    base = pd.Timestamp('2020-07-10 20:59:32')
+    for i in range(2):
+        twice.calculate_signals(TickEvent('USDJPY',
+            base + pd.Timedelta(seconds=i), Decimal('100'),
+            Decimal('100.1')))
+    assert [(s.ref, s.units) for s in event_q.queue] == [
+        ('USDJPY-1', Decimal('1.0')), ('USDJPY-1-1', Decimal('-1.0'))]
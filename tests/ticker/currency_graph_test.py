@@ -0,0 +1,81 @@
+import pytest
+from savoia.ticker.ticker import Ticker
+from savoia.ticker.currency_graph import CurrencyGraph
+from savoia.portfolio.position import Position
+from savoia.event.event import TickEvent
+from decimal import Decimal
+import pandas as pd
+
+
+@pytest.fixture(scope='function')
+def ticker() -> Ticker:
+    tk = Ticker(['EURGBP', 'GBPUSD', 'USDJPY', 'AUDNZD'])
+    time = pd.Timestamp('2020-07-09 12:23:10')
+    for pair, bid, ask in [('EURGBP', '0.90473', '0.90561'),
+                           ('GBPUSD', '1.2541', '1.2543'),
+                           ('USDJPY', '107.25', '107.80')]:
+        tk.update_ticker(TickEvent(pair, time, Decimal(bid), Decimal(ask)))
+    return tk
+
+
+# ---------------------------------------------------------------
+# CurrencyGraph
+# ---------------------------------------------------------------
+@pytest.mark.parametrize('pair, path', [
+    ('GBPJPY', ['GBPUSD', 'USDJPY']),
+    ('JPYGBP', ['JPYUSD', 'USDGBP']),
+    ('EURJPY', ['EURGBP', 'GBPUSD', 'USDJPY']),
+    ('USDEUR', ['USDGBP', 'GBPEUR'])
+])
+def test_find_path(pair: str, path: list, ticker: Ticker) -> None:
+    """find_path should return the shortest chain of available pairs"""
+    assert ticker.graph.find_path(pair) == path
+
+
+def test_find_path_unavailable(ticker: Ticker) -> None:
+    with pytest.raises(Exception):
+        ticker.graph.find_path('EURAUD')
+
+
+def test_add_cross(ticker: Ticker) -> None:
+    """add_cross should add both the cross and its inverse to prices"""
+    price = ticker.add_cross('GBPJPY')
+    assert price is ticker.prices['GBPJPY']
+    assert price['bid'] == Decimal('134.502225')
+    assert price['ask'] == Decimal('135.21354')
+    assert ticker.prices['JPYGBP']['bid'] == \
+        (Decimal('1') / Decimal('135.21354')).quantize(Decimal('1E-8'))
+    assert ticker.prices['JPYGBP']['ask'] == \
+        (Decimal('1') / Decimal('134.502225')).quantize(Decimal('1E-8'))
+    assert ticker.graph.sources('GBPJPY') == ['GBPUSD', 'USDJPY']
+    assert ticker.graph.sources('JPYGBP') == ['GBPUSD', 'USDJPY']
+    assert ticker.graph.sources('USDGBP') == ['GBPUSD']
+
+
+def test_update_crosses(ticker: Ticker) -> None:
+    """Only the crosses depending on the ticked pair should be updated"""
+    ticker.add_cross('GBPJPY')
+    ticker.add_cross('EURUSD')
+    assert ticker.graph.dependents == {
+        'GBPUSD': ['GBPJPY', 'EURUSD'],
+        'USDJPY': ['GBPJPY'],
+        'EURGBP': ['EURUSD'],
+    }
+    eurusd = dict(ticker.prices['EURUSD'])
+    time = pd.Timestamp('2020-07-09 12:24:00')
+    ticker.update_ticker(TickEvent('USDJPY', time, Decimal('108'),
+        Decimal('108.01')))
+    assert ticker.prices['GBPJPY']['bid'] == Decimal('135.4428')
+    assert ticker.prices['GBPJPY']['ask'] == Decimal('135.476943')
+    assert ticker.prices['GBPJPY']['time'] == time
+    assert ticker.prices['EURUSD'] == eurusd
+
+
+def test_position_with_cross(ticker: Ticker) -> None:
+    """Position should be able to convert via a derived cross"""
+    graph = ticker.graph
+    assert isinstance(graph, CurrencyGraph)
+    ps = Position('JPY', 'EURGBP', ticker)
+    assert ps.quote_home_currency_pair == 'GBPJPY'
+    assert ps.price_cur_qh is ticker.prices['GBPJPY']
+    assert ps._get_qh_factor() == Decimal('134.502225')
@@ -0,0 +1,70 @@
+import pytest
+from savoia.ticker.ticker import Ticker
+from savoia.ticker.tick_history import TickHistory
+from savoia.event.event import TickEvent
+from decimal import Decimal
+import numpy as np
+import pandas as pd
+
+
+# ---------------------------------------------------------------
+# TickHistory
+# ---------------------------------------------------------------
+def test_init() -> None:
+    th = TickHistory(3)
+    assert th.capacity == 3
+    assert len(th) == 0
+    times, bids, asks = th.window()
+    assert len(times) == len(bids) == len(asks) == 0
+    with pytest.raises(Exception):
+        TickHistory(0)
+
+
+def test_window() -> None:
+    """window should return the last n ticks, oldest first, even after
+    the buffer has wrapped around."""
+    th = TickHistory(3)
+    base = pd.Timestamp('2020-07-09 12:00:00')
+    for i in range(5):
+        th.append(base + pd.Timedelta(seconds=i), Decimal(i),
+            Decimal(i) + Decimal('0.5'))
+        times, bids, asks = th.window()
+        expected = list(range(max(0, i - 2), i + 1))
+        assert list(bids) == expected
+        assert list(asks) == [e + 0.5 for e in expected]
+        assert list(times) == [(base + pd.Timedelta(seconds=e)).value
+                               for e in expected]
+    assert len(th) == 3
+    assert list(th.window(2)[1]) == [3, 4]
+    assert list(th.window(10)[1]) == [2, 3, 4]
+
+
+def test_window_is_view() -> None:
+    """window should share memory with the buffer and be read-only"""
+    th = TickHistory(4)
+    th.append(pd.Timestamp(0), Decimal('1.1'), Decimal('1.2'))
+    th.append(pd.Timestamp(1), Decimal('1.3'), Decimal('1.4'))
+    times, bids, asks = th.window()
+    assert np.shares_memory(bids, th._bids)
+    with pytest.raises(ValueError):
+        bids[0] = 0.0
+
+
+# ---------------------------------------------------------------
+# Ticker
+# ---------------------------------------------------------------
+def test_ticker_history() -> None:
+    """Ticker should keep history only for the pairs configured"""
+    ticker = Ticker(['GBPUSD', 'USDJPY'], {'GBPUSD': 2})
+    time = pd.Timestamp('2020-07-09 12:23:10')
+    for pair, bid, ask in [('GBPUSD', '1.2541', '1.2543'),
+                           ('USDJPY', '107.25', '107.80'),
+                           ('GBPUSD', '1.2542', '1.2544'),
+                           ('GBPUSD', '1.2540', '1.2545')]:
+        ticker.update_ticker(TickEvent(pair, time, Decimal(bid), Decimal(ask)))
+    assert list(ticker.history) == ['GBPUSD']
+    times, bids, asks = ticker.window('GBPUSD')
+    assert list(bids) == [1.2542, 1.2540]
+    assert list(asks) == [1.2544, 1.2545]
+    with pytest.raises(Exception):
+        Ticker(['GBPUSD'], {'USDJPY': 10})
@@ -68,3 +68,25 @@ def test_update_ticker() -> None:
             for q in ['ask', 'bid']:
                 result.append(ticker.prices[p][q])
         assert result == list(map(Decimal, t[3:]))
+
+
+def test_ready() -> None:
+    """Pairs should be marked ready upon their first tick, and crosses
+    once all of their legs are ready."""
+    ticker = Ticker(['GBPUSD', 'USDJPY', 'EURGBP'])
+    ticker.add_cross('GBPJPY')
+    time = pd.Timestamp('2020-07-09 12:23:10')
+    gbpusd = ticker.ready_mask(['GBPUSD'])
+    gbpjpy = ticker.ready_mask(['GBPJPY'])
+    assert ticker.ready_mask(['USDGBP']) == gbpusd
+    assert ticker.ready_mask(['JPYGBP']) == gbpjpy
+    assert not ticker.is_ready(gbpusd)
+    ticker.update_ticker(TickEvent('GBPUSD', time, Decimal('1.2541'),
+        Decimal('1.2543')))
+    assert ticker.is_ready(gbpusd)
+    assert not ticker.is_ready(gbpjpy)
+    ticker.update_ticker(TickEvent('USDJPY', time, Decimal('107.25'),
+        Decimal('107.80')))
+    assert ticker.is_ready(gbpjpy)
+    assert not ticker.is_ready(ticker.ready_mask(['EURGBP', 'GBPJPY']))
+    assert ticker.is_ready(0)